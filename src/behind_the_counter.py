@@ -9,6 +9,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
 from ssm_parameter_store import SSMParameterStore
+from webdriver import download_complete, wait_until
 
 
 class BehindTheCounter:
@@ -89,25 +90,19 @@ class BehindTheCounter:
         try:
             # Direct navigation to the export URL
             export_url = f"https://franchisee.jerseymikes.com/price-change-perm/export.php?stores={self.store_id}&action=export"
+            download_dir = os.path.join(os.getcwd(), "downloads")
+            started = time.time()
             self.driver.get(export_url)
 
-            # Wait for download to complete by checking the download directory
-            download_dir = os.path.join(os.getcwd(), "downloads")
-            timeout = time.time() + 30  # 30 second timeout
-
-            while time.time() < timeout:
-                files = os.listdir(download_dir)
-                csv_files = [
-                    f
-                    for f in files
-                    if f.endswith(".csv") and not f.endswith(".crdownload")
-                ]
-                if csv_files:
-                    print(f"Download completed: {csv_files[-1]}")
-                    return True
-                time.sleep(1)
-
-            raise TimeoutException("CSV download did not complete within 30 seconds")
+            # Wait for the browser to finish writing the file
+            csv_file = wait_until(
+                self.driver,
+                download_complete(download_dir, "*.csv", started),
+                "btc.download",
+                30,
+            )
+            print(f"Download completed: {os.path.basename(csv_file)}")
+            return True
 
         except Exception as e:
             print(f"CSV download failed: {e!s}")
@@ -230,6 +230,7 @@ class Crunchtime:
                 notes_header = f"Information generated from CrunchTime at {header[2]} for {header[0]}"
                 next(gl_reader)  # skip header line
                 items: list[list[Any]] = []
+                documents: list[qb.BillDocument] = []
                 vendor = None
                 invoice_num = ""
                 invoice_date = None
@@ -268,17 +269,30 @@ class Crunchtime:
                                 f"Syncing {vendor}:{invoice_num}",
                                 extra={"store": store},
                             )
-                            qb.sync_bill(
-                                vendor,
-                                invoice_num,
-                                invoice_date,
-                                notes,
-                                items,
-                                str(store),
+                            documents.append(
+                                qb.BillDocument(
+                                    vendor,
+                                    invoice_num,
+                                    invoice_date,
+                                    notes,
+                                    items,
+                                    str(store),
+                                )
                             )
                         continue
                     else:
                         # map GL code to WMC accounting code
                         # add GL Description to item description
                         items.append([qb.account_ref_lookup(row[0]), row[1], row[2]])
+            outcomes = qb.sync_bills(documents)
+            logger.info(
+                "Synced GL report invoices",
+                extra={
+                    "store": store,
+                    "outcomes": {
+                        status: list(outcomes.values()).count(status)
+                        for status in set(outcomes.values())
+                    },
+                },
+            )
             os.remove(filename)
@@ -5,16 +5,17 @@ All monetary values MUST use Decimal, never float.
 Import from this module for consistent behavior across the codebase.
 
 Example usage:
-    from decimal_utils import TWO_PLACES, ZERO, to_currency, FinancialJsonEncoder
+    from decimal_utils import TWO_PLACES, ZERO, to_currency, parse_money, FinancialJsonEncoder
 
     amount = to_currency("123.45")
+    scraped = parse_money("$1,234.56")
     total = ZERO
     json.dumps(data, cls=FinancialJsonEncoder)
 """
 
 import json
 from datetime import date, datetime
-from decimal import ROUND_HALF_UP, Decimal
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 from typing import Any
 
 # Single source of truth for currency precision
@@ -46,6 +47,135 @@ def to_currency(value: str | int | float | Decimal) -> Decimal:
     return Decimal(str(value)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
 
 
+def parse_money(value: str | int | float | Decimal | None) -> Decimal:
+    """
+    Parse a scraped or report currency string into a quantized Decimal.
+
+    Locale-free replacement for ``Decimal(locale.atof(...))``: it never
+    touches process-global locale state and never round-trips through float.
+
+    Handles dollar signs, thousands separators, surrounding whitespace,
+    accounting negatives "(12.00)", trailing minus "12.00-" and leading
+    minus. None, blanks and a lone "-" parse as zero.
+
+    Args:
+        value: Currency text or a numeric value
+
+    Returns:
+        Decimal quantized to 2 decimal places using ROUND_HALF_UP
+
+    Raises:
+        ValueError: If the text is not a number
+
+    Example:
+        >>> parse_money("$1,234.56")
+        Decimal('1234.56')
+        >>> parse_money("(12.00)")
+        Decimal('-12.00')
+    """
+    if value is None:
+        return ZERO
+    if not isinstance(value, str):
+        return to_currency(value)
+
+    text = value.strip()
+    negative = False
+    if text.startswith("(") and text.endswith(")"):
+        negative = True
+        text = text[1:-1].strip()
+    if text.endswith("-"):
+        negative = not negative
+        text = text[:-1].strip()
+    if text.startswith("-"):
+        negative = not negative
+        text = text[1:].strip()
+    text = text.replace("$", "").replace(",", "").strip()
+    if not text:
+        return ZERO
+
+    try:
+        amount = to_currency(Decimal(text))
+    except InvalidOperation:
+        raise ValueError(f"Not a currency amount: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Not a currency amount: {value!r}")
+    return -amount if negative else amount
+
+
+def _largest_remainder(cents: int, weights: list[int], total_weight: int) -> list[int]:
+    floors = [cents * weight // total_weight for weight in weights]
+    remainders = [cents * weight % total_weight for weight in weights]
+    leftover = cents - sum(floors)
+    ranked = sorted(range(len(weights)), key=lambda i: (remainders[i], i), reverse=True)
+    for position in ranked[:leftover]:
+        floors[position] += 1
+    return floors
+
+
+def allocate(amounts: list[Decimal], weights: list[Decimal]) -> list[list[Decimal]]:
+    """
+    Split the lines of a document across weighted shares to the cent.
+
+    Works in integer cents with largest-remainder rounding (ties go to later
+    shares). Rounding is applied to the running total of the lines and each
+    line gets the difference, so every line's shares sum to the line, and
+    each share's total is within one cent of its exact portion of the
+    document total; pennies never pile up on one share across many lines.
+    A share never has the opposite sign to its line: where the running-total
+    difference would give one, that line is split on its own instead, which
+    can move a share's total one more cent from its exact portion.
+
+    Args:
+        amounts: Line amounts of one document
+        weights: Non-negative relative weights; they need not sum to 1
+
+    Returns:
+        One list per weight holding that share of every line, in order
+
+    Raises:
+        ValueError: If there are no weights or they do not sum to more than 0
+
+    Example:
+        >>> allocate([Decimal("100.00")], [Decimal(1), Decimal(1), Decimal(1)])
+        [[Decimal('33.33')], [Decimal('33.33')], [Decimal('33.34')]]
+    """
+    if not weights or any(weight < 0 for weight in weights):
+        raise ValueError("Weights must be a non-empty list of non-negative numbers")
+    # Scale weights to integers so the whole allocation is integer arithmetic
+    exponents = [Decimal(weight).as_tuple().exponent for weight in weights]
+    places = max(0, *(-exponent for exponent in exponents if isinstance(exponent, int)))
+    scaled = [int(Decimal(weight).scaleb(places)) for weight in weights]
+    total_weight = sum(scaled)
+    if total_weight <= 0:
+        raise ValueError("Weights must sum to more than zero")
+
+    shares: list[list[Decimal]] = [[] for _ in weights]
+    running_cents = 0
+    allocated = [0] * len(weights)
+    for amount in amounts:
+        line_cents = int(to_currency(amount).scaleb(2))
+        running_cents += line_cents
+        cumulative = _largest_remainder(running_cents, scaled, total_weight)
+        line_shares = [
+            after - before for before, after in zip(allocated, cumulative, strict=True)
+        ]
+        if any(
+            share * line_cents < 0 or (share and not line_cents)
+            for share in line_shares
+        ):
+            # The running-total rounding would hand some share a cent of the
+            # wrong sign; split this line on its own instead
+            line_shares = _largest_remainder(line_cents, scaled, total_weight)
+            cumulative = [
+                before + share
+                for before, share in zip(allocated, line_shares, strict=True)
+            ]
+        for share, line_share in zip(shares, line_shares, strict=True):
+            share.append(Decimal(line_share).scaleb(-2))
+        allocated = cumulative
+    return shares
+
+
 class FinancialJsonEncoder(json.JSONEncoder):
     """
     JSON encoder that preserves Decimal precision via string serialization.
@@ -2,12 +2,14 @@ import calendar
 import contextlib
 import datetime
 import logging
+import os
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from decimal import Decimal
-from functools import partial
-from time import sleep
-from typing import Any, cast
+from functools import wraps
+from time import monotonic, sleep
+from typing import Any, Concatenate, ParamSpec, TypeVar, cast
 
-from bs4 import BeautifulSoup, Tag
 from selenium.common.exceptions import (
     ElementNotInteractableException,
     NoSuchElementException,
@@ -15,39 +17,200 @@ from selenium.common.exceptions import (
 )
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import Select, WebDriverWait
-
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import Select
+
+from report_page import ReportPage
+from scrape_cache import (
+    DAILY_JOURNAL,
+    DAILY_SALES,
+    GIFT_CARD_ACH,
+    ScrapeCache,
+    default_cache,
+)
 from ssm_parameter_store import SSMParameterStore
-from webdriver import initialise_driver, wait_for_element
+from webdriver import (
+    TabJob,
+    TabPool,
+    ajax_idle,
+    arm_page_change,
+    click_and_wait,
+    initialise_driver,
+    log_wait_stats,
+    page_changed,
+    reset_wait_stats,
+    wait_for_clickable,
+    wait_for_element,
+    wait_until,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def find_element_text_by_label(soup: BeautifulSoup, label_text: str) -> str | None:
-    """
-    Find element text by searching for a label in section-header divs.
-
-    This is useful for JSF-generated IDs that change frequently. The function
-    searches for divs with class 'section-header' that contain the label text,
-    then extracts the full text content (label: value).
+def parse_daily_sales_summary(page: ReportPage, store: str) -> dict[str, Any]:
+    """Parse the sales, payment, tax and deposit sections of the Daily Sales report.
 
     Args:
-        soup: BeautifulSoup instance of the page
-        label_text: Label text to search for (e.g., "Gift Cards Sold")
+        page: Daily Sales report page
+        store: Store number, used for logging
 
     Returns:
-        Full text content of the element if found, None otherwise
+        Section values keyed by QuickBooks line name. Only the sales lines
+        (all None) are returned when the report has no sales for the day.
     """
-    # Find all section-header divs
-    section_headers = soup.find_all("div", class_="section-header")
-    for header in section_headers:
-        if isinstance(header, Tag):
-            header_text = header.get_text()
-            # Check if this header contains our label text
-            if label_text in header_text:
-                # Return the full text (e.g., "Gift Cards Sold: $0.00")
-                return header_text.strip()
-    return None
+    summary: dict[str, Any] = {}
+    rows = page.table_rows(TAG_IDS["total_sales"])
+    if rows is None:
+        raise Exception("Failed to find total sales table")
+    if len(rows) != 6:
+        summary["Pre-Discount Sales"] = None
+        summary["Discounts"] = None
+        summary["Donations"] = None
+        summary["Surcharge Sales"] = None
+        return summary
+    else:
+        row = rows[4]
+        # Column structure: Day, Net Sales, Surcharge Sales, Royalty Sales,
+        # Total Discounts and Coupons, Pre-Discount Sales, Donations,
+        # Ticket Count, Average Check
+        summary["Pre-Discount Sales"] = row[5]
+        summary["Discounts"] = row[4]
+        summary["Donations"] = row[6]
+        summary["Surcharge Sales"] = row[2]
+
+    # Payment Breakdown
+    rows = page.table_rows(TAG_IDS["payments"])
+    if rows is None:
+        raise Exception("Failed to find payment table")
+    if len(rows) != 6:
+        summary["Cash"] = None
+        summary["Check"] = None
+        summary["InStore Credit Card"] = None
+        summary["Online Credit Card"] = None
+        summary["Gift Card"] = None
+        summary["Online Gift Card"] = None
+        summary["House Account"] = None
+        summary["Remote Payment"] = None
+    else:
+        row = rows[4]
+        summary["Cash"] = row[1]
+        summary["Check"] = row[2]
+        summary["InStore Credit Card"] = row[3]
+        # this does not  include WLD tips
+        summary["Online Credit Card"] = row[4]
+        summary["Gift Card"] = row[5]
+        # this does not yet have WLD gift card tips will be overwritten later
+        summary["Online Gift Card"] = row[6]
+        summary["House Account"] = row[7]
+        summary["Remote Payment"] = row[8]
+
+    # Collected Tax
+    rows = page.table_rows(TAG_IDS["total_tax"])
+    if rows is None:
+        raise Exception("Failed to find collected tax table")
+    if len(rows) != 3:
+        summary["Sales Tax"] = None
+    else:
+        summary["Sales Tax"] = rows[2][7]
+
+    # Gift Cards Sold
+    gift_cards_sold_text = page.label_text("Gift Cards Sold")
+    if gift_cards_sold_text:
+        gift_cards_sold = gift_cards_sold_text.split(":")
+        if len(gift_cards_sold) >= 2:
+            value = gift_cards_sold[1].strip().lstrip("$")
+            summary["Gift Cards Sold"] = value
+        else:
+            logger.warning(
+                "Unexpected format for 'Gift Cards Sold' text: %s",
+                gift_cards_sold_text,
+            )
+            summary["Gift Cards Sold"] = None
+    else:
+        logger.warning("Could not find 'Gift Cards Sold' element for store %s", store)
+        summary["Gift Cards Sold"] = None
+
+    # Register Audit
+    register_audit_text = page.label_text("Register Audit")
+    if register_audit_text:
+        register_audit = register_audit_text.split(":")
+        if len(register_audit) >= 2:
+            value = register_audit[1].strip().lstrip("$")
+            summary["Register Audit"] = value
+        else:
+            logger.warning(
+                "Unexpected format for 'Register Audit' text: %s",
+                register_audit_text,
+            )
+            summary["Register Audit"] = None
+    else:
+        logger.warning("Could not find 'Register Audit' element for store %s", store)
+        summary["Register Audit"] = None
+
+    # Bank Deposits
+    deposit_rows = page.row_texts(TAG_IDS["deposits"])
+    if deposit_rows is None:
+        raise (Exception("Failed to find deposit table"))
+    summary["Bank Deposits"] = "".join(
+        [
+            row.lstrip().replace("\n", " ").replace("   ", "\n")
+            for row in deposit_rows[1:]
+        ]
+    )
+    return summary
+
+
+def parse_online_payments(page: ReportPage) -> dict[str, str | None] | None:
+    """Parse the Online Orders report; None when the store has no table."""
+    payments: dict[str, str | None] = {}
+    rows = page.table_rows(TAG_IDS["online_orders_list"])
+    if rows is None:
+        return None
+    if len(rows) != 2:
+        payments["Tendered"] = None
+        payments["Tip"] = None
+        payments["Total"] = None
+        payments["Interchange Fee"] = None
+        payments["Patent Fee"] = None
+        payments["ECommerce Fee"] = None
+        payments["Total Fees"] = None
+    else:
+        row = rows[1]
+        payments["Tendered"] = row[1]
+        payments["Tip"] = row[2]
+        payments["Total"] = row[3]
+        payments["Interchange Fee"] = row[4]
+        payments["Patent Fee"] = row[5]
+        payments["ECommerce Fee"] = row[6]
+        payments["Total Fees"] = row[7]
+    return payments
+
+
+def parse_royalty_report(page: ReportPage) -> dict[str, dict[str, str]]:
+    """Parse the Royalty report into per-store royalty lines."""
+    royalty_data = {}
+    rows = page.table_rows(TAG_IDS["royalty_list"]) or []
+    for cells in rows[1:-1]:
+        row = [cell.replace(",", "") for cell in cells]
+        royalty_data[row[0]] = {
+            "Net Sales": row[1],
+            "Royalty": row[2],
+            "Advertising": row[4],
+            "CoOp": "0",
+            "Media": row[6],
+        }
+    return royalty_data
+
+
+def parse_third_party_summary(page: ReportPage) -> dict[str, str]:
+    """Parse third party totals by source from the Online Orders summary."""
+    rows = page.table_rows_by_class("table-standard")
+    if rows is None:
+        raise Exception("Failed to find online table")
+    totals = {}
+    for r in rows[1:-1]:
+        totals[r[0]] = r[6]
+    return totals
 
 
 errors = (
@@ -115,36 +278,338 @@ def last_sunday_of_month(year: int, month: int) -> datetime.date:
     return last_day - datetime.timedelta(days=offset)
 
 
+def olo_billing_period(year: int, month: int) -> tuple[datetime.date, datetime.date]:
+    """First and last day of the OLO billing period for a month.
+
+    OLO billing periods end on the last Sunday of the calendar month.
+    """
+    period_end = last_sunday_of_month(year, month)
+    prev_month = month - 1 if month > 1 else 12
+    prev_year = year if month > 1 else year - 1
+    period_start = last_sunday_of_month(prev_year, prev_month) + datetime.timedelta(
+        days=1
+    )
+    return period_start, period_end
+
+
+# Daily Sales report section checkboxes and whether each should be ticked
+DAILY_SALES_SECTIONS = dict(
+    zip(
+        (f"parameters:j_id{i}" for i in range(68, 98, 2)),
+        (
+            True,
+            False,
+            False,
+            False,
+            False,
+            False,
+            False,
+            True,
+            True,
+            True,
+            True,
+            False,
+            True,
+            False,
+            False,
+        ),
+        strict=True,
+    )
+)
+
+FLEXEPOS_LOGIN_URL = "https://fms.flexepos.com/FlexeposWeb/login.seam?actionMethod=home.xhtml%3Auser.clear"
+FLEXEPOS_HOME_URL = "https://fms.flexepos.com/FlexeposWeb/home.seam"
+
+DAILY_SALES_ATTEMPTS = 3
+# Tries per daily sales report page within one scrape
+SECTION_ATTEMPTS = 2
+
+# Bump when a parser's output changes so cached results are scraped again
+PARSER_VERSION = 1
+
+NO_JOURNAL_DATA = "No Journal Data Found"
+
+
+def cached_daily_sales(
+    cache: ScrapeCache | None,
+    store: str,
+    tx_date: datetime.date,
+    scrape: Callable[[], dict[str, dict[str, Any]]],
+    refresh: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Daily sales for a store from ``cache``, scraping on a miss.
+
+    Only complete results (with the pay-ins section) are cached, so a
+    scrape that stopped part way is retried next time.
+
+    Args:
+        cache: Scrape cache, or None to always scrape
+        store: Store number
+        tx_date: Business date
+        scrape: Scrapes the report, returning sales keyed by store
+        refresh: Drop any cached result and scrape again
+
+    Returns:
+        Daily sales sections keyed by store
+    """
+    if cache is None:
+        return scrape()
+    if refresh:
+        cache.invalidate(DAILY_SALES, store, tx_date)
+    sales = cache.fetch(
+        DAILY_SALES,
+        store,
+        tx_date,
+        lambda: scrape()[store],
+        keep=lambda sections: "Payins" in sections,
+    )
+    return {store: sales}
+
+
+def cached_daily_journal(
+    cache: ScrapeCache | None,
+    stores: list[str],
+    qdate: str,
+    scrape: Callable[[list[str]], dict[str, str]],
+    refresh: bool = False,
+) -> dict[str, str]:
+    """Daily journals from ``cache``, scraping only the stores it misses.
+
+    Stores without journal data are not cached.
+
+    Args:
+        cache: Scrape cache, or None to always scrape
+        stores: Store numbers
+        qdate: Journal date as MMDDYYYY
+        scrape: Scrapes the report for a list of stores
+        refresh: Drop any cached journals and scrape again
+
+    Returns:
+        Journal text keyed by store
+    """
+    if cache is None:
+        return scrape(stores)
+    journal_date = datetime.datetime.strptime(qdate, "%m%d%Y").date()
+    drawer_opens: dict[str, str] = {}
+    missing = []
+    for store in stores:
+        if refresh:
+            cache.invalidate(DAILY_JOURNAL, store, journal_date)
+        journal = cache.get(DAILY_JOURNAL, store, journal_date)
+        if journal is None:
+            missing.append(store)
+        else:
+            drawer_opens[store] = journal
+    if missing:
+        for store, journal in scrape(missing).items():
+            if journal != NO_JOURNAL_DATA:
+                cache.put(DAILY_JOURNAL, store, journal_date, journal)
+            drawer_opens[store] = journal
+    return {store: drawer_opens[store] for store in stores if store in drawer_opens}
+
+
+@dataclass
+class DailySalesBatch:
+    """Outcome of Flexepos.get_daily_sales_batch().
+
+    Attributes:
+        sales: Daily sales sections keyed by store, as from get_daily_sales()
+        failed: Error message for each store that failed every attempt
+    """
+
+    sales: dict[str, dict[str, Any]] = field(default_factory=dict)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class SectionRun:
+    """Outcome of one daily sales report page.
+
+    Attributes:
+        ok: The section's values were collected
+        attempts: Tries so far, across retries of the whole scrape
+        seconds: Time spent on the section, including failed tries
+        error: Last failure, cleared once the section succeeds
+    """
+
+    ok: bool = False
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+
+@dataclass
+class DailySalesProgress:
+    """Sections collected so far by Flexepos.scrape_daily_sales().
+
+    Attributes:
+        sales: Values from the sections that succeeded
+        sections: Run details keyed by section name, in scrape order
+        complete: Every section needed for the day has been collected
+    """
+
+    sales: dict[str, Any] = field(default_factory=dict)
+    sections: dict[str, SectionRun] = field(default_factory=dict)
+    complete: bool = False
+
+    def next_section(self) -> str | None:
+        """The first section tried without success, if any."""
+        return next((name for name, run in self.sections.items() if not run.ok), None)
+
+
+# Submits a daily sales report page, then collects its parsed values
+SalesSection = tuple[
+    Callable[[str, str], WebElement],
+    Callable[[str, str, WebElement], dict[str, Any]],
+]
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _logged_in(
+    retry: bool = True,
+) -> Callable[
+    [Callable[Concatenate["Flexepos", P], R]], Callable[Concatenate["Flexepos", P], R]
+]:
+    """Run a report method on the shared browser session.
+
+    The session is opened (or checked and reopened if it expired) before
+    the method runs. If the method fails because Flexepos logged the session
+    out part way through, it logs in again and reruns the method once;
+    pass ``retry=False`` for methods that change data. Outside a ``with``
+    block the browser is closed when the method returns.
+    """
+
+    def decorator(
+        method: Callable[Concatenate["Flexepos", P], R],
+    ) -> Callable[Concatenate["Flexepos", P], R]:
+        @wraps(method)
+        def wrapper(self: "Flexepos", *args: P.args, **kwargs: P.kwargs) -> R:
+            self._depth += 1
+            try:
+                self._ensure_session()
+                try:
+                    return method(self, *args, **kwargs)
+                except WebDriverException:
+                    if not retry or not self._session_expired():
+                        raise
+                    logger.warning(
+                        "Flexepos session expired, logging in again",
+                        extra={"report": method.__name__},
+                    )
+                    self._login()
+                    return method(self, *args, **kwargs)
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.close()
+
+        return wrapper
+
+    return decorator
+
+
 class Flexepos:
-    """"""
+    """Flexepos back-office reports scraped through one browser session.
+
+    Each report method logs in on first use. Use the instance as a context
+    manager to share one login across several reports:
+
+        with Flexepos() as dj:
+            payments = dj.get_online_payments(stores, year, month)
+            royalty = dj.get_royalty_report("wmc", start, end)
+
+    Daily sales and journals are served from the scrape cache configured by
+    environment (see scrape_cache.default_cache) when one is set.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, cache: ScrapeCache | None = None) -> None:
         self._parameters = cast(
             "SSMParameterStore", SSMParameterStore(prefix="/prod")["flexepos"]
         )
+        self._cache = cache if cache is not None else default_cache(PARSER_VERSION)
+        # Daily sales sections collected per (store, date), for resuming
+        self.sales_progress: dict[tuple[str, datetime.date], DailySalesProgress] = {}
+        # Browser tabs for the daily sales pages; 1 keeps them in one tab
+        self.max_tabs = int(os.environ.get("FLEXEPOS_TABS", "1"))
+        self._driver: Any = None
+        self._depth = 0
+
+    def __enter__(self) -> "Flexepos":
+        self._depth += 1
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self.close()
+
+    def close(self) -> None:
+        """Log out and quit the browser, if one is open."""
+        driver, self._driver = self._driver, None
+        if driver is None:
+            return
+        with contextlib.suppress(WebDriverException):
+            driver.find_element(By.ID, TAG_IDS["home_logout"]).click()
+        with contextlib.suppress(WebDriverException):
+            driver.close()
+        with contextlib.suppress(WebDriverException):
+            driver.quit()
+        logger.info("closed driver")
+        log_wait_stats()
+        reset_wait_stats()
+
+    def _session_expired(self) -> bool:
+        try:
+            return bool(self._driver.find_elements(By.ID, TAG_IDS["login_username"]))
+        except WebDriverException:
+            # The browser itself is gone
+            return True
 
-    """
-    """
+    def _ensure_session(self) -> None:
+        if self._driver is None:
+            self._login()
+            return
+        try:
+            self._driver.get(FLEXEPOS_HOME_URL)
+            expired = self._session_expired()
+        except WebDriverException:
+            expired = True
+        if expired:
+            logger.info("Flexepos session expired, logging in again")
+            self._login()
 
     def _login(self) -> None:
+        if self._driver is not None:
+            with contextlib.suppress(WebDriverException):
+                self._driver.quit()
         self._driver = initialise_driver()
         driver = self._driver
         driver.set_page_load_timeout(45)
-        driver.get(
-            "https://fms.flexepos.com/FlexeposWeb/login.seam?actionMethod=home.xhtml%3Auser.clear"
-        )
-        sleep(2)
+        driver.get(FLEXEPOS_LOGIN_URL)
         driver.get("https://fms.flexepos.com/FlexeposWeb/")
-        sleep(7)
-        driver.find_element(By.ID, TAG_IDS["login_username"]).clear()
+        wait_for_clickable(
+            driver, (By.ID, TAG_IDS["login_username"]), "flexepos.login_form", 20
+        ).clear()
         driver.find_element(By.ID, TAG_IDS["login_username"]).send_keys(
             str(self._parameters["user"])
         )
         driver.find_element(By.ID, TAG_IDS["login_password"]).clear()
+        old_root = arm_page_change(driver)
         driver.find_element(By.ID, TAG_IDS["login_password"]).send_keys(
             str(self._parameters["password"]) + Keys.ENTER
         )
+        wait_until(driver, page_changed(old_root), "flexepos.login", 30, required=False)
+
+    def _open_report(self, header_id: str, item_id: str) -> None:
+        """Open a report from the menu bar and wait for its page to load."""
+        driver = self._driver
+        wait_for_clickable(driver, (By.ID, header_id), "flexepos.menu").click()
+        wait_for_clickable(driver, (By.ID, item_id), "flexepos.menu")
+        click_and_wait(driver, (By.ID, item_id), "flexepos.open_report")
 
+    @_logged_in()
     def get_third_party_transactions(
         self, stores: list[str], year: int, month: int
     ) -> dict[str, dict[str, str]]:
@@ -155,124 +620,77 @@ class Flexepos:
         span_date_start = span_dates[0].strftime("%m%d%Y")
         span_date_end = span_dates[1].strftime("%m%d%Y")
 
-        self._login()
         driver = self._driver
 
         payment_data: dict[str, dict[str, str]] = {}
 
-        try:
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(0)).click()
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(0, 13)).click()
-            sleep(2)
-            for store in stores:
-                payment_data[store] = {}
-                sleep(3)
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
-                driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
-                driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(
-                    span_date_start
-                )
-                driver.find_element(By.ID, TAG_IDS["end_date"]).clear()
-                driver.find_element(By.ID, TAG_IDS["end_date"]).send_keys(span_date_end)
-                driver.find_element(By.ID, TAG_IDS["group_by"]).click()
-                Select(
-                    driver.find_element(By.ID, TAG_IDS["group_by"])
-                ).select_by_visible_text("Summary")
-                driver.find_element(By.ID, TAG_IDS["submit"]).click()
-                sleep(5)
-                soup = BeautifulSoup(driver.page_source, features="html.parser")
-                online_table = soup.find("table", attrs={"class": "table-standard"})
-                if not online_table or not isinstance(online_table, Tag):
-                    payment_data.pop(store, None)
-                    continue
-                rows = online_table.find_all("tr")
-                for row in rows[1:]:
-                    r = [ele.text.strip() for ele in row.find_all("td")]
-                    payment_data[store][r[0]] = r[6]
-                driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
-        finally:
-            if driver:
-                with contextlib.suppress(WebDriverException):
-                    self._driver.close()
-                self._driver.quit()
-                logging.info("closed driver")
+        self._open_report(
+            TAG_IDS["menu_header_root"].format(0),
+            TAG_IDS["menu_item_root"].format(0, 13),
+        )
+        for store in stores:
+            payment_data[store] = {}
+            wait_for_clickable(
+                driver, (By.ID, TAG_IDS["parameters_store"]), "flexepos.parameters"
+            ).clear()
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
+            driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
+            driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(span_date_start)
+            driver.find_element(By.ID, TAG_IDS["end_date"]).clear()
+            driver.find_element(By.ID, TAG_IDS["end_date"]).send_keys(span_date_end)
+            driver.find_element(By.ID, TAG_IDS["group_by"]).click()
+            Select(
+                driver.find_element(By.ID, TAG_IDS["group_by"])
+            ).select_by_visible_text("Summary")
+            click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+            page = ReportPage(driver.page_source)
+            rows = page.table_rows_by_class("table-standard")
+            if rows is None:
+                payment_data.pop(store, None)
+                continue
+            for r in rows[1:]:
+                payment_data[store][r[0]] = r[6]
+            driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
 
         return payment_data
 
     """
     """
 
+    @_logged_in()
     def get_online_payments(
         self, stores: list[str], year: int, month: int
     ) -> dict[str, dict[str, str | None]]:
-        # OLO billing periods end on the last Sunday of the calendar month
-        period_end = last_sunday_of_month(year, month)
-        prev_month = month - 1 if month > 1 else 12
-        prev_year = year if month > 1 else year - 1
-        period_start = last_sunday_of_month(prev_year, prev_month) + datetime.timedelta(
-            days=1
-        )
+        period_start, period_end = olo_billing_period(year, month)
         span_date_start = period_start.strftime("%m%d%Y")
         span_date_end = period_end.strftime("%m%d%Y")
 
-        self._login()
         driver = self._driver
 
         payment_data: dict[str, dict[str, str | None]] = {}
 
-        try:
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(2)).click()
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(2, 1)).click()
-            sleep(2)
-            for store in stores:
-                payment_data[store] = {}
-                sleep(3)
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
-                driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
-                driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(
-                    span_date_start
-                )
-                driver.find_element(By.ID, TAG_IDS["end_date"]).clear()
-                driver.find_element(By.ID, TAG_IDS["end_date"]).send_keys(span_date_end)
-                driver.find_element(By.ID, TAG_IDS["submit"]).click()
-                sleep(5)
-                soup = BeautifulSoup(driver.page_source, features="html.parser")
-                online_table = soup.find(
-                    "table", attrs={"id": TAG_IDS["online_orders_list"]}
-                )
-                if not online_table or not isinstance(online_table, Tag):
-                    payment_data.pop(store, None)
-                    continue
-                rows = online_table.find_all("tr")
-                if len(rows) != 2:
-                    payment_data[store]["Tendered"] = None
-                    payment_data[store]["Tip"] = None
-                    payment_data[store]["Total"] = None
-                    payment_data[store]["Interchange Fee"] = None
-                    payment_data[store]["Patent Fee"] = None
-                    payment_data[store]["ECommerce Fee"] = None
-                    payment_data[store]["Total Fees"] = None
-                else:
-                    row = [ele.text.strip() for ele in rows[1].find_all("td")]
-                    payment_data[store]["Tendered"] = row[1]
-                    payment_data[store]["Tip"] = row[2]
-                    payment_data[store]["Total"] = row[3]
-                    payment_data[store]["Interchange Fee"] = row[4]
-                    payment_data[store]["Patent Fee"] = row[5]
-                    payment_data[store]["ECommerce Fee"] = row[6]
-                    payment_data[store]["Total Fees"] = row[7]
-                driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
-        finally:
-            if driver:
-                with contextlib.suppress(WebDriverException):
-                    self._driver.close()
-                self._driver.quit()
+        self._open_report(
+            TAG_IDS["menu_header_root"].format(2),
+            TAG_IDS["menu_item_root"].format(2, 1),
+        )
+        for store in stores:
+            payment_data[store] = {}
+            wait_for_clickable(
+                driver, (By.ID, TAG_IDS["parameters_store"]), "flexepos.parameters"
+            ).clear()
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
+            driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
+            driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(span_date_start)
+            driver.find_element(By.ID, TAG_IDS["end_date"]).clear()
+            driver.find_element(By.ID, TAG_IDS["end_date"]).send_keys(span_date_end)
+            click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+            page = ReportPage(driver.page_source)
+            store_payments = parse_online_payments(page)
+            if store_payments is None:
+                payment_data.pop(store, None)
+                continue
+            payment_data[store] = store_payments
+            driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
 
         return payment_data
 
@@ -280,301 +698,401 @@ class Flexepos:
     """
 
     def get_daily_sales(
+        self, store: str, tx_date: datetime.date, refresh: bool = False
+    ) -> dict[str, dict[str, Any]]:
+        """Daily sales sections for a store, from the cache when possible."""
+        return cached_daily_sales(
+            self._cache,
+            store,
+            tx_date,
+            lambda: self.scrape_daily_sales(store, tx_date),
+            refresh,
+        )
+
+    @_logged_in()
+    def scrape_daily_sales(
         self, store: str, tx_date: datetime.date
     ) -> dict[str, dict[str, Any]]:
-        self._login()
-        driver = self._driver
-        sales_data: dict[str, dict[str, Any]] = {}
+        """Scrape the daily sales report pages for a store, section by section.
+
+        Each section is retried on its own (after logging in again if the
+        session expired) and the sections collected so far are kept in
+        ``sales_progress``, so a failure late in the report, or a retry of
+        the whole call, resumes at the section that failed.
+
+        With ``max_tabs`` above 1 the pending sections are first run side by
+        side in browser tabs (see webdriver.TabPool); sections that fail
+        there are retried in the main tab.
+        """
         tx_date_str = tx_date.strftime("%m%d%Y")
-        try:
-            logger.info("getting sales", extra={"store": store, "date": tx_date_str})
-            sleep(2)
-            driver.get("https://fms.flexepos.com/FlexeposWeb/home.seam")
-            sales_data[store] = {}
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(0)).click()
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(0, 1)).click()
-            sleep(4)
-            driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
-            driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
-            driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(tx_date_str)
-            driver.find_element(By.ID, TAG_IDS["end_date"]).clear()
-            driver.find_element(By.ID, TAG_IDS["end_date"]).send_keys(tx_date_str)
-            checkboxes = filter(
-                None,
-                ("parameters:j_id{}," * 15).format(*range(68, 98, 2)).split(","),
-            )
-            states = [
-                True,
-                False,
-                False,
-                False,
-                False,
-                False,
-                False,
-                True,
-                True,
-                True,
-                True,
-                False,
-                True,
-                False,
-                False,
-            ]
-            for checkbox, state in zip(
-                map(partial(driver.find_element, By.NAME), checkboxes),
-                states,
-                strict=False,
-            ):
-                if state != checkbox.is_selected():
-                    checkbox.click()
-            driver.find_element(By.ID, TAG_IDS["submit"]).click()
-            sleep(4)
-            soup = BeautifulSoup(driver.page_source, features="html.parser")
-            totalsales_table = soup.find("table", attrs={"id": TAG_IDS["total_sales"]})
-            if not totalsales_table or not isinstance(totalsales_table, Tag):
-                raise Exception("Failed to find total sales table")
-            rows = totalsales_table.find_all("tr")
-            if len(rows) != 6:
-                sales_data[store]["Pre-Discount Sales"] = None
-                sales_data[store]["Discounts"] = None
-                sales_data[store]["Donations"] = None
-                sales_data[store]["Surcharge Sales"] = None
-                return sales_data
-            else:
-                row = [ele.text.strip() for ele in rows[4].find_all("td")]
-                # Column structure: Day, Net Sales, Surcharge Sales, Royalty Sales,
-                # Total Discounts and Coupons, Pre-Discount Sales, Donations,
-                # Ticket Count, Average Check
-                sales_data[store]["Pre-Discount Sales"] = row[5]
-                sales_data[store]["Discounts"] = row[4]
-                sales_data[store]["Donations"] = row[6]
-                sales_data[store]["Surcharge Sales"] = row[2]
-
-            # Payment Breakdown
-            payment_table = soup.find("table", attrs={"id": TAG_IDS["payments"]})
-            if not payment_table or not isinstance(payment_table, Tag):
-                raise Exception("Failed to find payment table")
-            rows = payment_table.find_all("tr")
-            if len(rows) != 6:
-                sales_data[store]["Cash"] = None
-                sales_data[store]["Check"] = None
-                sales_data[store]["InStore Credit Card"] = None
-                sales_data[store]["Online Credit Card"] = None
-                sales_data[store]["Gift Card"] = None
-                sales_data[store]["Online Gift Card"] = None
-                sales_data[store]["House Account"] = None
-                sales_data[store]["Remote Payment"] = None
-            else:
-                row = [ele.text.strip() for ele in rows[4].find_all("td")]
-                sales_data[store]["Cash"] = row[1]
-                sales_data[store]["Check"] = row[2]
-                sales_data[store]["InStore Credit Card"] = row[3]
-                # this does not  include WLD tips
-                sales_data[store]["Online Credit Card"] = row[4]
-                sales_data[store]["Gift Card"] = row[5]
-                # this does not yet have WLD gift card tips will be overwritten later
-                sales_data[store]["Online Gift Card"] = row[6]
-                sales_data[store]["House Account"] = row[7]
-                sales_data[store]["Remote Payment"] = row[8]
-
-            # Collected Tax
-            payment_table = soup.find("table", attrs={"id": TAG_IDS["total_tax"]})
-            if not payment_table or not isinstance(payment_table, Tag):
-                raise Exception("Failed to find collected tax table")
-            rows = payment_table.find_all("tr")
-            if len(rows) != 3:
-                sales_data[store]["Sales Tax"] = None
-            else:
-                row = [ele.text.strip() for ele in rows[2].find_all("td")]
-                sales_data[store]["Sales Tax"] = row[7]
-
-            # Gift Cards Sold
-            gift_cards_sold_text = find_element_text_by_label(soup, "Gift Cards Sold")
-            if gift_cards_sold_text:
-                gift_cards_sold = gift_cards_sold_text.split(":")
-                if len(gift_cards_sold) >= 2:
-                    value = gift_cards_sold[1].strip().lstrip("$")
-                    sales_data[store]["Gift Cards Sold"] = value
-                else:
-                    logger.warning(
-                        "Unexpected format for 'Gift Cards Sold' text: %s",
-                        gift_cards_sold_text,
-                    )
-                    sales_data[store]["Gift Cards Sold"] = None
-            else:
-                logger.warning(
-                    "Could not find 'Gift Cards Sold' element for store %s", store
-                )
-                sales_data[store]["Gift Cards Sold"] = None
-
-            # Register Audit
-            register_audit_text = find_element_text_by_label(soup, "Register Audit")
-            if register_audit_text:
-                register_audit = register_audit_text.split(":")
-                if len(register_audit) >= 2:
-                    value = register_audit[1].strip().lstrip("$")
-                    sales_data[store]["Register Audit"] = value
-                else:
-                    logger.warning(
-                        "Unexpected format for 'Register Audit' text: %s",
-                        register_audit_text,
-                    )
-                    sales_data[store]["Register Audit"] = None
+        progress = self.sales_progress.get((store, tx_date))
+        if progress is None or progress.complete:
+            progress = self.sales_progress[(store, tx_date)] = DailySalesProgress()
+        logger.info(
+            "getting sales",
+            extra={
+                "store": store,
+                "date": tx_date_str,
+                "resume_from": progress.next_section(),
+                "tabs": self.max_tabs,
+            },
+        )
+        sections: dict[str, SalesSection] = {
+            "summary": (self._submit_summary, self._collect_summary),
+            "cc_tips": (self._submit_cc_tips, self._collect_cc_tips),
+            "payins": (self._submit_payins, self._collect_payins),
+            "third_party": (self._submit_third_party, self._collect_third_party),
+        }
+        pending = {
+            name: section
+            for name, section in sections.items()
+            if not progress.sections.get(name, SectionRun()).ok
+        }
+        collected: dict[str, dict[str, Any]] = {}
+        in_tabs = self.max_tabs > 1 and len(pending) > 1
+        if in_tabs:
+            collected = self._collect_in_tabs(progress, pending, store, tx_date_str)
+            if len(collected) < len(pending):
+                self._ensure_session()
+        for name, section in pending.items():
+            if name in collected:
+                progress.sales.update(collected[name])
+                progress.sections[name].ok = True
+                progress.sections[name].error = None
             else:
-                logger.warning(
-                    "Could not find 'Register Audit' element for store %s", store
+                # A failed try in a tab counts against the section's attempts
+                self._run_section(
+                    progress,
+                    name,
+                    section,
+                    store,
+                    tx_date_str,
+                    max(1, SECTION_ATTEMPTS - 1) if in_tabs else SECTION_ATTEMPTS,
                 )
-                sales_data[store]["Register Audit"] = None
-
-            # Bank Deposits
-            deposit_table = soup.find("table", attrs={"id": TAG_IDS["deposits"]})
-            if not deposit_table or not isinstance(deposit_table, Tag):
-                raise (Exception("Failed to find deposit table"))
-            rows = deposit_table.find_all("tr")
-            sales_data[store]["Bank Deposits"] = "".join(
-                [
-                    row.get_text().lstrip().replace("\n", " ").replace("   ", "\n")
-                    for row in rows[1:]
-                ]
-            )
+            if name == "summary" and progress.sales["Pre-Discount Sales"] is None:
+                # No sales that day, the other pages have nothing to add
+                break
+        progress.complete = True
+        logger.info(
+            "completed daily sales",
+            extra={
+                "store": store,
+                "date": tx_date_str,
+                "sections": {
+                    name: {
+                        "seconds": round(run.seconds, 2),
+                        "attempts": run.attempts,
+                    }
+                    for name, run in progress.sections.items()
+                },
+            },
+        )
+        return {store: dict(progress.sales)}
+
+    def _collect_in_tabs(
+        self,
+        progress: DailySalesProgress,
+        sections: dict[str, SalesSection],
+        store: str,
+        tx_date_str: str,
+    ) -> dict[str, dict[str, Any]]:
+        """Run sections in parallel tabs, returning the ones that succeeded."""
 
-            driver.find_element(By.ID, TAG_IDS["menu_header"].format(0)).click()
-            driver.find_element(By.ID, TAG_IDS["menu_item"].format(0, 9)).click()
-            driver.find_element(By.ID, TAG_IDS["submit"]).click()
-            sleep(4)
-            cctips_element = wait_for_element(driver, (By.ID, TAG_IDS["cc_tips_1"]))
-            if cctips_element is not None:
-                cctips = driver.find_element(By.ID, TAG_IDS["cc_tips_1"]).text
-                # don't do this I don't know where the WLD online tips go
-                # sales_data[store]["Online Credit Card"] = driver.find_element(
-                #     By.ID, TAG_IDS["cc_online"]
-                # ).text
-            else:
-                cctips = driver.find_element(By.ID, TAG_IDS["cc_tips_2"]).text
-            sales_data[store]["CC Tips"] = cctips
-            if len(driver.find_elements(By.ID, TAG_IDS["online_cc_tips_1"])) > 0:
-                cctips = driver.find_element(By.ID, TAG_IDS["online_cc_tips_1"]).text
-            else:
-                cctips = driver.find_element(By.ID, TAG_IDS["online_cc_tips_2"]).text
-            sales_data[store]["Online CC Tips"] = cctips
-            sales_data[store]["Online WLD Tips"] = driver.find_element(
-                By.ID, TAG_IDS["online_wld_tips_1"]
-            ).text
-            sales_data[store]["Gift Card Tips"] = driver.find_element(
-                By.ID, TAG_IDS["gc_tips"]
-            ).text
-            sales_data[store]["Online WLD Gift Card Tips"] = driver.find_element(
-                By.ID, TAG_IDS["online_gc_tips"]
-            ).text
-            sales_data[store]["Online Gift Card + WLD Tip"] = driver.find_element(
-                By.ID, TAG_IDS["gc_online"]
-            ).text
-
-            # get pay ins
-            driver.find_element(By.ID, TAG_IDS["menu_header"].format(1)).click()
-            WebDriverWait(driver, 25, ignored_exceptions=errors).until(
-                lambda d: (
-                    driver.find_element(
-                        By.ID, TAG_IDS["menu_item"].format(1, 6)
-                    ).click()
-                    or True
-                )
+        def job(section: SalesSection) -> TabJob:
+            submit, collect = section
+
+            def start(driver: Any) -> Any:
+                driver.get(FLEXEPOS_HOME_URL)
+                return submit(store, tx_date_str)
+
+            return TabJob(
+                submit=start,
+                collect=lambda _driver, old_root: collect(store, tx_date_str, old_root),
             )
-            sleep(2)
-            types_element = wait_for_element(driver, (By.ID, TAG_IDS["types"]))
-            if types_element:
-                types_element.send_keys("Payins")
-            else:
-                raise Exception("Failed to find payins types element")
-            self.set_date_range(driver, tx_date_str)
-            driver.find_element(By.ID, TAG_IDS["submit"]).click()
-            sleep(4)
-            payins_element = wait_for_element(driver, (By.ID, TAG_IDS["transactions"]))
-            if payins_element is not None:
-                payins = driver.find_element(By.ID, TAG_IDS["transactions"]).text
-            else:
-                payins = wait_for_element(driver, (By.ID, TAG_IDS["payins"]))
-                if payins:
-                    payins = payins.text
-                else:
-                    raise Exception("Failed to find payins element")
-            sales_data[store]["Payins"] = payins
-
-            # # get pay outs
-            # if driver.find_element(By.ID, TAG_IDS["switch_off"]).is_displayed():
-            #     driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
-            # sleep(4)
-            # WebDriverWait(driver, 18, ignored_exceptions=errors).until(
-            #     lambda d: driver.find_element(By.ID, TAG_IDS["types"]).send_keys(
-            #         "Store Payouts"
-            #     )
-            #     or True
-            # )
-            # self.set_date_range(driver, tx_date_str)
-            # driver.find_element(By.ID, TAG_IDS["submit"]).click()
-            # sleep(10)
-            # payouts_element = wait_for_element(
-            #     driver, (By.ID, TAG_IDS["transactions"]), 7
-            # )
-            # if payouts_element is not None:
-            #     payouts = payouts_element.text
-            # else:
-            #     payouts = driver.find_element(By.ID, "j_id84").text
-            # sales_data[store]["Payouts"] = payouts
-
-            # break down third party
-            driver.find_element(By.ID, TAG_IDS["menu_header"].format(0)).click()
-            WebDriverWait(driver, 25, ignored_exceptions=errors).until(
-                lambda d: (
-                    driver.find_element(
-                        By.ID, TAG_IDS["menu_item"].format(0, 13)
-                    ).click()
-                    or True
-                )
+
+        collected: dict[str, dict[str, Any]] = {}
+        pool = TabPool(self._driver, self.max_tabs)
+        jobs = {name: job(section) for name, section in sections.items()}
+        for name, result in pool.run(jobs):
+            run = progress.sections.setdefault(name, SectionRun())
+            run.attempts += 1
+            run.seconds += result.seconds
+            if result.error is None:
+                collected[name] = result.value
+                continue
+            run.error = f"{type(result.error).__name__}: {result.error!s}"
+            logger.warning(
+                "daily sales section failed in tab",
+                extra={"store": store, "section": name, "error": run.error},
             )
-            driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
-            self.set_date_range(driver, tx_date_str)
-            driver.find_element(By.ID, TAG_IDS["group_by"]).click()
-            Select(
-                driver.find_element(By.ID, TAG_IDS["group_by"])
-            ).select_by_visible_text("Summary")
-            driver.find_element(By.ID, TAG_IDS["submit"]).click()
-            sleep(5)
+        return collected
+
+    def _run_section(
+        self,
+        progress: DailySalesProgress,
+        name: str,
+        section: SalesSection,
+        store: str,
+        tx_date_str: str,
+        attempts: int = SECTION_ATTEMPTS,
+    ) -> None:
+        submit, collect = section
+        run = progress.sections.setdefault(name, SectionRun())
+        for attempt in range(1, attempts + 1):
+            run.attempts += 1
+            started = monotonic()
             try:
-                soup = BeautifulSoup(driver.page_source, features="html.parser")
-                online_table = soup.find("table", attrs={"class": "table-standard"})
-                if not online_table or not isinstance(online_table, Tag):
-                    raise Exception("Failed to find online table")
-                rows = online_table.find_all("tr")
-                for table_row in rows[1:-1]:
-                    r = [ele.text.strip() for ele in table_row.find_all("td")]
-                    sales_data[store][r[0]] = r[6]
-            except Exception:
+                values = collect(store, tx_date_str, submit(store, tx_date_str))
+            except Exception as e:
+                run.error = f"{type(e).__name__}: {e!s}"
                 logger.warning(
-                    "No third party transactions found",
-                    extra={"store": store, "date": tx_date_str},
+                    "daily sales section failed",
+                    extra={
+                        "store": store,
+                        "section": name,
+                        "attempt": attempt,
+                        "error": run.error,
+                    },
                 )
-            logger.info(
-                "completed daily sales", extra={"store": store, "date": tx_date_str}
+                if attempt == attempts:
+                    raise
+                self._ensure_session()
+            else:
+                progress.sales.update(values)
+                run.ok = True
+                run.error = None
+                return
+            finally:
+                run.seconds += monotonic() - started
+
+    def _open_menu_report(self, header: int, item: int) -> None:
+        """Open a report by its menu position.
+
+        The menu has different generated ids on the home page and on report
+        pages, so use whichever set the current page has.
+        """
+        if self._driver.find_elements(
+            By.ID, TAG_IDS["menu_header_root"].format(header)
+        ):
+            self._open_report(
+                TAG_IDS["menu_header_root"].format(header),
+                TAG_IDS["menu_item_root"].format(header, item),
             )
-        finally:
-            if driver:
-                try:
-                    self._driver.close()
-                except WebDriverException:
-                    logger.exception("Error closing driver")
-                self._driver.quit()
-                logger.info("closed driver")
-                sleep(5)
-        return sales_data
+        else:
+            self._open_report(
+                TAG_IDS["menu_header"].format(header),
+                TAG_IDS["menu_item"].format(header, item),
+            )
+
+    def _click_submit(self) -> WebElement:
+        """Submit the report parameters without waiting for the report."""
+        old_root: WebElement = arm_page_change(self._driver)
+        self._driver.find_element(By.ID, TAG_IDS["submit"]).click()
+        return old_root
+
+    def _wait_for_report(self, old_root: WebElement) -> None:
+        wait_until(
+            self._driver,
+            page_changed(old_root),
+            "flexepos.submit",
+            30,
+            required=False,
+        )
+
+    def _submit_summary(self, store: str, tx_date_str: str) -> WebElement:
+        driver = self._driver
+        self._open_menu_report(0, 1)
+        wait_for_clickable(
+            driver, (By.ID, TAG_IDS["parameters_store"]), "flexepos.parameters"
+        ).clear()
+        driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
+        driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
+        driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(tx_date_str)
+        driver.find_element(By.ID, TAG_IDS["end_date"]).clear()
+        driver.find_element(By.ID, TAG_IDS["end_date"]).send_keys(tx_date_str)
+        for name, state in DAILY_SALES_SECTIONS.items():
+            checkbox = driver.find_element(By.NAME, name)
+            if state != checkbox.is_selected():
+                checkbox.click()
+        return self._click_submit()
+
+    def _collect_summary(
+        self, store: str, _tx_date_str: str, old_root: WebElement
+    ) -> dict[str, Any]:
+        self._wait_for_report(old_root)
+        return parse_daily_sales_summary(ReportPage(self._driver.page_source), store)
+
+    def _submit_cc_tips(self, _store: str, _tx_date_str: str) -> WebElement:
+        self._open_menu_report(0, 9)
+        return self._click_submit()
+
+    def _collect_cc_tips(
+        self, _store: str, _tx_date_str: str, old_root: WebElement
+    ) -> dict[str, Any]:
+        driver = self._driver
+        self._wait_for_report(old_root)
+        sales: dict[str, Any] = {}
+        cctips_element = wait_for_element(driver, (By.ID, TAG_IDS["cc_tips_1"]))
+        if cctips_element is not None:
+            cctips = driver.find_element(By.ID, TAG_IDS["cc_tips_1"]).text
+            # don't do this I don't know where the WLD online tips go
+            # sales["Online Credit Card"] = driver.find_element(
+            #     By.ID, TAG_IDS["cc_online"]
+            # ).text
+        else:
+            cctips = driver.find_element(By.ID, TAG_IDS["cc_tips_2"]).text
+        sales["CC Tips"] = cctips
+        if len(driver.find_elements(By.ID, TAG_IDS["online_cc_tips_1"])) > 0:
+            cctips = driver.find_element(By.ID, TAG_IDS["online_cc_tips_1"]).text
+        else:
+            cctips = driver.find_element(By.ID, TAG_IDS["online_cc_tips_2"]).text
+        sales["Online CC Tips"] = cctips
+        sales["Online WLD Tips"] = driver.find_element(
+            By.ID, TAG_IDS["online_wld_tips_1"]
+        ).text
+        sales["Gift Card Tips"] = driver.find_element(By.ID, TAG_IDS["gc_tips"]).text
+        sales["Online WLD Gift Card Tips"] = driver.find_element(
+            By.ID, TAG_IDS["online_gc_tips"]
+        ).text
+        sales["Online Gift Card + WLD Tip"] = driver.find_element(
+            By.ID, TAG_IDS["gc_online"]
+        ).text
+        return sales
+
+    def _submit_payins(self, _store: str, tx_date_str: str) -> WebElement:
+        driver = self._driver
+        self._open_menu_report(1, 6)
+        types_element = wait_for_element(driver, (By.ID, TAG_IDS["types"]))
+        if types_element:
+            types_element.send_keys("Payins")
+        else:
+            raise Exception("Failed to find payins types element")
+        self.set_date_range(driver, tx_date_str)
+        return self._click_submit()
+
+    def _collect_payins(
+        self, _store: str, tx_date_str: str, old_root: WebElement
+    ) -> dict[str, Any]:
+        driver = self._driver
+        self._wait_for_report(old_root)
+        payins_element = wait_for_element(driver, (By.ID, TAG_IDS["transactions"]))
+        if payins_element is not None:
+            payins = driver.find_element(By.ID, TAG_IDS["transactions"]).text
+        else:
+            payins = wait_for_element(driver, (By.ID, TAG_IDS["payins"]))
+            if payins:
+                payins = payins.text
+            else:
+                raise Exception("Failed to find payins element")
+
+        # # get pay outs
+        # if driver.find_element(By.ID, TAG_IDS["switch_off"]).is_displayed():
+        #     driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
+        # sleep(4)
+        # WebDriverWait(driver, 18, ignored_exceptions=errors).until(
+        #     lambda d: driver.find_element(By.ID, TAG_IDS["types"]).send_keys(
+        #         "Store Payouts"
+        #     )
+        #     or True
+        # )
+        # self.set_date_range(driver, tx_date_str)
+        # driver.find_element(By.ID, TAG_IDS["submit"]).click()
+        # sleep(10)
+        # payouts_element = wait_for_element(
+        #     driver, (By.ID, TAG_IDS["transactions"]), 7
+        # )
+        # if payouts_element is not None:
+        #     payouts = payouts_element.text
+        # else:
+        #     payouts = driver.find_element(By.ID, "j_id84").text
+        # sales["Payouts"] = payouts
+
+        return {"Payins": payins}
+
+    def _submit_third_party(self, store: str, tx_date_str: str) -> WebElement:
+        driver = self._driver
+        self._open_menu_report(0, 13)
+        driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
+        driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
+        self.set_date_range(driver, tx_date_str)
+        driver.find_element(By.ID, TAG_IDS["group_by"]).click()
+        Select(driver.find_element(By.ID, TAG_IDS["group_by"])).select_by_visible_text(
+            "Summary"
+        )
+        return self._click_submit()
+
+    def _collect_third_party(
+        self, store: str, tx_date_str: str, old_root: WebElement
+    ) -> dict[str, Any]:
+        self._wait_for_report(old_root)
+        try:
+            return parse_third_party_summary(ReportPage(self._driver.page_source))
+        except Exception:
+            logger.warning(
+                "No third party transactions found",
+                extra={"store": store, "date": tx_date_str},
+            )
+            return {}
+
+    def get_daily_sales_batch(
+        self,
+        stores: list[str],
+        tx_date: datetime.date,
+        attempts: int = DAILY_SALES_ATTEMPTS,
+        refresh: bool = False,
+    ) -> DailySalesBatch:
+        """Scrape daily sales for several stores with a single login.
+
+        Each store runs get_daily_sales() on the shared session and is retried
+        up to ``attempts`` times. A store that keeps failing is recorded in
+        ``failed`` and the rest of the batch carries on; if the browser died
+        the next report logs in again.
+
+        Args:
+            stores: Store numbers to scrape
+            tx_date: Business date
+            attempts: Tries per store before giving up on it
+            refresh: Scrape again even if a store's sales are cached
+
+        Returns:
+            DailySalesBatch with per-store sales and failures
+        """
+        batch = DailySalesBatch()
+        with self:
+            for store in stores:
+                for attempt in range(1, attempts + 1):
+                    try:
+                        batch.sales.update(
+                            self.get_daily_sales(store, tx_date, refresh)
+                        )
+                        break
+                    except Exception as e:
+                        logger.exception(
+                            "daily sales attempt failed",
+                            extra={
+                                "store": store,
+                                "date": tx_date.isoformat(),
+                                "attempt": attempt,
+                            },
+                        )
+                        if attempt == attempts:
+                            batch.failed[store] = f"{type(e).__name__}: {e!s}"
+        logger.info(
+            "completed daily sales batch",
+            extra={
+                "date": tx_date.isoformat(),
+                "stores": len(stores),
+                "failed": sorted(batch.failed),
+            },
+        )
+        return batch
 
     def set_date_range(
         self, driver: Any, tx_date_str: str, tx_end_date_str: str | None = None
     ) -> None:
-        sleep(2)
-        driver.find_element(By.ID, TAG_IDS["start_date"]).click()
+        wait_for_clickable(
+            driver, (By.ID, TAG_IDS["start_date"]), "flexepos.date_range"
+        ).click()
         driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
         driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(tx_date_str)
         driver.find_element(By.ID, TAG_IDS["end_date"]).click()
@@ -586,172 +1104,135 @@ class Flexepos:
     """
     """
 
-    def get_daily_journal(self, stores: list[str], qdate: str) -> dict[str, str]:
+    def get_daily_journal(
+        self, stores: list[str], qdate: str, refresh: bool = False
+    ) -> dict[str, str]:
+        """Daily journal text per store, from the cache when possible."""
+        return cached_daily_journal(
+            self._cache,
+            stores,
+            qdate,
+            lambda missing: self.scrape_daily_journal(missing, qdate),
+            refresh,
+        )
+
+    @_logged_in()
+    def scrape_daily_journal(self, stores: list[str], qdate: str) -> dict[str, str]:
         drawer_opens = {}
-        driver = None
-        try:
-            self._login()
-            driver = self._driver
-            driver.set_page_load_timeout(60)
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(1)).click()
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(1, 4)).click()
-            for store_number in stores:
-                sleep(2)
-                if driver.find_element(By.ID, TAG_IDS["switch_off"]).is_displayed():
-                    driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(
-                    store_number
-                )
-                driver.find_element(By.ID, TAG_IDS["start_date"]).click()
-                driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
-                driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(qdate)
-                driver.find_element(By.ID, TAG_IDS["journal_scope"]).click()
-                Select(
-                    driver.find_element(By.ID, TAG_IDS["journal_scope"])
-                ).select_by_visible_text("Store")
-                driver.find_element(By.ID, TAG_IDS["submit"]).click()
-                WebDriverWait(driver, 25)
-                if len(driver.find_elements(By.ID, TAG_IDS["no_journal_body"])) > 0:
-                    drawer_opens[store_number] = driver.find_element(
-                        By.ID, TAG_IDS["no_journal_body"]
-                    ).text
-                else:
-                    drawer_opens[store_number] = "No Journal Data Found"
-            driver.find_element(By.ID, TAG_IDS["home_logout"]).click()
-        finally:
-            if driver:
-                with contextlib.suppress(WebDriverException):
-                    self._driver.close()
-                self._driver.quit()
+        driver = self._driver
+        driver.set_page_load_timeout(60)
+        self._open_report(
+            TAG_IDS["menu_header_root"].format(1),
+            TAG_IDS["menu_item_root"].format(1, 4),
+        )
+        for store_number in stores:
+            wait_until(driver, ajax_idle, "flexepos.idle")
+            if driver.find_element(By.ID, TAG_IDS["switch_off"]).is_displayed():
+                driver.find_element(By.ID, TAG_IDS["switch_off"]).click()
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(
+                store_number
+            )
+            driver.find_element(By.ID, TAG_IDS["start_date"]).click()
+            driver.find_element(By.ID, TAG_IDS["start_date"]).clear()
+            driver.find_element(By.ID, TAG_IDS["start_date"]).send_keys(qdate)
+            driver.find_element(By.ID, TAG_IDS["journal_scope"]).click()
+            Select(
+                driver.find_element(By.ID, TAG_IDS["journal_scope"])
+            ).select_by_visible_text("Store")
+            click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+            if len(driver.find_elements(By.ID, TAG_IDS["no_journal_body"])) > 0:
+                drawer_opens[store_number] = driver.find_element(
+                    By.ID, TAG_IDS["no_journal_body"]
+                ).text
+            else:
+                drawer_opens[store_number] = NO_JOURNAL_DATA
         return drawer_opens
 
     """
     """
 
+    @_logged_in()
     def get_tips(
         self, stores: list[str], start_date: datetime.date, end_date: datetime.date
     ) -> dict[str, list[list[Any]]]:
-        rv = {}
-        driver = None
-        try:
-            self._login()
-            driver = self._driver
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(0)).click()
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(0, 18)).click()
-            for store in stores:
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
-                self.set_date_range(
-                    driver, start_date.strftime("%m%d%Y"), end_date.strftime("%m%d%Y")
-                )
-                driver.find_element(By.ID, TAG_IDS["submit"]).click()
-                sleep(8)
-                soup = BeautifulSoup(driver.page_source, features="html.parser")
-                tips_table = soup.find("table", attrs={"id": TAG_IDS["tips_table"]})
-                if tips_table and isinstance(tips_table, Tag):
-                    rows = tips_table.find_all("tr")
-                    rv[store] = [
-                        [ele.text.strip() for ele in rows[0].find_all("th")[1:]],
-                        [Decimal(x.text.strip()) for x in rows[1].find_all("td")[1:]],
-                    ]
-
-        finally:
-            if driver:
-                with contextlib.suppress(WebDriverException):
-                    self._driver.close()
-                self._driver.quit()
+        rv: dict[str, list[list[Any]]] = {}
+        driver = self._driver
+        self._open_report(
+            TAG_IDS["menu_header_root"].format(0),
+            TAG_IDS["menu_item_root"].format(0, 18),
+        )
+        for store in stores:
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
+            self.set_date_range(
+                driver, start_date.strftime("%m%d%Y"), end_date.strftime("%m%d%Y")
+            )
+            click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+            page = ReportPage(driver.page_source)
+            headers = page.table_rows(TAG_IDS["tips_table"], "th")
+            rows = page.table_rows(TAG_IDS["tips_table"])
+            if headers is not None and rows is not None:
+                rv[store] = [
+                    headers[0][1:],
+                    [Decimal(x) for x in rows[1][1:]],
+                ]
 
         return rv
 
     """
     """
 
+    @_logged_in()
     def get_royalty_report(
         self, group: str, start_date: datetime.date, end_date: datetime.date
     ) -> dict[str, dict[str, str]]:
-        royalty_data = {}
-        driver = None
-        try:
-            self._login()
-            driver = self._driver
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(2)).click()
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(2, 0)).click()
-            driver.find_element(By.ID, TAG_IDS["search_type"]).click()
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["parameters_group"]).clear()
-            driver.find_element(By.ID, TAG_IDS["parameters_group"]).send_keys(group)
-            sleep(2)
-            self.set_date_range(
-                driver, start_date.strftime("%m%d%Y"), end_date.strftime("%m%d%Y")
-            )
-            driver.find_element(By.ID, TAG_IDS["submit"]).click()
-            sleep(8)
-            soup = BeautifulSoup(driver.page_source, features="html.parser")
-            royalty_table = soup.find("table", attrs={"id": TAG_IDS["royalty_list"]})
-            if not royalty_table or not isinstance(royalty_table, Tag):
-                rows = []
-            else:
-                rows = royalty_table.find_all("tr")[1:-1]
-            for row_html in rows:
-                row = [
-                    ele.text.strip().replace(",", "") for ele in row_html.find_all("td")
-                ]
-                royalty_data[row[0]] = {
-                    "Net Sales": row[1],
-                    "Royalty": row[2],
-                    "Advertising": row[4],
-                    "CoOp": "0",
-                    "Media": row[6],
-                }
-            return royalty_data
-        finally:
-            if driver:
-                with contextlib.suppress(WebDriverException):
-                    self._driver.close()
-                self._driver.quit()
+        driver = self._driver
+        self._open_report(
+            TAG_IDS["menu_header_root"].format(2),
+            TAG_IDS["menu_item_root"].format(2, 0),
+        )
+        driver.find_element(By.ID, TAG_IDS["search_type"]).click()
+        wait_for_clickable(
+            driver, (By.ID, TAG_IDS["parameters_group"]), "flexepos.parameters"
+        ).clear()
+        driver.find_element(By.ID, TAG_IDS["parameters_group"]).send_keys(group)
+        self.set_date_range(
+            driver, start_date.strftime("%m%d%Y"), end_date.strftime("%m%d%Y")
+        )
+        click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+        page = ReportPage(driver.page_source)
+        return parse_royalty_report(page)
 
+    @_logged_in(retry=False)
     def toggle_meal_deal(self, stores: list[str]) -> dict[str, bool]:
-        driver = None
         rv = {}
-        try:
-            self._login()
-            driver = self._driver
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(1)).click()
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(1, 8)).click()
-            for store in stores:
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-                driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
-                driver.find_element(By.ID, TAG_IDS["submit"]).click()
-                sleep(7)
-                deal_row = driver.find_element(By.XPATH, TAG_IDS["meal_deal_plu"])
-                deal_row_name = deal_row.get_attribute("name")
-                if not deal_row_name:
-                    raise
-                deal_text = deal_row_name.rstrip(":pluId")
-                for toggle_type in ["pickup", "delivery"]:
-                    driver.find_element(
-                        By.ID,
-                        TAG_IDS["meal_deal_toggle"].format(deal_text, toggle_type),
-                    ).click()
-                driver.find_element(By.ID, TAG_IDS["submit"]).click()
-                sleep(15)
-                driver.find_element(By.ID, TAG_IDS["parameters_continue"]).click()
-                sleep(7)
-                rv[store] = driver.find_element(
-                    By.ID, TAG_IDS["meal_deal_toggle"].format(deal_text, "pickup")
-                ).is_selected()
-        finally:
-            if driver:
-                with contextlib.suppress(WebDriverException):
-                    self._driver.close()
-                self._driver.quit()
+        driver = self._driver
+        self._open_report(
+            TAG_IDS["menu_header_root"].format(1),
+            TAG_IDS["menu_item_root"].format(1, 8),
+        )
+        for store in stores:
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
+            click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+            deal_row = driver.find_element(By.XPATH, TAG_IDS["meal_deal_plu"])
+            deal_row_name = deal_row.get_attribute("name")
+            if not deal_row_name:
+                raise
+            deal_text = deal_row_name.rstrip(":pluId")
+            for toggle_type in ["pickup", "delivery"]:
+                driver.find_element(
+                    By.ID,
+                    TAG_IDS["meal_deal_toggle"].format(deal_text, toggle_type),
+                ).click()
+            click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+            click_and_wait(
+                driver, (By.ID, TAG_IDS["parameters_continue"]), "flexepos.continue"
+            )
+            rv[store] = driver.find_element(
+                By.ID, TAG_IDS["meal_deal_toggle"].format(deal_text, "pickup")
+            ).is_selected()
 
         return rv
 
@@ -777,93 +1258,124 @@ class Flexepos:
     """
 
     def get_gift_card_ach(
-        self, stores: list[str], start_date: datetime.date, end_date: datetime.date
+        self,
+        stores: list[str],
+        start_date: datetime.date,
+        end_date: datetime.date,
+        refresh: bool = False,
     ) -> list[list[Any]]:
+        """Weekly gift card ACH deposit lines per store.
+
+        Settlements are on Fridays and cover the week ending the Wednesday
+        before. Each settled (store, week) is pulled from Flexepos once and
+        then served from the scrape cache, so the daily run over a two-week
+        window only runs the report for weeks it has not seen.
+
+        Args:
+            stores: Store numbers
+            start_date: First date of the window
+            end_date: End of the window (exclusive)
+            refresh: Pull every week again, replacing cached results
+
+        Returns:
+            Deposit rows of [payer, settlement date, notes, lines, store]
+        """
         if end_date <= start_date:
             raise Exception("End date cannot be before start date.")
-        driver = None
-        try:
-            self._login()
-            driver = self._driver
-            # navigate to gift card report
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_header_root"].format(0)).click()
-            sleep(2)
-            driver.find_element(By.ID, TAG_IDS["menu_item_root"].format(0, 10)).click()
-            sleep(2)
-            step_date = on_day(start_date, 4)  # always Friday
-            results = []
-            while step_date < end_date:
-                period_end = step_date - datetime.timedelta(days=2)
-                period_start = period_end - datetime.timedelta(days=6)
-                for store in stores:
-                    notes = str(datetime.date.today())
-                    lines = []
-                    search_ele = driver.find_element(By.ID, TAG_IDS["search_body"])
-                    if not search_ele.is_displayed():
-                        driver.find_element(By.ID, TAG_IDS["search_header"]).click()
-
-                    driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
-                    driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(
-                        store
-                    )
-                    self.set_date_range(
-                        driver,
-                        period_start.strftime("%m%d%Y"),
-                        period_end.strftime("%m%d%Y"),
-                    )
-                    Select(
-                        driver.find_element(By.ID, TAG_IDS["group_by_list"])
-                    ).select_by_index(1)
-                    driver.find_element(By.ID, TAG_IDS["submit"]).click()
-                    sleep(8)
-                    soup = BeautifulSoup(driver.page_source, features="html.parser")
-
-                    giftcardsales = soup.find(
-                        "table", attrs={"id": TAG_IDS["gift_card_sales"]}
-                    )
-                    if giftcardsales:
-                        lines.append(
-                            [
-                                "1330",
-                                "sold",
-                                "-"
-                                + giftcardsales.find_all("tr")[4]
-                                .find_all("td")[2]
-                                .text.strip(),
-                            ]
-                        )
-                    giftcardredeemed = soup.find(
-                        "table", attrs={"id": TAG_IDS["gift_card_redeemed"]}
-                    )
+        weeks = []
+        step_date = on_day(start_date, 4)  # always Friday
+        while step_date < end_date:
+            weeks.append(step_date)
+            step_date = step_date + datetime.timedelta(days=7)
+
+        today = datetime.date.today()
+        week_lines: dict[tuple[str, datetime.date], list[list[str]]] = {}
+        missing = []
+        for step_date in weeks:
+            for store in stores:
+                if self._cache is not None and refresh:
+                    self._cache.invalidate(GIFT_CARD_ACH, store, step_date)
+                lines = (
+                    self._cache.get(GIFT_CARD_ACH, store, step_date)
+                    if self._cache is not None
+                    else None
+                )
+                if lines is None:
+                    missing.append((store, step_date))
+                else:
+                    week_lines[(store, step_date)] = lines
+        if missing:
+            pulled = self.scrape_gift_card_ach(missing)
+            for (store, step_date), lines in pulled.items():
+                # Only settled weeks are final
+                if self._cache is not None and step_date <= today:
+                    self._cache.put(GIFT_CARD_ACH, store, step_date, lines)
+            week_lines.update(pulled)
+        logger.info(
+            "gift card ACH weeks",
+            extra={
+                "weeks": len(weeks),
+                "stores": len(stores),
+                "pulled": len(missing),
+                "cached": len(weeks) * len(stores) - len(missing),
+            },
+        )
 
-                    if giftcardredeemed:
-                        lines.append(
-                            [
-                                "1330",
-                                "instore",
-                                giftcardredeemed.find_all("tr")[1]
-                                .find_all("td")[-3]
-                                .text.strip(),
-                            ]
-                        )
-                    if len(lines) > 0:
-                        results.append(
-                            [
-                                "Jersey Mike's Franchise System",
-                                step_date,
-                                notes,
-                                lines,
-                                store,
-                            ]
-                        )
-                step_date = step_date + datetime.timedelta(days=7)
-            return results
-        finally:
-            if driver:
-                with contextlib.suppress(WebDriverException):
-                    self._driver.close()
-                self._driver.quit()
+        notes = str(today)
+        return [
+            ["Jersey Mike's Franchise System", step_date, notes, lines, store]
+            for step_date in weeks
+            for store in stores
+            if (lines := week_lines.get((store, step_date)))
+        ]
+
+    @_logged_in()
+    def scrape_gift_card_ach(
+        self, weeks: list[tuple[str, datetime.date]]
+    ) -> dict[tuple[str, datetime.date], list[list[str]]]:
+        """Run the gift card report for each (store, settlement Friday).
+
+        Returns:
+            Deposit lines keyed by (store, settlement date); empty when the
+            store had no gift card activity that week
+        """
+        driver = self._driver
+        # navigate to gift card report
+        self._open_report(
+            TAG_IDS["menu_header_root"].format(0),
+            TAG_IDS["menu_item_root"].format(0, 10),
+        )
+        results: dict[tuple[str, datetime.date], list[list[str]]] = {}
+        for store, step_date in weeks:
+            period_end = step_date - datetime.timedelta(days=2)
+            period_start = period_end - datetime.timedelta(days=6)
+            lines = []
+            search_ele = driver.find_element(By.ID, TAG_IDS["search_body"])
+            if not search_ele.is_displayed():
+                driver.find_element(By.ID, TAG_IDS["search_header"]).click()
+
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).clear()
+            driver.find_element(By.ID, TAG_IDS["parameters_store"]).send_keys(store)
+            self.set_date_range(
+                driver,
+                period_start.strftime("%m%d%Y"),
+                period_end.strftime("%m%d%Y"),
+            )
+            Select(
+                driver.find_element(By.ID, TAG_IDS["group_by_list"])
+            ).select_by_index(1)
+            click_and_wait(driver, (By.ID, TAG_IDS["submit"]), "flexepos.submit")
+            page = ReportPage(driver.page_source)
+
+            giftcardsales = page.table_rows(TAG_IDS["gift_card_sales"])
+            if giftcardsales:
+                lines.append(["1330", "sold", "-" + giftcardsales[4][2]])
+            giftcardredeemed = page.table_rows(TAG_IDS["gift_card_redeemed"])
+
+            if giftcardredeemed:
+                lines.append(["1330", "instore", giftcardredeemed[1][-3]])
+            results[(store, step_date)] = lines
+        return results
 
     def get_daily_journal_export(
         self, stores: list[str], start_date: datetime.date, end_date: datetime.date
@@ -881,24 +1393,27 @@ class Flexepos:
         qdate = end_date
         output_dir = "/Users/wgreen/Google Drive/Shared drives/Wagoner Management Corp./Sales Tax/Journal"
 
-        while qdate >= start_date:
-            date_str = qdate.strftime("%m%d%Y")
+        with self:
+            while qdate >= start_date:
+                date_str = qdate.strftime("%m%d%Y")
 
-            try:
-                daily_journal = self.get_daily_journal(stores, date_str)
-            except Exception as e:
-                logging.exception(f"Error getting daily journal for {date_str}: {e!s}")
-                sleep(2)
-                continue
-
-            for store in stores:
-                output_file = f"{output_dir}/{qdate}-{store}_daily_journal.txt"
                 try:
-                    with open(output_file, "w", encoding="utf-8") as fileout:
-                        fileout.write(daily_journal[store])
-                except OSError as e:
-                    logging.error(
-                        f"Error writing journal for store {store} on {date_str}: {e!s}"
+                    daily_journal = self.get_daily_journal(stores, date_str)
+                except Exception as e:
+                    logging.exception(
+                        f"Error getting daily journal for {date_str}: {e!s}"
                     )
+                    sleep(2)
+                    continue
+
+                for store in stores:
+                    output_file = f"{output_dir}/{qdate}-{store}_daily_journal.txt"
+                    try:
+                        with open(output_file, "w", encoding="utf-8") as fileout:
+                            fileout.write(daily_journal[store])
+                    except OSError as e:
+                        logging.error(
+                            f"Error writing journal for store {store} on {date_str}: {e!s}"
+                        )
 
-            qdate = qdate - datetime.timedelta(days=1)
+                qdate = qdate - datetime.timedelta(days=1)
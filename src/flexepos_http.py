@@ -0,0 +1,433 @@
+"""
+Browserless client for the Flexepos JSF report pages.
+
+The Flexepos back office is a JSF application: each page carries a
+javax.faces.ViewState token that has to be posted back with its form, menu
+items are command links that submit the menu form with their own id, and a
+report runs when its parameters form is posted with the submit button.
+FlexeposHttp drives those forms with requests and parses the responses with
+the same parsers as the Selenium client, so both return the same data:
+
+    with FlexeposHttp() as dj:
+        payments = dj.get_online_payments(stores, year, month)
+        royalty = dj.get_royalty_report("wmc", start, end)
+
+When a page does not come back the way a plain form post would produce it
+(a missing form, field or ViewState, usually because the page builds it with
+JavaScript) the report is rerun through the Selenium Flexepos client, which
+stays logged in until the FlexeposHttp session is closed.
+
+Set FLEXEPOS_CLIENT=http to have flexepos_client() hand out this client.
+"""
+
+import datetime
+import logging
+import os
+from typing import Any, cast
+from urllib.parse import urljoin
+
+import requests
+from lxml.html import FormElement, HtmlElement
+
+from flexepos import (
+    DAILY_SALES_SECTIONS,
+    FLEXEPOS_HOME_URL,
+    FLEXEPOS_LOGIN_URL,
+    NO_JOURNAL_DATA,
+    PARSER_VERSION,
+    TAG_IDS,
+    Flexepos,
+    cached_daily_journal,
+    cached_daily_sales,
+    olo_billing_period,
+    parse_daily_sales_summary,
+    parse_online_payments,
+    parse_royalty_report,
+    parse_third_party_summary,
+)
+from report_page import ReportPage
+from scrape_cache import ScrapeCache, default_cache
+from ssm_parameter_store import SSMParameterStore
+
+logger = logging.getLogger(__name__)
+
+FLEXEPOS_BASE_URL = "https://fms.flexepos.com/FlexeposWeb/"
+VIEW_STATE = "javax.faces.ViewState"
+REQUEST_TIMEOUT = 60
+# The calendar inputs mask typed digits as MM/DD/YYYY
+FORM_DATE_FORMAT = "%m/%d/%Y"
+
+
+class JsfPageError(Exception):
+    """A Flexepos page could not be driven with plain form posts."""
+
+
+class JsfPage(ReportPage):
+    """A fetched JSF page and the form data a browser would submit from it."""
+
+    def __init__(self, url: str, html: str) -> None:
+        super().__init__(html)
+        self.url = url
+
+    def find(self, element_id: str) -> HtmlElement | None:
+        """Element by id, or form control by name."""
+        element = super().find(element_id)
+        if element is None:
+            element = next(iter(self.root.xpath("//*[@name=$n]", n=element_id)), None)
+        return element
+
+    def form_for(self, element_id: str) -> FormElement:
+        """The form that submits ``element_id``."""
+        element = self.find(element_id)
+        if element is None:
+            raise JsfPageError(f"{element_id} not found on {self.url}")
+        if isinstance(element, FormElement):
+            return element
+        form = next(element.iterancestors("form"), None)
+        if not isinstance(form, FormElement):
+            raise JsfPageError(f"{element_id} is not inside a form on {self.url}")
+        return form
+
+    def fields(self, form: FormElement) -> dict[str, str]:
+        """Name/value pairs a browser sends for ``form``, minus its buttons."""
+        data = dict(form.form_values())
+        if VIEW_STATE not in data:
+            raise JsfPageError(f"form {form.get('id')} has no {VIEW_STATE}")
+        return data
+
+    def option_value(self, select_id: str, text: str) -> str:
+        """Value of the option labelled ``text`` in a select."""
+        select = self.find(select_id)
+        if select is not None:
+            for option in select.iter("option"):
+                if option.text_content().strip() == text:
+                    return str(option.get("value", text))
+        raise JsfPageError(f"no option {text!r} in {select_id}")
+
+
+def _date_range(
+    start: datetime.date, end: datetime.date | None = None
+) -> dict[str, str]:
+    return {
+        TAG_IDS["start_date"]: start.strftime(FORM_DATE_FORMAT),
+        TAG_IDS["end_date"]: (end or start).strftime(FORM_DATE_FORMAT),
+    }
+
+
+class FlexeposHttp:
+    """Flexepos reports fetched with form posts instead of a browser.
+
+    Supports get_online_payments, get_royalty_report, get_daily_journal and
+    get_daily_sales with the same arguments and results as Flexepos. Use the
+    instance as a context manager to share one login across reports.
+    Daily sales and journals go through the same scrape cache as Flexepos.
+    """
+
+    def __init__(self, cache: ScrapeCache | None = None) -> None:
+        self._parameters = cast(
+            "SSMParameterStore", SSMParameterStore(prefix="/prod")["flexepos"]
+        )
+        self._cache = cache if cache is not None else default_cache(PARSER_VERSION)
+        self._session: requests.Session | None = None
+        self._browser: Flexepos | None = None
+        self._depth = 0
+
+    def __enter__(self) -> "FlexeposHttp":
+        self._depth += 1
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self.close()
+
+    def close(self) -> None:
+        """Drop the HTTP session and quit the fallback browser, if any."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        browser, self._browser = self._browser, None
+        if browser is not None:
+            browser.__exit__(None, None, None)
+
+    def _run(self, report: str, *args: Any) -> Any:
+        self._depth += 1
+        try:
+            try:
+                return getattr(self, f"_{report}")(*args)
+            except (JsfPageError, requests.RequestException) as e:
+                logger.warning(
+                    "Flexepos form post failed, falling back to the browser",
+                    extra={"report": report, "error": str(e)},
+                )
+            if self._browser is None:
+                self._browser = Flexepos().__enter__()
+            return getattr(self._browser, report)(*args)
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.close()
+
+    def _get(self, url: str) -> JsfPage:
+        if self._session is None:
+            self._session = requests.Session()
+        response = self._session.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return JsfPage(response.url, response.text)
+
+    def _post(self, page: JsfPage, form: FormElement, data: dict[str, str]) -> JsfPage:
+        if self._session is None:
+            raise JsfPageError("not logged in")
+        response = self._session.post(
+            urljoin(page.url, form.get("action", "")),
+            data=data,
+            timeout=REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        return JsfPage(response.url, response.text)
+
+    def _login(self) -> None:
+        if self._session is not None:
+            self._session.close()
+        self._session = requests.Session()
+        self._get(FLEXEPOS_LOGIN_URL)
+        page = self._get(FLEXEPOS_BASE_URL)
+        form = page.form_for(TAG_IDS["login_username"])
+        data = page.fields(form)
+        data[TAG_IDS["login_username"]] = str(self._parameters["user"])
+        data[TAG_IDS["login_password"]] = str(self._parameters["password"])
+        # Pressing enter submits with the form's first button
+        button = next(iter(form.xpath(".//input[@type='submit'][@name]")), None)
+        if button is not None:
+            data[button.get("name")] = button.get("value", "")
+        if self._post(page, form, data).has(TAG_IDS["login_username"]):
+            raise JsfPageError("Flexepos login failed")
+        logger.info("logged in to Flexepos without a browser")
+
+    def _home(self) -> JsfPage:
+        """The home page, logging in first if the session is new or expired."""
+        if self._session is not None:
+            page = self._get(FLEXEPOS_HOME_URL)
+            if not page.has(TAG_IDS["login_username"]):
+                return page
+            logger.info("Flexepos session expired, logging in again")
+        self._login()
+        return self._get(FLEXEPOS_HOME_URL)
+
+    def _open_report(self, page: JsfPage, item_id: str) -> JsfPage:
+        """Follow a menu item from ``page`` to a report's parameters form."""
+        form = page.form_for(item_id)
+        data = page.fields(form)
+        data[item_id] = item_id
+        report = self._post(page, form, data)
+        if not report.has(TAG_IDS["submit"]):
+            raise JsfPageError(f"menu item {item_id} did not open a report")
+        return report
+
+    def _submit(self, page: JsfPage, values: dict[str, str | None]) -> JsfPage:
+        """Post the parameters form; a None value leaves that field out."""
+        form = page.form_for(TAG_IDS["submit"])
+        data = page.fields(form)
+        for name, value in values.items():
+            if value is None:
+                data.pop(name, None)
+            else:
+                data[name] = value
+        submit = page.find(TAG_IDS["submit"])
+        data[TAG_IDS["submit"]] = submit.get("value", "") if submit is not None else ""
+        result = self._post(page, form, data)
+        if result.has(TAG_IDS["login_username"]):
+            raise JsfPageError("Flexepos session expired during the report")
+        return result
+
+    def get_online_payments(
+        self, stores: list[str], year: int, month: int
+    ) -> dict[str, dict[str, str | None]]:
+        return cast(
+            "dict[str, dict[str, str | None]]",
+            self._run("get_online_payments", stores, year, month),
+        )
+
+    def _get_online_payments(
+        self, stores: list[str], year: int, month: int
+    ) -> dict[str, dict[str, str | None]]:
+        period_start, period_end = olo_billing_period(year, month)
+        page = self._open_report(self._home(), TAG_IDS["menu_item_root"].format(2, 1))
+        payment_data: dict[str, dict[str, str | None]] = {}
+        for store in stores:
+            page = self._submit(
+                page,
+                {
+                    TAG_IDS["parameters_store"]: store,
+                    **_date_range(period_start, period_end),
+                },
+            )
+            store_payments = parse_online_payments(page)
+            if store_payments is not None:
+                payment_data[store] = store_payments
+        return payment_data
+
+    def get_royalty_report(
+        self, group: str, start_date: datetime.date, end_date: datetime.date
+    ) -> dict[str, dict[str, str]]:
+        return cast(
+            "dict[str, dict[str, str]]",
+            self._run("get_royalty_report", group, start_date, end_date),
+        )
+
+    def _get_royalty_report(
+        self, group: str, start_date: datetime.date, end_date: datetime.date
+    ) -> dict[str, dict[str, str]]:
+        page = self._open_report(self._home(), TAG_IDS["menu_item_root"].format(2, 0))
+        search_type = page.find(TAG_IDS["search_type"])
+        if search_type is None or not page.has(TAG_IDS["parameters_group"]):
+            raise JsfPageError("royalty group search is not in the page")
+        page = self._submit(
+            page,
+            {
+                search_type.get("name", ""): search_type.get("value", ""),
+                TAG_IDS["parameters_group"]: group,
+                **_date_range(start_date, end_date),
+            },
+        )
+        return cast("dict[str, dict[str, str]]", parse_royalty_report(page))
+
+    def get_daily_journal(
+        self, stores: list[str], qdate: str, refresh: bool = False
+    ) -> dict[str, str]:
+        return cast(
+            "dict[str, str]",
+            cached_daily_journal(
+                self._cache,
+                stores,
+                qdate,
+                lambda missing: cast(
+                    "dict[str, str]", self._run("scrape_daily_journal", missing, qdate)
+                ),
+                refresh,
+            ),
+        )
+
+    def _scrape_daily_journal(self, stores: list[str], qdate: str) -> dict[str, str]:
+        journal_date = datetime.datetime.strptime(qdate, "%m%d%Y").date()
+        page = self._open_report(self._home(), TAG_IDS["menu_item_root"].format(1, 4))
+        scope = page.option_value(TAG_IDS["journal_scope"], "Store")
+        drawer_opens = {}
+        for store_number in stores:
+            page = self._submit(
+                page,
+                {
+                    TAG_IDS["parameters_store"]: store_number,
+                    TAG_IDS["start_date"]: journal_date.strftime(FORM_DATE_FORMAT),
+                    TAG_IDS["journal_scope"]: scope,
+                },
+            )
+            drawer_opens[store_number] = (
+                page.text(TAG_IDS["no_journal_body"]) or NO_JOURNAL_DATA
+            )
+        return drawer_opens
+
+    def get_daily_sales(
+        self, store: str, tx_date: datetime.date, refresh: bool = False
+    ) -> dict[str, dict[str, Any]]:
+        return cast(
+            "dict[str, dict[str, Any]]",
+            cached_daily_sales(
+                self._cache,
+                store,
+                tx_date,
+                lambda: cast(
+                    "dict[str, dict[str, Any]]",
+                    self._run("scrape_daily_sales", store, tx_date),
+                ),
+                refresh,
+            ),
+        )
+
+    def _scrape_daily_sales(
+        self, store: str, tx_date: datetime.date
+    ) -> dict[str, dict[str, Any]]:
+        logger.info(
+            "getting sales",
+            extra={"store": store, "date": tx_date.strftime("%m%d%Y")},
+        )
+        sales_data: dict[str, dict[str, Any]] = {}
+        page = self._open_report(self._home(), TAG_IDS["menu_item_root"].format(0, 1))
+        page = self._submit(
+            page,
+            {
+                TAG_IDS["parameters_store"]: store,
+                **_date_range(tx_date),
+                **{
+                    name: "on" if ticked else None
+                    for name, ticked in DAILY_SALES_SECTIONS.items()
+                },
+            },
+        )
+        sales = sales_data[store] = parse_daily_sales_summary(page, store)
+        if sales["Pre-Discount Sales"] is None:
+            return sales_data
+
+        # Tips
+        page = self._submit(
+            self._open_report(page, TAG_IDS["menu_item"].format(0, 9)), {}
+        )
+        sales["CC Tips"] = page.text(TAG_IDS["cc_tips_1"]) or page.text(
+            TAG_IDS["cc_tips_2"]
+        )
+        sales["Online CC Tips"] = page.text(TAG_IDS["online_cc_tips_1"]) or page.text(
+            TAG_IDS["online_cc_tips_2"]
+        )
+        for key, tag in (
+            ("Online WLD Tips", "online_wld_tips_1"),
+            ("Gift Card Tips", "gc_tips"),
+            ("Online WLD Gift Card Tips", "online_gc_tips"),
+            ("Online Gift Card + WLD Tip", "gc_online"),
+        ):
+            sales[key] = page.text(TAG_IDS[tag])
+            if sales[key] is None:
+                raise JsfPageError(f"tips report has no {TAG_IDS[tag]}")
+
+        # Pay ins
+        page = self._open_report(page, TAG_IDS["menu_item"].format(1, 6))
+        page = self._submit(
+            page,
+            {
+                TAG_IDS["types"]: page.option_value(TAG_IDS["types"], "Payins"),
+                **_date_range(tx_date),
+            },
+        )
+        payins = page.text(TAG_IDS["transactions"]) or page.text(TAG_IDS["payins"])
+        if payins is None:
+            raise JsfPageError("Failed to find payins element")
+        sales["Payins"] = payins
+
+        # Third party breakdown
+        page = self._open_report(page, TAG_IDS["menu_item"].format(0, 13))
+        page = self._submit(
+            page,
+            {
+                TAG_IDS["parameters_store"]: store,
+                **_date_range(tx_date),
+                TAG_IDS["group_by"]: page.option_value(TAG_IDS["group_by"], "Summary"),
+            },
+        )
+        try:
+            sales.update(parse_third_party_summary(page))
+        except Exception:
+            logger.warning(
+                "No third party transactions found",
+                extra={"store": store, "date": tx_date.strftime("%m%d%Y")},
+            )
+        logger.info(
+            "completed daily sales",
+            extra={"store": store, "date": tx_date.strftime("%m%d%Y")},
+        )
+        return sales_data
+
+
+def flexepos_client() -> Flexepos | FlexeposHttp:
+    """The Flexepos client selected by FLEXEPOS_CLIENT ("browser" or "http")."""
+    if os.environ.get("FLEXEPOS_CLIENT", "browser").lower() == "http":
+        return FlexeposHttp()
+    return Flexepos()
@@ -103,14 +103,14 @@ def main() -> int:
     # Display deposits
     print(f"\nFound {len(results)} deposit(s) to process:\n")
     for i, result in enumerate(results, 1):
-        service, txdate, notes, lines, store = result
+        _service, txdate, notes, lines, store = result
         total_amount = lines[0][2] if lines else "0"
         print(f"  {i}. Store {store} - {txdate} - ${total_amount}")
 
     if args.dry_run:
         print("\n[DRY RUN] Would import the following deposits:\n")
         for result in results:
-            service, txdate, notes, lines, store = result
+            _service, txdate, notes, lines, store = result
             print(f"  Store: {store}, Date: {txdate}")
             print(f"  Notes: {notes if notes else '(none)'}")
             print("  Lines:")
@@ -125,30 +125,36 @@ def main() -> int:
     success_count = 0
     error_count = 0
 
-    for result in results:
-        service, txdate, notes, lines, store = result
-        try:
-            # Unpack result: ["Grubhub", txdate, notes, lines, store]
-            # sync_third_party_deposit expects: supplier, deposit_date, notes, lines, department
-            qb.sync_third_party_deposit(service, txdate, notes, lines, store)
-            logger.info(
-                "Successfully imported deposit",
-                extra={"store": store, "date": str(txdate), "amount": lines[0][2]},
-            )
-            print(f"  ✓ Imported: Store {store} - {txdate} - ${lines[0][2]}")
-            success_count += 1
-        except Exception as e:
-            logger.exception(
+    try:
+        outcomes = qb.sync_third_party_deposits(results)
+    except Exception as e:
+        logger.exception("Failed to import deposits")
+        outcomes = [{"status": "failed", "error": str(e)} for _ in results]
+
+    for result, outcome in zip(results, outcomes, strict=True):
+        _service, txdate, _notes, lines, store = result
+        if outcome["status"] == "failed":
+            logger.error(
                 "Failed to import deposit",
                 extra={
                     "store": store,
                     "date": str(txdate),
-                    "error": str(e),
+                    "error": outcome["error"],
                     "result": result,
                 },
             )
-            print(f"  ✗ Failed: Store {store} - {txdate} - Error: {e}")
+            print(f"  ✗ Failed: Store {store} - {txdate} - Error: {outcome['error']}")
             error_count += 1
+        elif outcome["status"] == "skipped":
+            print(f"  - Skipped: Store {store} - {txdate} - ${lines[0][2]}")
+            success_count += 1
+        else:
+            logger.info(
+                "Successfully imported deposit",
+                extra={"store": store, "date": str(txdate), "amount": lines[0][2]},
+            )
+            print(f"  ✓ Imported: Store {store} - {txdate} - ${lines[0][2]}")
+            success_count += 1
 
     print(f"\nImport complete: {success_count} succeeded, {error_count} failed")
     return 0 if error_count == 0 else 1
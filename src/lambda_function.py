@@ -24,7 +24,6 @@ from concurrent.futures import (  # pylint: disable=no-name-in-module  # type: i
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from functools import partial  # noqa # pylint: disable=unused-import
-from locale import LC_NUMERIC, atof, setlocale
 from operator import itemgetter
 from typing import TYPE_CHECKING, Any, cast
 
@@ -50,11 +49,13 @@ from email_templates import (
 )
 from ezcater import EZCater
 from flexepos import Flexepos
+from flexepos_http import flexepos_client
 from logging_utils import setup_json_logger
 from operation_types import OperationType
 from store_config import StoreConfig
 from tips import WHENIWORK_DATE_FORMAT, Tips
 from ubereats import UberEats
+from webdriver import prewarm_driver
 from websocket_manager import WebSocketManager
 from wmcgdrive import WMCGdrive
 
@@ -74,15 +75,18 @@ else:
 from decimal_utils import (  # noqa: E402  # pylint: disable=wrong-import-position
     TWO_PLACES,
     FinancialJsonEncoder,
+    parse_money,
 )
 
-setlocale(LC_NUMERIC, "en_US.UTF-8")
 pattern = re.compile(r"\d+\.\d\d")
 
 if "AWS_LAMBDA_FUNCTION_NAME" not in os.environ:
     setup_json_logger()
 logger = logging.getLogger(__name__)
 
+# Start Chrome during the Lambda init phase (needs CHROME_REUSE=1)
+prewarm_driver()
+
 
 def create_response(
     status_code: int,
@@ -170,14 +174,19 @@ def third_party_deposit_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
         service_name = service.__class__.__name__
         try:
             results = getattr(service, method)(*service_args)
-            for result in results:
-                try:
-                    qb.sync_third_party_deposit(*result)
-                except Exception:
-                    logger.exception(
-                        f"Exception in sync_third_party_deposit for {service_name}"
-                    )
-                    logger.info(result)
+            try:
+                outcomes = qb.sync_third_party_deposits(results)
+                for result, outcome in zip(results, outcomes, strict=True):
+                    if outcome["status"] == "failed":
+                        logger.error(
+                            f"Failed to sync deposit for {service_name}",
+                            extra={"error": outcome["error"]},
+                        )
+                        logger.info(result)
+            except Exception:
+                logger.exception(
+                    f"Exception in sync_third_party_deposits for {service_name}"
+                )
             successful_services.append(service_name)
         except Exception:
             logger.exception(f"Exception in {service_name}")
@@ -223,7 +232,9 @@ def invoice_sync_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
     Local development:
         >>> from lambda_function import invoice_sync_handler
         >>> invoice_sync_handler()  # Process current month
-        >>> invoice_sync_handler({"year": "2024", "month": "03"})  # Process specific month
+        >>> invoice_sync_handler(
+        ...     {"year": "2024", "month": "03"}
+        ... )  # Process specific month
     """
     context = _args[1] if _args and len(_args) > 1 else None
     task_id = (context.aws_request_id if context else None) or f"local-{uuid.uuid4()!s}"
@@ -303,7 +314,11 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
                 "year": "YYYY",    # Optional: defaults to yesterday
                 "month": "MM",     # Optional: defaults to yesterday
                 "day": "DD",       # Optional: defaults to yesterday
-                "store": "XXXXX"   # Optional: process only this store
+                "store": "XXXXX",  # Optional: process only this store
+                "stores_per_worker": N  # Optional: stores per Flexepos login,
+                                        # defaults to DAILY_SALES_STORES_PER_WORKER
+                                        # or 1
+                "refresh": true    # Optional: re-scrape even if cached
             }
 
     Local development:
@@ -380,6 +395,17 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
 
         # Check for optional single store parameter
         single_store = event.get("store")
+        refresh = bool(event.get("refresh", False))
+
+        # Stores scraped per worker login; more stores per worker means fewer
+        # Chrome cold starts but a longer-running worker
+        stores_per_worker = max(
+            1,
+            int(
+                event.get("stores_per_worker")
+                or os.environ.get("DAILY_SALES_STORES_PER_WORKER", "1")
+            ),
+        )
 
         for txdate in txdates:
             # If single store specified, use only that store; otherwise get all active
@@ -388,7 +414,13 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
             else:
                 stores = store_config.get_active_stores(txdate)
 
-            # Process stores - parallel Lambda invocations in AWS, sequential calls locally
+            # Group stores so each worker scrapes several stores in one login
+            batches = [
+                stores[i : i + stores_per_worker]
+                for i in range(0, len(stores), stores_per_worker)
+            ]
+
+            # Process batches - parallel Lambda invocations in AWS, sequential calls locally
             is_local = "AWS_LAMBDA_FUNCTION_NAME" not in os.environ
             logger.info(
                 "Starting store processing",
@@ -396,6 +428,7 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
                     "txdate": txdate.isoformat(),
                     "stores": stores,
                     "total_stores": len(stores),
+                    "stores_per_worker": stores_per_worker,
                     "is_local": is_local,
                     "processing_mode": "sequential" if is_local else "parallel",
                 },
@@ -408,8 +441,8 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
             failed_stores.clear()
 
             def invoke_store_lambda(
-                store: str, txdate: date = txdate
-            ) -> tuple[str, dict[str, Any]]:
+                batch: list[str], txdate: date = txdate
+            ) -> tuple[list[str], dict[str, Any]]:
                 """Helper function for AWS Lambda invocation"""
                 try:
                     if lambda_client is None or internal_function_name is None:
@@ -419,14 +452,15 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
                         InvocationType="RequestResponse",  # Synchronous call
                         Payload=json.dumps(
                             {
-                                "store": store,
+                                "stores": batch,
                                 "txdate": txdate.isoformat(),
                                 "request_id": request_id,
+                                "refresh": refresh,
                             }
                         ),
                     )
                     payload = json.loads(response["Payload"].read())
-                    return store, payload
+                    return batch, payload
                 except Exception as e:
                     error_type = type(e).__name__
                     error_msg = str(e)
@@ -439,7 +473,7 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
                         logger.warning(
                             "Lambda invocation timed out - store processing taking longer than expected",
                             extra={
-                                "store": store,
+                                "stores": batch,
                                 "txdate": txdate.isoformat(),
                                 "error_type": error_type,
                                 "timeout_duration": "350s",
@@ -448,19 +482,34 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
                         )
                     else:
                         logger.exception(
-                            "Failed to invoke Lambda for store",
+                            "Failed to invoke Lambda for stores",
                             extra={
-                                "store": store,
+                                "stores": batch,
                                 "txdate": txdate.isoformat(),
                                 "error_type": error_type,
                                 "error": error_msg,
                             },
                         )
-                    return store, {
+                    return batch, {
                         "statusCode": 500,
                         "error": f"{error_type}: {error_msg}",
                     }
 
+            def collect_batch(batch: list[str], result: dict[str, Any]) -> list[str]:
+                """Merge a worker's response; returns the batch's failed stores"""
+                if result.get("statusCode") != 200:
+                    failed_stores.extend(batch)
+                    return batch
+                response_body = json.loads(result["body"])
+                all_journal_data.update(response_body.get("journal_data", {}))
+                batch_failed = [
+                    store
+                    for store in batch
+                    if store in response_body.get("failed_stores", {})
+                ]
+                failed_stores.extend(batch_failed)
+                return batch_failed
+
             # Send initial processing status with store count
             ws_manager.broadcast_status(
                 task_id=request_id,
@@ -477,85 +526,61 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
             if "AWS_LAMBDA_FUNCTION_NAME" not in os.environ:
                 # Local: process sequentially
                 completed_count = 0
-                for store in stores:
+                for batch in batches:
+                    completed_count += len(batch)
                     try:
                         logger.info(
                             "Running locally - calling store processing function directly",
-                            extra={"store": store, "txdate": txdate.isoformat()},
+                            extra={"stores": batch, "txdate": txdate.isoformat()},
                         )
                         store_event = {
-                            "store": store,
+                            "stores": batch,
                             "txdate": txdate.isoformat(),
                             "request_id": request_id,
+                            "refresh": refresh,
                         }
                         result = process_store_sales_internal_handler(store_event, None)
-
-                        # Extract journal data from response
-                        if result.get("statusCode") == 200:
-                            response_body = json.loads(result["body"])
-                            if "journal_data" in response_body:
-                                all_journal_data.update(response_body["journal_data"])
-                            completed_count += 1
-
-                            # Send progress update for local processing
-                            ws_manager.broadcast_status(
-                                task_id=request_id,
-                                operation=OperationType.DAILY_SALES,
-                                status="processing",
-                                progress={
-                                    "current": completed_count,
-                                    "total": len(stores),
-                                    "message": f"Processed store {store} ({completed_count}/{len(stores)})",
-                                },
-                            )
-                        else:
-                            failed_stores.append(store)
-                            completed_count += 1
+                        batch_failed = collect_batch(batch, result)
+                        if batch_failed:
                             logger.error(
                                 "Store processing failed locally",
-                                extra={"store": store, "result": result},
-                            )
-
-                            # Send progress update even for failures
-                            ws_manager.broadcast_status(
-                                task_id=request_id,
-                                operation=OperationType.DAILY_SALES,
-                                status="processing",
-                                progress={
-                                    "current": completed_count,
-                                    "total": len(stores),
-                                    "message": f"Failed to process store {store} ({completed_count}/{len(stores)})",
-                                },
+                                extra={"stores": batch_failed, "result": result},
                             )
+                        status_msg = (
+                            f"Failed to process stores {', '.join(batch_failed)}"
+                            if batch_failed
+                            else f"Processed stores {', '.join(batch)}"
+                        )
                     except Exception as e:
-                        failed_stores.append(store)
-                        completed_count += 1
+                        failed_stores.extend(batch)
                         logger.exception(
-                            "Failed to process store locally",
+                            "Failed to process stores locally",
                             extra={
-                                "store": store,
+                                "stores": batch,
                                 "txdate": txdate.isoformat(),
                                 "error": str(e),
                             },
                         )
+                        status_msg = f"Error processing stores {', '.join(batch)}"
 
-                        # Send progress update for exception
-                        ws_manager.broadcast_status(
-                            task_id=request_id,
-                            operation=OperationType.DAILY_SALES,
-                            status="processing",
-                            progress={
-                                "current": completed_count,
-                                "total": len(stores),
-                                "message": f"Error processing store {store} ({completed_count}/{len(stores)})",
-                            },
-                        )
+                    # Send progress update for local processing
+                    ws_manager.broadcast_status(
+                        task_id=request_id,
+                        operation=OperationType.DAILY_SALES,
+                        status="processing",
+                        progress={
+                            "current": completed_count,
+                            "total": len(stores),
+                            "message": f"{status_msg} ({completed_count}/{len(stores)})",
+                        },
+                    )
             else:
                 # AWS: process concurrently using ThreadPoolExecutor
                 logger.info(
                     "Processing stores concurrently in AWS",
                     extra={
                         "store_count": len(stores),
+                        "batch_count": len(batches),
                         "txdate": txdate.isoformat(),
                     },
                 )
@@ -564,106 +589,90 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
 
                 start_time = time.time()
 
-                with ThreadPoolExecutor(max_workers=min(len(stores), 10)) as executor:
+                with ThreadPoolExecutor(max_workers=min(len(batches), 10)) as executor:
                     # Submit all lambda invocations with a 10-second delay between each
-                    future_to_store = {}
-                    for idx, store in enumerate(stores):
-                        future_to_store[executor.submit(invoke_store_lambda, store)] = (
-                            store
+                    future_to_batch = {}
+                    for idx, batch in enumerate(batches):
+                        future_to_batch[executor.submit(invoke_store_lambda, batch)] = (
+                            batch
                         )
-                        if idx < len(stores) - 1:
+                        if idx < len(batches) - 1:
                             time.sleep(
                                 10
-                            )  # Wait 10 seconds before submitting the next store
+                            )  # Wait 10 seconds before submitting the next batch
 
                     logger.info(
                         "Submitted all Lambda invocations",
                         extra={
-                            "submitted_count": len(future_to_store),
-                            "max_workers": min(len(stores), 10),
+                            "submitted_count": len(future_to_batch),
+                            "max_workers": min(len(batches), 10),
                         },
                     )
 
                     # Collect results as they complete
                     completed_count = 0
-                    for future in as_completed(future_to_store):
-                        original_store = future_to_store[future]
+                    for future in as_completed(future_to_batch):
+                        original_batch = future_to_batch[future]
+                        completed_count += len(original_batch)
                         try:
-                            store, payload = future.result()
-                            completed_count += 1
+                            batch, payload = future.result()
 
                             logger.info(
                                 "Lambda invocation completed",
                                 extra={
-                                    "store": store,
+                                    "stores": batch,
                                     "completed": completed_count,
                                     "total": len(stores),
                                     "elapsed_time": f"{time.time() - start_time:.1f}s",
                                 },
                             )
 
-                            # Send progress update for each completed store
-                            success = payload.get("statusCode") == 200
-                            status_msg = (
-                                f"Processed store {store}"
-                                if success
-                                else f"Failed to process store {store}"
-                            )
-
-                            ws_manager.broadcast_status(
-                                task_id=request_id,
-                                operation=OperationType.DAILY_SALES,
-                                status="processing",
-                                progress={
-                                    "current": completed_count,
-                                    "total": len(stores),
-                                    "message": f"{status_msg} ({completed_count}/{len(stores)}) - {time.time() - start_time:.1f}s elapsed",
-                                },
-                            )
-
-                            if payload.get("statusCode") == 200:
-                                response_body = json.loads(payload["body"])
-                                if "journal_data" in response_body:
-                                    all_journal_data.update(
-                                        response_body["journal_data"]
-                                    )
+                            batch_failed = collect_batch(batch, payload)
+                            if batch_failed:
+                                logger.error(
+                                    "Store processing failed in concurrent Lambda",
+                                    extra={"stores": batch_failed, "response": payload},
+                                )
+                            else:
                                 logger.info(
-                                    "Successfully processed store via concurrent Lambda",
+                                    "Successfully processed stores via concurrent Lambda",
                                     extra={
-                                        "store": store,
+                                        "stores": batch,
                                         "txdate": txdate.isoformat(),
                                     },
                                 )
-                            else:
-                                failed_stores.append(store)
-                                logger.error(
-                                    "Store processing failed in concurrent Lambda",
-                                    extra={"store": store, "response": payload},
-                                )
+
+                            # Send progress update for each completed batch
+                            status_msg = (
+                                f"Failed to process stores {', '.join(batch_failed)}"
+                                if batch_failed
+                                else f"Processed stores {', '.join(batch)}"
+                            )
                         except Exception as e:
-                            failed_stores.append(original_store)
-                            completed_count += 1
+                            failed_stores.extend(original_batch)
                             logger.exception(
                                 "Failed to get result from concurrent Lambda",
                                 extra={
-                                    "store": original_store,
+                                    "stores": original_batch,
                                     "txdate": txdate.isoformat(),
                                     "error": str(e),
                                 },
                             )
-
-                            # Send progress update for exception
-                            ws_manager.broadcast_status(
-                                task_id=request_id,
-                                operation=OperationType.DAILY_SALES,
-                                status="processing",
-                                progress={
-                                    "current": completed_count,
-                                    "total": len(stores),
-                                    "message": f"Error processing store {original_store} ({completed_count}/{len(stores)}) - {time.time() - start_time:.1f}s elapsed",
-                                },
+                            status_msg = (
+                                f"Error processing stores {', '.join(original_batch)}"
                             )
 
+                        ws_manager.broadcast_status(
+                            task_id=request_id,
+                            operation=OperationType.DAILY_SALES,
+                            status="processing",
+                            progress={
+                                "current": completed_count,
+                                "total": len(stores),
+                                "message": f"{status_msg} ({completed_count}/{len(stores)}) - {time.time() - start_time:.1f}s elapsed",
+                            },
+                        )
+
                 logger.info(
                     "Completed all Lambda invocations",
                     extra={
@@ -684,7 +693,16 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
                             "stores_with_data": list(all_journal_data.keys()),
                         },
                     )
-                    qb.create_daily_sales(txdate, all_journal_data)
+                    qb_failed = qb.create_daily_sales(txdate, all_journal_data)
+                    if qb_failed:
+                        logger.error(
+                            "Failed to save daily sales for some stores",
+                            extra={
+                                "txdate": txdate.isoformat(),
+                                "failed_stores": qb_failed,
+                            },
+                        )
+                        failed_stores.extend(qb_failed)
 
                     ws_manager.broadcast_status(
                         task_id=request_id,
@@ -693,7 +711,7 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
                         progress={
                             "current": len(stores),
                             "total": len(stores),
-                            "message": f"QuickBooks entries created for {len(all_journal_data)} stores"
+                            "message": f"QuickBooks entries created for {len(all_journal_data) - len(qb_failed)} stores"
                             + (
                                 f" ({len(failed_stores)} failed)"
                                 if failed_stores
@@ -758,20 +776,21 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
         # Process online payments and royalty
         try:
             txdate = txdates[0]
-            dj = Flexepos()  # Initialize for online payments/royalty processing
-            payment_data = dj.get_online_payments(
-                store_config.all_stores, txdate.year, txdate.month
-            )
+            # One Flexepos login for both reports
+            with flexepos_client() as dj:
+                payment_data = dj.get_online_payments(
+                    store_config.all_stores, txdate.year, txdate.month
+                )
+                royalty_data = dj.get_royalty_report(
+                    "wmc",
+                    date(txdate.year, txdate.month, 1),
+                    date(
+                        txdate.year,
+                        txdate.month,
+                        calendar.monthrange(txdate.year, txdate.month)[1],
+                    ),
+                )
             qb.enter_online_cc_fee(txdate.year, txdate.month, payment_data)
-            royalty_data = dj.get_royalty_report(
-                "wmc",
-                date(txdate.year, txdate.month, 1),
-                date(
-                    txdate.year,
-                    txdate.month,
-                    calendar.monthrange(txdate.year, txdate.month)[1],
-                ),
-            )
             qb.update_royalty(txdate.year, txdate.month, royalty_data)
 
             # Determine final status based on results
@@ -829,7 +848,7 @@ def daily_sales_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
 def online_cc_fee(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
     txdate = date.today() - timedelta(days=1)
 
-    dj = Flexepos()
+    dj = flexepos_client()
     payment_data = dj.get_online_payments(
         store_config.all_stores, txdate.year, txdate.month
     )
@@ -961,7 +980,7 @@ def daily_journal_handler(*_args: Any, **_kwargs: Any) -> dict[str, Any]:
         subject = "Daily Journal Report {}".format(yesterday.strftime("%m/%d/%Y"))
 
         # Fetch drawer opens from Flexepos
-        dj = Flexepos()
+        dj = flexepos_client()
         drawer_opens = dj.get_daily_journal(
             store_config.all_stores, yesterday.strftime("%m%d%Y")
         )
@@ -1152,18 +1171,28 @@ def split_bill_handler(*args: Any, **kwargs: Any) -> dict[str, Any]:
         - Request format:
             {
                 "doc_number": "string",
+                "doc_numbers": ["string"],           # Instead of doc_number
                 "locations": ["string"],
                 "split_ratios": {                    # Optional
                     "location": number
                 }
             }
 
+    With ``doc_numbers`` every bill is split between the same locations in
+    one pass (see qb.split_bills).
+
     Returns:
         On success:
             {
                 "message": "Bill split successfully",
                 "split_doc_numbers": ["string"]
             }
+        For doc_numbers (207 if some bills failed):
+            {
+                "message": "Bills split",
+                "split_doc_numbers": {"doc_number": ["string"]},
+                "failed": {"doc_number": "reason"}
+            }
         On error:
             {
                 "message": "Error message"
@@ -1176,10 +1205,19 @@ def split_bill_handler(*args: Any, **kwargs: Any) -> dict[str, Any]:
         try:
             body = json.loads(event.get("body", "{}"))
             doc_number = body.get("doc_number")
+            doc_numbers = body.get("doc_numbers")
             locations = body.get("locations", [])
             split_ratios = body.get("split_ratios")
 
-            if not doc_number:
+            if doc_numbers is not None and (
+                not isinstance(doc_numbers, list)
+                or not doc_numbers
+                or not all(isinstance(d, str) and d for d in doc_numbers)
+            ):
+                return create_response(
+                    400, {"message": "doc_numbers must be a non-empty list"}
+                )
+            if not doc_number and not doc_numbers:
                 return create_response(400, {"message": "doc_number is required"})
             if not locations or not isinstance(locations, list):
                 return create_response(
@@ -1212,6 +1250,21 @@ def split_bill_handler(*args: Any, **kwargs: Any) -> dict[str, Any]:
                 400, {"message": f"Invalid request parameters: {e!s}"}
             )
 
+        if doc_numbers:
+            try:
+                result = qb.split_bills(doc_numbers, locations, split_ratios)
+            except ValueError as ve:
+                logger.warning("Invalid split parameters", extra={"error": str(ve)})
+                return create_response(400, {"message": str(ve)})
+            return create_response(
+                207 if result.failed else 200,
+                {
+                    "message": "Bills split",
+                    "split_doc_numbers": result.split,
+                    "failed": result.failed,
+                },
+            )
+
         # Find the bill to split
         qb.refresh_session()
         bills = Bill.filter(DocNumber=doc_number, qb=qb.CLIENT)
@@ -1257,107 +1310,112 @@ def split_bill_handler(*args: Any, **kwargs: Any) -> dict[str, Any]:
         return create_response(500, {"message": f"Internal server error: {e!s}"})
 
 
+def _send_store_sales_alerts(
+    store: str, txdate: date, store_sales: dict[str, Any]
+) -> None:
+    """Email missing-deposit and high-payin alerts for one store's sales."""
+    if not store_config.is_store_active(store, txdate):
+        logger.info(
+            "Skipping store deposit emails: store not active",
+            extra={"store": store, "txdate": txdate.isoformat()},
+        )
+        return
+
+    # Check for missing deposits
+    if store_sales["Bank Deposits"] is None or store_sales["Bank Deposits"] == "":
+        email_service.send_missing_deposit_alert(store, txdate)
+
+    # Check for high payins
+    payins = store_sales["Payins"].strip()
+    if payins.count("\n") > 0:
+        amount = Decimal(0)
+        for payin_line in payins.split("\n")[1:]:
+            if payin_line.startswith("TOTAL"):
+                continue
+            match = pattern.search(payin_line)
+            if match:
+                amount = amount + parse_money(match.group())
+        if amount.quantize(TWO_PLACES) > Decimal(150):
+            email_service.send_high_payin_alert(store, amount, payins)
+    else:
+        logger.info(
+            "No payin or missing deposits issues detected",
+            extra={"store": store, "txdate": txdate.isoformat()},
+        )
+
+
 def process_store_sales_internal_handler(
     event: dict[str, Any], context: Any
 ) -> dict[str, Any]:
     """
-    Internal Lambda handler to process daily sales for a single store.
+    Internal Lambda handler to process daily sales for a batch of stores.
 
-    Called by daily_sales_handler via fire-and-forget Lambda invocation.
+    Called by daily_sales_handler. All stores in the batch are scraped in
+    one Flexepos login; a store that fails is reported in "failed_stores"
+    without affecting the others.
 
     Event format:
         {
-            "store": "store_id",
+            "stores": ["store_id", ...],  # or "store": "store_id"
             "txdate": "YYYY-MM-DD",
-            "request_id": "uuid"
+            "request_id": "uuid",
+            "refresh": false  # Optional: re-scrape even if cached
         }
     """
     try:
         # Extract parameters from event
-        store = event["store"]
+        stores = event.get("stores") or [event["store"]]
         txdate = datetime.fromisoformat(event["txdate"]).date()
         request_id = event["request_id"]
 
-        # Process this store's daily sales with retry logic
-        dj = Flexepos()
-        journal_data = None
-        retry = 3
-
-        while retry:
-            try:
-                journal_data = dj.get_daily_sales(store, txdate)
-                retry = 0
-            except Exception as e:
-                logger.exception(f"error {txdate.isoformat()}: {e!s}")
-                retry -= 1
-                if retry == 0:
-                    # Final failure - return error
-                    logger.error(
-                        "Failed to process store sales after retries",
-                        extra={
-                            "store": store,
-                            "txdate": txdate.isoformat(),
-                            "error": str(e),
-                        },
-                    )
-                    return create_response(
-                        500,
-                        {
-                            "message": f"Failed to get sales data for store {store}: {e!s}"
-                        },
-                    )
-
-        # Check if we have valid sales data
-        if not journal_data or "Payins" not in journal_data[store]:
-            logger.info(
-                "Skipping store: no sales data",
+        # Process the stores' daily sales with retry logic
+        batch = Flexepos().get_daily_sales_batch(
+            stores, txdate, refresh=bool(event.get("refresh", False))
+        )
+        if len(batch.failed) == len(stores):
+            logger.error(
+                "Failed to process store sales after retries",
                 extra={
-                    "store": store,
+                    "stores": stores,
                     "txdate": txdate.isoformat(),
-                    "journal_data": journal_data,
+                    "errors": batch.failed,
                 },
             )
-            # Return empty result (no sales = successful completion, but no data to process)
             return create_response(
-                200, {"message": f"No sales data for store {store}", "journal_data": {}}
+                500,
+                {
+                    "message": f"Failed to get sales data for stores {', '.join(stores)}",
+                    "failed_stores": batch.failed,
+                },
             )
 
-        # Send deposit and payin alerts for this store
-        if store_config.is_store_active(store, txdate):
-            # Check for missing deposits
-            if (
-                journal_data[store]["Bank Deposits"] is None
-                or journal_data[store]["Bank Deposits"] == ""
-            ):
-                email_service.send_missing_deposit_alert(store, txdate)
-
-            # Check for high payins
-            payins = journal_data[store]["Payins"].strip()
-            if payins.count("\n") > 0:
-                amount = Decimal(0)
-                for payin_line in payins.split("\n")[1:]:
-                    if payin_line.startswith("TOTAL"):
-                        continue
-                    match = pattern.search(payin_line)
-                    if match:
-                        amount = amount + Decimal(atof(match.group()))
-                if amount.quantize(TWO_PLACES) > Decimal(150):
-                    email_service.send_high_payin_alert(store, amount, payins)
-            else:
+        journal_data: dict[str, dict[str, Any]] = {}
+        for store in stores:
+            if store in batch.failed:
+                continue
+            store_sales = batch.sales.get(store)
+
+            # Check if we have valid sales data
+            if not store_sales or "Payins" not in store_sales:
                 logger.info(
-                    "No payin or missing deposits issues detected",
-                    extra={"store": store, "txdate": txdate.isoformat()},
+                    "Skipping store: no sales data",
+                    extra={
+                        "store": store,
+                        "txdate": txdate.isoformat(),
+                        "journal_data": store_sales,
+                    },
                 )
-        else:
-            logger.info(
-                "Skipping store deposit emails: store not active",
-                extra={"store": store, "txdate": txdate.isoformat()},
-            )
+                continue
+
+            # Send deposit and payin alerts for this store
+            _send_store_sales_alerts(store, txdate, store_sales)
+            journal_data[store] = store_sales
 
         logger.info(
             "Successfully processed store sales data",
             extra={
-                "store": store,
+                "stores": stores,
+                "failed_stores": sorted(batch.failed),
                 "txdate": txdate.isoformat(),
                 "request_id": request_id,
             },
@@ -1367,25 +1425,26 @@ def process_store_sales_internal_handler(
         return create_response(
             200,
             {
-                "message": f"Successfully processed store {store}",
+                "message": f"Processed stores {', '.join(stores)}",
                 "journal_data": journal_data,
+                "failed_stores": batch.failed,
             },
         )
 
     except Exception as e:
         # Handle any unexpected errors
-        store = event.get("store", "unknown")
+        stores = event.get("stores") or [event.get("store", "unknown")]
         request_id = event.get("request_id", "unknown")
 
         logger.exception(
             "Unexpected error in process_store_sales_internal_handler",
-            extra={"store": store, "request_id": request_id, "error": str(e)},
+            extra={"stores": stores, "request_id": request_id, "error": str(e)},
         )
 
         # Log the failure for debugging
 
         return create_response(
-            500, {"message": f"Internal error processing store {store}"}
+            500, {"message": f"Internal error processing stores {', '.join(stores)}"}
         )
 
 
@@ -1692,43 +1751,42 @@ def grubhub_csv_import_handler(*args: Any, **kwargs: Any) -> dict[str, Any]:
         skipped_deposits = []
         errors = []
 
-        for i, result in enumerate(results):
-            service, txdate, notes, lines, store = result
-            amount = lines[0][2] if lines else "0"
+        ws_manager.broadcast_status(
+            task_id=task_id,
+            operation=OperationType.GRUBHUB_CSV_IMPORT,
+            status="in_progress",
+            result={
+                "message": f"Processing {len(results)} deposits",
+                "current": 0,
+                "total": len(results),
+            },
+        )
 
-            try:
-                status = qb.sync_third_party_deposit(
-                    service, txdate, notes, lines, store
-                )
+        try:
+            outcomes = qb.sync_third_party_deposits(results)
+        except Exception as e:
+            logger.exception("Failed to import deposits")
+            outcomes = [{"status": "failed", "error": str(e)} for _ in results]
 
-                if status == "created":
-                    imported_deposits.append(
-                        {"store": store, "date": str(txdate), "amount": amount}
-                    )
-                else:  # status == "skipped"
-                    skipped_deposits.append(
-                        {
-                            "store": store,
-                            "date": str(txdate),
-                            "amount": amount,
-                            "reason": "Already exists",
-                        }
-                    )
+        for result, outcome in zip(results, outcomes, strict=True):
+            _service, txdate, _notes, lines, store = result
+            amount = lines[0][2] if lines else "0"
 
-                # Send progress update
-                ws_manager.broadcast_status(
-                    task_id=task_id,
-                    operation=OperationType.GRUBHUB_CSV_IMPORT,
-                    status="in_progress",
-                    result={
-                        "message": f"Processing deposit {i + 1} of {len(results)}",
-                        "current": i + 1,
-                        "total": len(results),
-                    },
+            if outcome["status"] == "created":
+                imported_deposits.append(
+                    {"store": store, "date": str(txdate), "amount": amount}
                 )
-
-            except Exception as e:
-                logger.exception(
+            elif outcome["status"] == "skipped":
+                skipped_deposits.append(
+                    {
+                        "store": store,
+                        "date": str(txdate),
+                        "amount": amount,
+                        "reason": "Already exists",
+                    }
+                )
+            else:
+                logger.error(
                     "Failed to import deposit",
                     extra={"store": store, "date": str(txdate), "amount": amount},
                 )
@@ -1737,7 +1795,7 @@ def grubhub_csv_import_handler(*args: Any, **kwargs: Any) -> dict[str, Any]:
                         "store": store,
                         "date": str(txdate),
                         "amount": amount,
-                        "error": str(e),
+                        "error": outcome["error"],
                     }
                 )
 
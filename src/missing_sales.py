@@ -1,13 +1,15 @@
 import logging
+from collections import defaultdict
 from datetime import date, timedelta
 from typing import Any
 
 from quickbooks.helpers import qb_date_format
-from quickbooks.objects import Department, SalesReceipt
+from quickbooks.objects import SalesReceipt
 
 import qb
 from flexepos import Flexepos
 from qb import refresh_session
+from qb_export import iter_records
 from store_config import StoreConfig
 
 logger = logging.getLogger(__name__)
@@ -32,20 +34,30 @@ def find_missing_sales_entries(
         store_config = StoreConfig()
 
     today = date.today()
+    first_day = today - timedelta(days=days_back)
+    last_day = today - timedelta(days=1)  # skip today
     missing = []
 
-    # Get all store refs from QuickBooks
-    _store_refs = {x.Name: x.to_ref() for x in Department.all(qb=qb_session)}
+    # One lookup for the whole window: the local mirror when configured,
+    # otherwise a single paged SalesReceipt query instead of one per day.
+    mirror = qb.synced_mirror(first_day)
+    if mirror:
+        stores_by_date = mirror.sales_receipt_stores(first_day, last_day)
+    else:
+        stores_by_date = defaultdict(set)
+        for r in iter_records(
+            SalesReceipt,
+            f"TxnDate >= '{qb_date_format(first_day)}'"
+            f" AND TxnDate <= '{qb_date_format(last_day)}'",
+            qb_session,
+        ):
+            if r.DepartmentRef and hasattr(r.DepartmentRef, "name"):
+                stores_by_date[r.TxnDate].add(r.DepartmentRef.name)
 
     for day_offset in range(1, days_back + 1):  # Start at 1 to skip today
         txdate = today - timedelta(days=day_offset)
         active_stores = store_config.get_active_stores(txdate)
-        # Query all receipts for this date
-        receipts = SalesReceipt.filter(TxnDate=qb_date_format(txdate), qb=qb)
-        receipts_by_store = set()
-        for r in receipts:
-            if r.DepartmentRef and hasattr(r.DepartmentRef, "name"):
-                receipts_by_store.add(r.DepartmentRef.name)
+        receipts_by_store = stores_by_date.get(qb_date_format(txdate), set())
         # Find missing stores
         missing_stores = [s for s in active_stores if s not in receipts_by_store]
         if missing_stores:
@@ -65,18 +77,27 @@ def fill_missing_sales_entries(
     """
     logger.info(f"Checking for missing sales entries for the last {days_back} days...")
     missing = find_missing_sales_entries(days_back=days_back, store_config=store_config)
-    dj = Flexepos()
-    filled_count = 0
-    for m in missing:
-        txdate = m["txdate"]
-        for store in m["stores"]:
-            try:
-                logger.info(f"Filling missing sales for store {store} on {txdate}")
-                sales_data = dj.get_daily_sales(store, txdate)
-                qb.create_daily_sales(txdate, sales_data)
-                filled_count += 1
-            except Exception as e:
-                logger.exception(
-                    f"Failed to fill sales for store {store} on {txdate}: {e}"
-                )
+    reports_by_date: dict[date, dict[str, Any]] = {}
+    # One Flexepos login shared by every store and day
+    with Flexepos() as dj:
+        for m in missing:
+            txdate = m["txdate"]
+            for store in m["stores"]:
+                try:
+                    logger.info(f"Fetching missing sales for store {store} on {txdate}")
+                    reports_by_date.setdefault(txdate, {}).update(
+                        dj.get_daily_sales(store, txdate)
+                    )
+                except Exception as e:
+                    logger.exception(
+                        f"Failed to fetch sales for store {store} on {txdate}: {e}"
+                    )
+    # Post every date in one pass so the session, lookups and existing-receipt
+    # query are shared across the whole range
+    failed = qb.create_daily_sales_range(reports_by_date)
+    for key, message in failed.items():
+        logger.error(f"Failed to save missing sales entry {key}: {message}")
+    filled_count = sum(len(reports) for reports in reports_by_date.values()) - len(
+        failed
+    )
     logger.info(f"Filled {filled_count} missing sales entries.")
@@ -1,21 +1,26 @@
 import base64
 import calendar
+import copy
 import datetime
+import hashlib
 import json
 import logging
+import os
 import re
+import time
 from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
 from decimal import Decimal
-from functools import reduce
-from locale import LC_NUMERIC, atof, setlocale
-from typing import Any, cast
+from functools import wraps
+from typing import Any, ClassVar, ParamSpec, TypeVar, cast
 
 from boto3.session import Session
 from botocore.exceptions import ClientError
 from intuitlib.client import AuthClient
 from intuitlib.enums import Scopes
 from quickbooks import QuickBooks
-from quickbooks.exceptions import QuickbooksException
+from quickbooks.exceptions import AuthorizationException, QuickbooksException
 from quickbooks.helpers import qb_date_format
 from quickbooks.objects import (
     Account,
@@ -37,9 +42,31 @@ from quickbooks.objects import (
     Vendor,
     VendorCredit,
 )
+from quickbooks.objects.batchrequest import (
+    BatchItemRequest,
+    BatchOperation,
+    Fault,
+    IntuitBatchRequest,
+)
 
-from decimal_utils import TWO_PLACES, ZERO  # re-export for backward compatibility
+from decimal_utils import (  # re-export for backward compatibility
+    TWO_PLACES,
+    ZERO,
+    allocate,
+    parse_money,
+)
 from flexepos import last_sunday_of_month
+from qb_export import (
+    ExportSpec,
+    export_entities,
+    iter_pages,
+    iter_records,
+    load_cursors,
+    save_cursors,
+)
+from qb_governor import GovernedQuickBooks
+from qb_mirror import TransactionMirror
+from reconcile import LedgerEntry, MatchResult, match_entries
 from ssm_parameter_store import SSMParameterStore
 
 logger = logging.getLogger(__name__)
@@ -47,9 +74,18 @@ logger = logging.getLogger(__name__)
 # QBO configuration from SSM Parameter Store
 _qbo_params = SSMParameterStore(prefix="/prod/qbo")
 
-setlocale(LC_NUMERIC, "")
-AUTH_CLIENT = None
-CLIENT = None
+AUTH_CLIENT: AuthClient | None = None
+CLIENT: QuickBooks | None = None
+
+# Monotonic deadline after which the cached CLIENT's access token is treated as
+# expired. Intuit access tokens live for an hour; refresh a little early so a
+# long-running sync never sends a token that expires mid-request.
+_token_expires_at = 0.0
+TOKEN_REFRESH_MARGIN = 300
+DEFAULT_TOKEN_LIFETIME = 3600
+
+P = ParamSpec("P")
+R = TypeVar("R")
 
 detail_map = OrderedDict(
     [
@@ -137,11 +173,487 @@ third_party_map = {
     "Total": "1360",
 }
 
-account_ref = None
+# Crunchtime vendor codes -> QBO vendor DisplayName. A trailing "%" is a prefix
+# match, as in the QBO LIKE queries these replaced. A code can be pinned to a
+# specific vendor (or a new supplier added) without a code change through the
+# /prod/qbo/vendor_map parameter, a JSON object of {code: QBO vendor Id}.
+VENDOR_PATTERNS = {
+    "WNEPLS": "The Paper%",
+    "PEPSI": "Pepsi%",
+    "GenPro": "General Produce",
+    "SYSFRA": "Sysco San%",
+    "SYSSAC": "Sysco Sac%",
+    "SAL": "Sala%",
+    "DONOGH": "Donoghue%",
+    "USFOOD": "US Foods%",
+}
+
+vendor_ids: dict[str, str] | None = None
+
+# Seconds before cached QBO reference data (chart of accounts, departments,
+# vendors, items) is reloaded. These lists change rarely but are read on
+# nearly every sync, so they are kept for the life of a warm container.
+REF_CACHE_TTL = int(os.environ.get("QBO_REF_CACHE_TTL", "900"))
+
+# QBO rejects batch requests with more than 30 operations
+BATCH_MAX_ITEMS = 30
+# DocNumbers per "DocNumber IN (...)" lookup; keeps query URLs well short of
+# QBO's limits
+DOC_NUMBER_CHUNK = 100
+
+# SQLite file for the local transaction mirror (e.g. /tmp/qbo_mirror.sqlite3).
+# Unset disables the mirror and dashboard queries scan QBO directly.
+MIRROR_PATH = os.environ.get("QBO_MIRROR_PATH", "")
+MIRROR: TransactionMirror | None = None
+
+
+def invalidate_session() -> None:
+    """Force the next refresh_session() call to fetch new tokens."""
+    global _token_expires_at
+    _token_expires_at = 0.0
+
+
+def retry_on_auth_failure(func: Callable[P, R]) -> Callable[P, R]:
+    """Retry a QuickBooks entry point once if the access token is rejected.
+
+    The cached session can be revoked or expire early (e.g. tokens rotated by
+    the OAuth callback in another container). On an HTTP 401 the session is
+    invalidated and the wrapped call is run again with fresh tokens.
+
+    Only use on entry points that are safe to rerun from the start: reads,
+    and writers that upsert by DocNumber. A writer that creates objects
+    could duplicate whatever it wrote before the 401; those rely on
+    refresh_session() renewing the token ahead of expiry instead.
+    """
+
+    @wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        try:
+            return func(*args, **kwargs)
+        except AuthorizationException as e:
+            if e.error_code != 401:
+                raise
+            logger.warning(
+                "QuickBooks rejected access token, refreshing session",
+                extra={"function": func.__name__},
+            )
+            invalidate_session()
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def query_all(qb_type: Any, where_clause: str = "", page_size: int = 1000) -> list[Any]:
+    """Fetch every object of a QBO type, following start_position pagination.
+
+    Args:
+        qb_type: python-quickbooks object class (e.g. Vendor, Account)
+        where_clause: Optional QBO WHERE clause
+        page_size: Rows per request (QBO caps this at 1000)
+
+    Returns:
+        All matching objects in QBO order
+    """
+    results: list[Any] = []
+    start_position = 1
+    while True:
+        if where_clause:
+            page = qb_type.where(
+                where_clause,
+                start_position=start_position,
+                max_results=page_size,
+                qb=CLIENT,
+            )
+        else:
+            page = qb_type.all(
+                start_position=start_position, max_results=page_size, qb=CLIENT
+            )
+        results.extend(page)
+        if len(page) < page_size:
+            return results
+        start_position += page_size
 
-inv_account_ref = None
 
-vendor = None
+def _normalize_vendor_name(name: str) -> str:
+    """Lowercase a vendor name and collapse punctuation to single spaces."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower().replace("'", "")).split())
+
+
+class VendorIndex:
+    """In-memory vendor lookup built from a single Vendor fetch.
+
+    Supports the matching the QBO ``DisplayName LIKE`` queries provided
+    (exact and prefix, case-insensitive) plus a normalized-token fallback so
+    "Jersey Mike's Franchise System" finds "Jersey Mikes Franchise System".
+    """
+
+    def __init__(self, vendors: list[Any]):
+        self._by_id = {str(v.Id): v for v in vendors}
+        # sorted so prefix matches are deterministic
+        self._by_name = sorted(
+            ((v.DisplayName.lower(), v) for v in vendors if v.DisplayName),
+            key=lambda pair: pair[0],
+        )
+        self._exact = dict(reversed(self._by_name))
+        self._tokens = [
+            (set(_normalize_vendor_name(name).split()), v) for name, v in self._by_name
+        ]
+
+    def by_id(self, vendor_id: str) -> Any | None:
+        """Return the vendor with the given QBO Id."""
+        return self._by_id.get(str(vendor_id))
+
+    def exact(self, name: str) -> Any | None:
+        """Return the vendor whose DisplayName equals ``name`` (any case)."""
+        return self._exact.get(name.lower())
+
+    def prefix(self, prefix: str) -> Any | None:
+        """Return the first vendor whose DisplayName starts with ``prefix``."""
+        prefix = prefix.lower()
+        return next((v for name, v in self._by_name if name.startswith(prefix)), None)
+
+    def tokens(self, name: str) -> Any | None:
+        """Return the first vendor whose name contains every token of ``name``."""
+        wanted = set(_normalize_vendor_name(name).split())
+        if not wanted:
+            return None
+        return next((v for tokens, v in self._tokens if wanted <= tokens), None)
+
+    def match(self, pattern: str) -> Any | None:
+        """Resolve a LIKE-style pattern ("Name" or "Prefix%") to a vendor."""
+        if pattern.endswith("%"):
+            return self.prefix(pattern.rstrip("%"))
+        return self.exact(pattern) or self.tokens(pattern)
+
+
+class QBReferenceCache:
+    """TTL cache of QuickBooks reference data shared by every qb.py helper.
+
+    Accounts are indexed by AcctNum, departments by Name, vendors by
+    DisplayName and items by Id. Each list is fetched once (paginated) the
+    first time it is needed and reused until ``ttl`` seconds have passed;
+    ``load()`` warms all of them up front for bulk syncs.
+    """
+
+    # index name -> attribute used as the key
+    _KEYS: ClassVar[dict[str, str]] = {
+        "accounts": "AcctNum",
+        "departments": "Name",
+        "vendors": "DisplayName",
+        "items": "Id",
+    }
+
+    def __init__(self, ttl: int = REF_CACHE_TTL):
+        self._ttl = ttl
+        self._indexes: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._vendor_index: tuple[dict[str, Any], VendorIndex] | None = None
+
+    def load(self) -> None:
+        """Fetch every reference list that is missing or expired."""
+        for name in self._KEYS:
+            self._index(name)
+
+    def clear(self) -> None:
+        """Drop all cached reference data so the next lookup reloads it."""
+        self._indexes.clear()
+        self._vendor_index = None
+
+    def _index(self, name: str) -> dict[str, Any]:
+        cached = self._indexes.get(name)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+        refresh_session()
+        qb_type = {
+            "accounts": Account,
+            "departments": Department,
+            "vendors": Vendor,
+            "items": Item,
+        }[name]
+        key = self._KEYS[name]
+        index = {
+            str(getattr(obj, key)): obj
+            for obj in query_all(qb_type)
+            if getattr(obj, key, None) is not None
+        }
+        logger.debug(
+            "Loaded QuickBooks reference data",
+            extra={"type": name, "count": len(index)},
+        )
+        self._indexes[name] = (time.monotonic() + self._ttl, index)
+        return index
+
+    def account(self, acct_num: int | str) -> Any:
+        """Return the Account with the given account number."""
+        return self._index("accounts")[str(acct_num)]
+
+    def department(self, name: str) -> Any:
+        """Return the Department (store) with the given name."""
+        return self._index("departments")[name]
+
+    def departments(self) -> dict[str, Any]:
+        """Return all Departments keyed by name."""
+        return self._index("departments")
+
+    def vendor(self, display_name: str) -> Any:
+        """Return the Vendor with the given DisplayName."""
+        return self._index("vendors")[display_name]
+
+    def vendors(self) -> dict[str, Any]:
+        """Return all Vendors keyed by DisplayName."""
+        return self._index("vendors")
+
+    def vendor_index(self) -> VendorIndex:
+        """Return a VendorIndex over the cached vendors, rebuilt on reload."""
+        vendors = self._index("vendors")
+        if self._vendor_index is None or self._vendor_index[0] is not vendors:
+            self._vendor_index = (vendors, VendorIndex(list(vendors.values())))
+        return self._vendor_index[1]
+
+    def item(self, item_id: int | str) -> Any:
+        """Return the Item with the given Id."""
+        return self._index("items")[str(item_id)]
+
+
+REF_CACHE = QBReferenceCache()
+
+
+def synced_mirror(since: datetime.date) -> TransactionMirror | None:
+    """Return the local transaction mirror, brought up to date from ``since``.
+
+    Returns None when QBO_MIRROR_PATH is not configured so callers can fall
+    back to querying QBO directly.
+    """
+    global MIRROR
+    if not MIRROR_PATH:
+        return None
+    if MIRROR is None:
+        MIRROR = TransactionMirror(MIRROR_PATH)
+    MIRROR.sync(refresh_session(), since)
+    return MIRROR
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batched QBO write, keyed by the caller's labels."""
+
+    saved: dict[str, Any] = field(default_factory=dict)
+    faults: dict[str, Any] = field(default_factory=dict)
+    error: QuickbooksException | None = None
+
+    def fault_messages(self) -> dict[str, str]:
+        """Return a printable description of each failed item."""
+        return {
+            key: "; ".join(str(error) for error in fault.Error)
+            for key, fault in self.faults.items()
+        }
+
+
+def batch_write(operations: list[tuple[str, str, Any]]) -> BatchResult:
+    """Send creates, updates and deletes to QBO in batches of BATCH_MAX_ITEMS.
+
+    Unlike python-quickbooks' BatchManager this allows mixed operations in a
+    single request and keeps track of which caller item each response
+    belongs to, so a fault can be reported against the store or bill that
+    caused it.
+
+    Args:
+        operations: (key, operation, object) tuples where operation is one
+            of BatchOperation.CREATE/UPDATE/DELETE and key is a unique label
+            such as the store number or DocNumber
+
+    If a batch request as a whole is rejected, nothing further is sent: the
+    exception is kept on BatchResult.error and every item of that request and
+    the ones after it is reported as a Fault, so callers can still roll back
+    whatever earlier requests saved.
+
+    Returns:
+        BatchResult with the saved objects and Faults, each keyed by label
+    """
+    client = refresh_session()
+    result = BatchResult()
+    for start in range(0, len(operations), BATCH_MAX_ITEMS):
+        chunk = operations[start : start + BATCH_MAX_ITEMS]
+        batch = IntuitBatchRequest()
+        pending: dict[str, tuple[str, Any]] = {}
+        for position, (key, operation, obj) in enumerate(chunk, start):
+            item = BatchItemRequest()
+            item.bId = str(position)
+            item.operation = operation
+            item.set_object(obj)
+            batch.BatchItemRequest.append(item)
+            pending[item.bId] = (key, obj)
+
+        try:
+            response = client.batch_operation(batch.to_json())
+        except QuickbooksException as ex:
+            unsent = [key for key, _, _ in operations[start:]]
+            logger.exception("Batch request rejected", extra={"unsent": unsent})
+            result.error = ex
+            fault = Fault.from_json(
+                {
+                    "type": "BatchRequest",
+                    "Error": [
+                        {
+                            "Message": ex.message,
+                            "code": str(ex.error_code),
+                            "Detail": ex.detail,
+                        }
+                    ],
+                }
+            )
+            result.faults.update(dict.fromkeys(unsent, fault))
+            break
+        for data in response["BatchItemResponse"]:
+            key, obj = pending[data["bId"]]
+            if "Fault" in data:
+                result.faults[key] = Fault.from_json(data["Fault"])
+            else:
+                result.saved[key] = type(obj).from_json(data[obj.qbo_object_name])
+    return result
+
+
+@dataclass
+class Correction:
+    """A historical fix applied to every document matching a query.
+
+    Attributes:
+        name: Label for logs, the diff report and the checkpoint file
+        qb_type: python-quickbooks object class to correct
+        where_clause: QBO WHERE clause selecting candidates. It must not
+            depend on fields the transform changes, or resumed pages shift
+        transform: Pure function given a copy of one document; returns the
+            corrected copy, or None to leave the document alone
+        fields: Top-level fields the transform may change; only these are
+            compared and sent in the sparse update
+        record_filter: Optional predicate; documents it rejects are skipped
+    """
+
+    name: str
+    qb_type: Any
+    where_clause: str
+    transform: Callable[[Any], Any | None]
+    fields: tuple[str, ...]
+    record_filter: Callable[[Any], bool] | None = None
+
+
+@dataclass
+class CorrectionResult:
+    """Outcome of apply_correction(), keyed by document Id."""
+
+    examined: int = 0
+    diffs: dict[str, dict[str, tuple[Any, Any]]] = field(default_factory=dict)
+    saved: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def _field_changes(
+    before: Any, after: Any, fields: Iterable[str]
+) -> dict[str, tuple[Any, Any]]:
+    before_json = json.loads(before.to_json())
+    after_json = json.loads(after.to_json())
+    return {
+        name: (before_json.get(name), after_json.get(name))
+        for name in fields
+        if before_json.get(name) != after_json.get(name)
+    }
+
+
+def apply_correction(
+    correction: Correction,
+    dry_run: bool = True,
+    checkpoint_path: str | None = None,
+    report_path: str | None = None,
+) -> CorrectionResult:
+    """Preview or apply a Correction to every matching document.
+
+    Each page of candidates is transformed and compared field by field.
+    Documents whose ``fields`` are unchanged are skipped; the rest are
+    logged with a before/after diff and, unless ``dry_run``, sent as sparse
+    updates through batch_write(). After a page is committed its end
+    position is saved to ``checkpoint_path`` so an interrupted run resumes
+    where it stopped; a finished correction is skipped on later runs with
+    the same checkpoint file.
+
+    Args:
+        correction: The fix to apply
+        dry_run: Only report what would change
+        checkpoint_path: Optional JSON file recording progress per correction
+        report_path: Optional NDJSON file receiving one diff per document
+
+    Returns:
+        CorrectionResult with the diffs, saved Ids and per-document faults
+    """
+    client = refresh_session()
+    cursors = load_cursors(None if dry_run else checkpoint_path)
+    start = cursors.get(correction.name, 1)
+    result = CorrectionResult()
+    if start is None:
+        logger.info(
+            "Skipping completed correction", extra={"correction": correction.name}
+        )
+        return result
+
+    with open(report_path or os.devnull, "a", encoding="utf-8") as report:
+        for next_position, page in iter_pages(
+            correction.qb_type, correction.where_clause, client, start_position=start
+        ):
+            operations = []
+            for record in page:
+                if correction.record_filter and not correction.record_filter(record):
+                    continue
+                result.examined += 1
+                corrected = correction.transform(copy.deepcopy(record))
+                if corrected is None:
+                    continue
+                changes = _field_changes(record, corrected, correction.fields)
+                if not changes:
+                    continue
+                key = str(record.Id)
+                result.diffs[key] = changes
+                logger.info(
+                    "Correction diff",
+                    extra={
+                        "correction": correction.name,
+                        "id": key,
+                        "doc_number": getattr(record, "DocNumber", None),
+                        "changes": changes,
+                    },
+                )
+                report.write(json.dumps({"id": key, "changes": changes}) + "\n")
+                operations.append(
+                    (
+                        key,
+                        BatchOperation.UPDATE,
+                        _sparse_update(record, corrected, correction.fields),
+                    )
+                )
+            if dry_run:
+                continue
+            if operations:
+                batch = batch_write(operations)
+                result.saved.extend(batch.saved)
+                result.failed.update(batch.fault_messages())
+                if batch.error is not None:
+                    # Leave the cursor on this page so a rerun retries it
+                    raise batch.error
+            cursors[correction.name] = next_position
+            save_cursors(checkpoint_path, cursors)
+
+    if not dry_run:
+        cursors[correction.name] = None
+        save_cursors(checkpoint_path, cursors)
+    logger.info(
+        "Correction finished",
+        extra={
+            "correction": correction.name,
+            "dry_run": dry_run,
+            "examined": result.examined,
+            "changed": len(result.diffs),
+            "saved": len(result.saved),
+            "failed": result.failed,
+        },
+    )
+    return result
 
 
 def lambda_handler(_event: dict[str, Any], _context: Any) -> dict[str, Any]:
@@ -149,10 +661,11 @@ def lambda_handler(_event: dict[str, Any], _context: Any) -> dict[str, Any]:
     return {"statusCode": 200, "body": get_secret()}
 
 
+@retry_on_auth_failure
 def update_royalty(year: int, month: int, payment_data: dict[str, Any]) -> None:
     refresh_session()
 
-    supplier = Vendor.where("DisplayName like 'A Sub Above'", qb=CLIENT)[0]
+    supplier = find_vendor("A Sub Above")
 
     for store, payment_info in payment_data.items():
         lines = [
@@ -185,150 +698,279 @@ def update_royalty(year: int, month: int, payment_data: dict[str, Any]) -> None:
         )
 
 
-def create_daily_sales(
-    txdate: datetime.date, daily_reports: dict[str, Any], overwrite: bool = True
-) -> None:
-    refresh_session()
-
-    pattern = re.compile(r"\d+\.\d\d")
+# PrivateNote keys that describe the import rather than the sales data
+_VOLATILE_NOTE_KEYS = frozenset({"updatedAt", "contentHash"})
+# SalesReceipt fields create_daily_sales owns; a sparse update sends only these
+_DAILY_SALES_FIELDS = ("TxnDate", "DepartmentRef", "CustomerRef", "Line", "PrivateNote")
 
-    store_refs = get_store_refs()
 
-    existing_receipts = {
-        x.DepartmentRef.name if x.DepartmentRef else "20025": x
-        for x in SalesReceipt.filter(TxnDate=qb_date_format(txdate), qb=CLIENT)
-    }
+def receipt_fingerprint(receipt: Any, daily_report: dict[str, Any]) -> str:
+    """Deterministic hash of a daily sales receipt's content.
 
-    # Pre-fetch shared lookups to avoid redundant API calls per store
-    customer_ref = Customer.all(qb=CLIENT)[0].to_ref()
-    all_item_ids = {line_id[0] for line_id in detail_map.values()} | {"43", "31"}
-    id_list = ",".join(f"'{i}'" for i in all_item_ids)
-    item_cache = {
-        str(item.Id): item for item in Item.where(f"Id IN ({id_list})", qb=CLIENT)
+    Covers the posted fields and the source report, but not the import
+    timestamp, so rebuilding the same day from the same data gives the same
+    fingerprint.
+    """
+    content = {
+        "TxnDate": receipt.TxnDate,
+        "DepartmentRef": _ref_value(receipt.DepartmentRef),
+        "CustomerRef": _ref_value(receipt.CustomerRef),
+        "Line": [
+            [
+                _ref_value(line.SalesItemLineDetail.ItemRef),
+                str(Decimal(line.Amount).quantize(TWO_PLACES)),
+                line.Description,
+            ]
+            for line in receipt.Line
+        ],
+        "report": {
+            key: value
+            for key, value in daily_report.items()
+            if key not in _VOLATILE_NOTE_KEYS
+        },
     }
+    encoded = json.dumps(content, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
 
-    new_receipts = {}
 
-    for store, _sref in store_refs.items():
-        if store in existing_receipts and store in daily_reports:
-            if len(existing_receipts[store].LinkedTxn) > 0 and overwrite:
-                logger.warning(
-                    "overwriting existing linked transaction",
-                    extra={
-                        "store": store,
-                        "receipt": json.loads(existing_receipts[store].to_json()),
-                    },
-                )
-            elif len(existing_receipts[store].LinkedTxn) > 0 and not overwrite:
-                logger.warning(
-                    "skipping already linked transaction",
-                    extra={
-                        "store": store,
-                        "receipt": existing_receipts[store].to_json(),
-                    },
-                )
-                continue
-            new_receipts[store] = existing_receipts[store]
-            # clear old lines
-            new_receipts[store].Line.clear()
-        elif store in daily_reports:
-            new_receipts[store] = SalesReceipt()
-
-    for store, new_receipt in new_receipts.items():
-        if store not in daily_reports:
-            continue
-        new_receipts[store].DepartmentRef = store_refs[store]
-        new_receipt.TxnDate = qb_date_format(txdate)
-        new_receipt.CustomerRef = customer_ref
-        daily_report = daily_reports[store]
+def _stored_fingerprint(receipt: Any) -> str | None:
+    try:
+        note = json.loads(receipt.PrivateNote or "{}")
+    except (TypeError, ValueError):
+        return None
+    return note.get("contentHash") if isinstance(note, dict) else None
+
+
+def _sparse_update(
+    existing: Any, source: Any, fields: Iterable[str] = _DAILY_SALES_FIELDS
+) -> Any:
+    """Copy of ``source`` that sparse-updates ``existing`` with only ``fields``."""
+    update = type(existing)()
+    for name in list(vars(update)):
+        if not name.startswith("_"):
+            setattr(update, name, None)
+    update.Id = existing.Id
+    update.SyncToken = existing.SyncToken
+    update.sparse = True
+    for name in fields:
+        setattr(update, name, getattr(source, name))
+    return update
+
+
+def _build_daily_sales_receipt(
+    store: str,
+    txdate: datetime.date,
+    daily_report: dict[str, Any],
+    store_ref: Any,
+    customer_ref: Any,
+) -> tuple[SalesReceipt, str]:
+    """Build a store's daily SalesReceipt and return it with its fingerprint."""
+    pattern = re.compile(r"\d+\.\d\d")
 
-        line_num = 1
-        amount_total = ZERO
-        for line_item, line_id in detail_map.items():
-            line = SalesItemLine()
-            line.LineNum = line_num
-            if daily_report.get(line_item):
-                if daily_report[line_item].startswith("N"):
-                    line.Amount = Decimal(0)
-                else:
-                    line.Amount = (
-                        Decimal(atof(daily_report[line_item].strip("$"))) * line_id[1]
-                    )
-                amount_total += Decimal(line.Amount)
-                line.Description = (
-                    f"{line_item} imported from ({daily_report[line_item]})"
-                )
-            else:
-                line.Amount = Decimal(0)
-                line.Description = "Nothing captured."
-            line.SalesItemLineDetail = SalesItemLineDetail()
-            item = item_cache[line_id[0]]
-            line.SalesItemLineDetail.ItemRef = item.to_ref()
-            line.SalesItemLineDetail.ServiceDate = None
-            new_receipt.Line.append(line)
-            line_num += 1
+    new_receipt = SalesReceipt()
+    new_receipt.DepartmentRef = store_ref
+    new_receipt.TxnDate = qb_date_format(txdate)
+    new_receipt.CustomerRef = customer_ref
+    lines = []
 
-        # Payin
+    line_num = 1
+    amount_total = ZERO
+    for line_item, line_id in detail_map.items():
         line = SalesItemLine()
         line.LineNum = line_num
-        line_num += 1
-        line.Description = daily_report["Payins"].strip()
-        if line.Description.count("\n") > 0:
-            amount = Decimal(0)
-            for payin_line in line.Description.split("\n")[1:]:
-                if payin_line.startswith("TOTAL"):
-                    continue
-                mg = pattern.search(payin_line)
-                if mg:
-                    amount = amount + Decimal(atof(mg.group()))
-            line.Amount = amount.quantize(TWO_PLACES)
-            amount_total += amount
+        if daily_report.get(line_item):
+            if daily_report[line_item].startswith("N"):
+                line.Amount = Decimal(0)
+            else:
+                line.Amount = parse_money(daily_report[line_item]) * line_id[1]
+            amount_total += Decimal(line.Amount)
+            line.Description = f"{line_item} imported from ({daily_report[line_item]})"
         else:
             line.Amount = Decimal(0)
+            line.Description = "Nothing captured."
         line.SalesItemLineDetail = SalesItemLineDetail()
-        item = item_cache["43"]
+        item = REF_CACHE.item(line_id[0])
         line.SalesItemLineDetail.ItemRef = item.to_ref()
         line.SalesItemLineDetail.ServiceDate = None
-        new_receipt.Line.append(line)
-
-        # Register Audit
-        line = SalesItemLine()
-        line.LineNum = line_num
+        lines.append(line)
         line_num += 1
-        line.Description = daily_report["Bank Deposits"].strip()
-        # test if there was a recorded deposit
-        if line.Description:
-            line.Amount = Decimal(atof(line.Description.split()[4])) - Decimal(
-                amount_total
-            ).quantize(TWO_PLACES)
-        else:
-            line.Amount = Decimal(0)
-        logger.info(
-            "Sales Overage Calculated",
-            extra={"amount": str(line.Amount), "store": store, "txdate": str(txdate)},
+
+    # Payin
+    line = SalesItemLine()
+    line.LineNum = line_num
+    line_num += 1
+    line.Description = daily_report["Payins"].strip()
+    if line.Description.count("\n") > 0:
+        amount = Decimal(0)
+        for payin_line in line.Description.split("\n")[1:]:
+            if payin_line.startswith("TOTAL"):
+                continue
+            mg = pattern.search(payin_line)
+            if mg:
+                amount = amount + parse_money(mg.group())
+        line.Amount = amount.quantize(TWO_PLACES)
+        amount_total += amount
+    else:
+        line.Amount = Decimal(0)
+    line.SalesItemLineDetail = SalesItemLineDetail()
+    item = REF_CACHE.item("43")
+    line.SalesItemLineDetail.ItemRef = item.to_ref()
+    line.SalesItemLineDetail.ServiceDate = None
+    lines.append(line)
+
+    # Register Audit
+    line = SalesItemLine()
+    line.LineNum = line_num
+    line_num += 1
+    line.Description = daily_report["Bank Deposits"].strip()
+    # test if there was a recorded deposit
+    if line.Description:
+        line.Amount = parse_money(line.Description.split()[4]) - Decimal(
+            amount_total
+        ).quantize(TWO_PLACES)
+    else:
+        line.Amount = Decimal(0)
+    logger.info(
+        "Sales Overage Calculated",
+        extra={"amount": str(line.Amount), "store": store, "txdate": str(txdate)},
+    )
+    line.SalesItemLineDetail = SalesItemLineDetail()
+    item = REF_CACHE.item("31")
+    line.SalesItemLineDetail.ItemRef = item.to_ref()
+    line.SalesItemLineDetail.ServiceDate = None
+    lines.append(line)
+    new_receipt.Line = lines
+
+    daily_report["updatedAt"] = datetime.date.today().isoformat()
+    fingerprint = receipt_fingerprint(new_receipt, daily_report)
+    new_receipt.PrivateNote = json.dumps(
+        {**daily_report, "contentHash": fingerprint}, indent=1
+    )
+    return new_receipt, fingerprint
+
+
+def create_daily_sales(
+    txdate: datetime.date, daily_reports: dict[str, Any], overwrite: bool = True
+) -> dict[str, str]:
+    """Post one SalesReceipt per store for a day of FlexePOS sales.
+
+    Args:
+        txdate: Business date
+        daily_reports: Flexepos daily sales data keyed by store number
+        overwrite: Replace receipts already linked to a bank deposit
+
+    Returns:
+        Error message keyed by store for every receipt that failed to save
+    """
+    failed = create_daily_sales_range({txdate: daily_reports}, overwrite=overwrite)
+    return {key.split("/")[1]: message for key, message in failed.items()}
+
+
+def create_daily_sales_range(
+    reports_by_date: dict[datetime.date, dict[str, Any]], overwrite: bool = True
+) -> dict[str, str]:
+    """Post daily SalesReceipts for any number of dates in one pass.
+
+    Existing receipts for the whole date span are fetched with one query, the
+    customer and item lookups are shared, and every new or changed receipt
+    goes out through batch requests.
+
+    Each receipt carries a content fingerprint in its PrivateNote. Existing
+    receipts whose fingerprint matches the rebuilt one are left alone; changed
+    ones are sent as sparse updates, so reruns and backfills only write what
+    actually changed.
+
+    Args:
+        reports_by_date: Flexepos daily sales data keyed by date, then store
+        overwrite: Replace receipts already linked to a bank deposit
+
+    Returns:
+        Error message keyed by "<date>/<store>" for every receipt that failed
+        to save; empty when everything was written
+
+    Raises:
+        AuthorizationException: If QuickBooks rejects the session
+    """
+    if not reports_by_date:
+        return {}
+    refresh_session()
+
+    store_refs = get_store_refs()
+
+    first_day, last_day = min(reports_by_date), max(reports_by_date)
+    existing_receipts = {
+        (x.TxnDate, x.DepartmentRef.name if x.DepartmentRef else "20025"): x
+        for x in query_all(
+            SalesReceipt,
+            f"TxnDate >= '{qb_date_format(first_day)}'"
+            f" AND TxnDate <= '{qb_date_format(last_day)}'",
         )
-        line.SalesItemLineDetail = SalesItemLineDetail()
-        item = item_cache["31"]
-        line.SalesItemLineDetail.ItemRef = item.to_ref()
-        line.SalesItemLineDetail.ServiceDate = None
-        new_receipt.Line.append(line)
-        daily_report["updatedAt"] = datetime.date.today().isoformat()
+    }
 
-        new_receipt.PrivateNote = json.dumps(daily_report, indent=1)
+    # Pre-fetch shared lookups to avoid redundant API calls per store
+    customer_ref = Customer.all(qb=CLIENT)[0].to_ref()
 
-        try:
-            new_receipt.save(qb=CLIENT)
-        except QuickbooksException:
-            logger.exception(
-                "Failed to save receipt",
-                extra={"receipt": json.loads(new_receipt.to_json())},
+    operations: list[tuple[str, str, Any]] = []
+    for txdate, daily_reports in sorted(reports_by_date.items()):
+        for store, sref in store_refs.items():
+            if store not in daily_reports:
+                continue
+            existing = existing_receipts.get((qb_date_format(txdate), store))
+            if existing is not None and len(existing.LinkedTxn) > 0:
+                if not overwrite:
+                    logger.warning(
+                        "skipping already linked transaction",
+                        extra={"store": store, "receipt": existing.to_json()},
+                    )
+                    continue
+                logger.warning(
+                    "overwriting existing linked transaction",
+                    extra={"store": store, "receipt": json.loads(existing.to_json())},
+                )
+
+            receipt, fingerprint = _build_daily_sales_receipt(
+                store, txdate, daily_reports[store], sref, customer_ref
             )
+            key = f"{txdate.isoformat()}/{store}"
+            if existing is None:
+                operations.append((key, BatchOperation.CREATE, receipt))
+            elif _stored_fingerprint(existing) == fingerprint:
+                logger.info(
+                    "Skipping unchanged daily sales receipt",
+                    extra={"store": store, "txdate": str(txdate)},
+                )
+            else:
+                operations.append(
+                    (key, BatchOperation.UPDATE, _sparse_update(existing, receipt))
+                )
+
+    # Post every changed receipt in as few requests as possible
+    if not operations:
+        return {}
+    result = batch_write(operations)
+    receipts = {key: receipt for key, _, receipt in operations}
+    failed = result.fault_messages()
+    for key, message in failed.items():
+        txdate_str, store = key.split("/")
+        logger.error(
+            "Failed to save receipt",
+            extra={
+                "store": store,
+                "txdate": txdate_str,
+                "fault": message,
+                "receipt": json.loads(receipts[key].to_json()),
+            },
+        )
+    if isinstance(result.error, AuthorizationException):
+        raise result.error
+    return failed
 
 
+@retry_on_auth_failure
 def enter_online_cc_fee(year: int, month: int, payment_data: dict[str, Any]) -> None:
     refresh_session()
 
-    supplier = Vendor.where("DisplayName like 'Jersey Mike%'", qb=CLIENT)[0]
+    supplier = find_vendor("Jersey Mike%")
     for store, payment_info in payment_data.items():
         lines = [[wmc_account_ref(6210), "", payment_info["Total Fees"]]]
 
@@ -342,6 +984,13 @@ def enter_online_cc_fee(year: int, month: int, payment_data: dict[str, Any]) ->
         )
 
 
+def _deposit_key(
+    txn_date: str, department: str | None, amount: Any
+) -> tuple[str, str | None, Decimal]:
+    """Dedupe key for a deposit: (date, department Id, first line amount)."""
+    return (txn_date, department, Decimal(amount).quantize(TWO_PLACES))
+
+
 def sync_third_party_deposit(
     supplier: Any,
     deposit_date: datetime.date,
@@ -356,20 +1005,68 @@ def sync_third_party_deposit(
         "created" if deposit was created
         "skipped" if deposit already exists
     """
+    outcome = sync_third_party_deposits(
+        [(supplier, deposit_date, notes, lines, department)]
+    )[0]
+    if outcome["status"] == "failed":
+        raise QuickbooksException(outcome["error"])
+    return outcome["status"]
+
+
+def sync_third_party_deposits(
+    deposits: list[Any],
+) -> list[dict[str, str]]:
+    """
+    Sync a batch of third party deposits to QuickBooks.
+
+    Existing deposits for the whole date span are fetched with one paginated
+    query and indexed by (date, department Id, first line amount), so a
+    multi-week import costs a handful of queries instead of one per payout.
+    Deposits that are already present (or repeated within the batch) are
+    skipped and the rest are created with batched writes.
+
+    Args:
+        deposits: (supplier, deposit_date, notes, lines, department) entries
+            as produced by the third-party scrapers
+
+    Returns:
+        One dict per input deposit, in order, with "status" of "created",
+        "skipped" or "failed" and an "error" message for failures
+    """
     refresh_session()
+    if not deposits:
+        return []
 
     store_refs = get_store_refs()
 
-    # check if one already exists
-    query = Deposit.filter(TxnDate=qb_date_format(deposit_date), qb=CLIENT)
-    for d in query:
-        if (
-            d.DepartmentRef is None
-            if not department
-            else store_refs[department]
-            and Decimal(d.Line[0].Amount).quantize(TWO_PLACES)
-            == Decimal(atof(lines[0][2])).quantize(TWO_PLACES)
-        ):
+    start_date = min(deposit[1] for deposit in deposits)
+    end_date = max(deposit[1] for deposit in deposits)
+    existing = query_all(
+        Deposit,
+        f"TxnDate >= '{qb_date_format(start_date)}' "
+        f"AND TxnDate <= '{qb_date_format(end_date)}'",
+    )
+    seen = {
+        _deposit_key(
+            d.TxnDate,
+            d.DepartmentRef.value if d.DepartmentRef else None,
+            d.Line[0].Amount,
+        )
+        for d in existing
+        if d.Line
+    }
+
+    outcomes: list[dict[str, str]] = []
+    operations = []
+    for position, (supplier, deposit_date, notes, lines, department) in enumerate(
+        deposits
+    ):
+        key = _deposit_key(
+            qb_date_format(deposit_date),
+            store_refs[department].value if department else None,
+            parse_money(lines[0][2]),
+        )
+        if key in seen:
             logger.warning(
                 "Skipping already imported deposit",
                 extra={
@@ -378,77 +1075,138 @@ def sync_third_party_deposit(
                     "amount": lines[0][2],
                 },
             )
-            return "skipped"
-    deposit = Deposit()
-    deposit.TxnDate = qb_date_format(deposit_date)
-    deposit.PrivateNote = notes
-    deposit.DepartmentRef = None if not department else store_refs[department]
-    deposit.DepositToAccountRef = wmc_account_ref(1010)
+            outcomes.append({"status": "skipped"})
+            continue
+        seen.add(key)
 
-    line_num = 1
+        deposit = Deposit()
+        deposit.TxnDate = qb_date_format(deposit_date)
+        deposit.PrivateNote = notes
+        deposit.DepartmentRef = None if not department else store_refs[department]
+        deposit.DepositToAccountRef = wmc_account_ref(1010)
 
-    for deposit_line in lines:
-        line = DepositLine()
-        line.DepositLineDetail = DepositLineDetail()
-        line.DepositLineDetail.AccountRef = wmc_account_ref(int(deposit_line[0]))
-        line.DepositLineDetail.Entity = Vendor.filter(DisplayName=supplier, qb=CLIENT)[
-            0
-        ].to_ref()
-        line.LineNum = line_num
-        line.Id = line_num
-        line.Amount = Decimal(atof(deposit_line[2])).quantize(TWO_PLACES)
-        line.Description = deposit_line[1]
-        line_num += 1
-        deposit.Line.append(line)
+        line_num = 1
+
+        for deposit_line in lines:
+            line = DepositLine()
+            line.DepositLineDetail = DepositLineDetail()
+            line.DepositLineDetail.AccountRef = wmc_account_ref(int(deposit_line[0]))
+            line.DepositLineDetail.Entity = find_vendor(supplier).to_ref()
+            line.LineNum = line_num
+            line.Id = line_num
+            line.Amount = parse_money(deposit_line[2])
+            line.Description = deposit_line[1]
+            line_num += 1
+            deposit.Line.append(line)
+
+        operations.append((str(position), BatchOperation.CREATE, deposit))
+        outcomes.append({"status": "created"})
+
+    if operations:
+        result = batch_write(operations)
+        for label, message in result.fault_messages().items():
+            logger.error(
+                "Failed to save deposit",
+                extra={"deposit": deposits[int(label)], "error": message},
+            )
+            outcomes[int(label)] = {"status": "failed", "error": message}
+    return outcomes
+
+
+@dataclass
+class BillDocument:
+    """A vendor invoice or credit to post, as parsed from a source report.
+
+    Attributes:
+        supplier: Vendor the document is from
+        invoice_num: DocNumber; used to find an existing Bill/VendorCredit
+        invoice_date: Transaction date
+        notes: PrivateNote text
+        lines: [AccountRef, description, amount] entries
+        department: Store number for the DepartmentRef, if any
+    """
+
+    supplier: Any
+    invoice_num: str
+    invoice_date: datetime.date
+    notes: str
+    lines: list[list[Any]]
+    department: str | None = None
+
+    @property
+    def is_credit(self) -> bool:
+        """Documents totalling less than -$0.08 are posted as VendorCredits."""
+        total = sum((parse_money(line[-1]) for line in self.lines), ZERO)
+        return bool(total < Decimal("-0.08"))
+
+
+def _quote_doc_number(doc_number: str) -> str:
+    return "'" + doc_number.replace("'", "\\'") + "'"
+
+
+def find_by_doc_numbers(tx_type: Any, doc_numbers: list[str]) -> dict[str, Any]:
+    """Fetch existing transactions of one type by DocNumber.
+
+    Looks up DOC_NUMBER_CHUNK numbers per ``DocNumber IN (...)`` query rather
+    than one query per document.
 
-    deposit.save(qb=CLIENT)
-    return "created"
+    Returns:
+        Dict mapping DocNumber to the first matching transaction
+    """
+    client = refresh_session()
+    unique = sorted(set(doc_numbers))
+    found: dict[str, Any] = {}
+    for start in range(0, len(unique), DOC_NUMBER_CHUNK):
+        chunk = unique[start : start + DOC_NUMBER_CHUNK]
+        where_clause = (
+            f"DocNumber IN ({', '.join(_quote_doc_number(n) for n in chunk)})"
+        )
+        for txn in tx_type.where(where_clause, max_results=1000, qb=client):
+            found.setdefault(txn.DocNumber, txn)
+    return found
 
 
-def sync_bill(
-    supplier: Any,
-    invoice_num: str,
-    invoice_date: datetime.date,
-    notes: str,
-    lines: list[list[Any]],
-    department: str | None = None,
-) -> None:
-    refresh_session()
+def _ref_value(ref: Any) -> Any:
+    return getattr(ref, "value", None) if ref else None
 
-    store_refs = get_store_refs()
 
-    # is this a credit
-    if reduce(lambda x, y: x + Decimal(str(atof(y[-1]))), lines, ZERO) < Decimal(
-        "-0.08"
-    ):
-        tx_type = VendorCredit
-        item_sign = -1
-    else:
-        item_sign = 1
-        tx_type = Bill
-
-    # see if the invoice number already exists
-    query = tx_type.filter(DocNumber=invoice_num, qb=CLIENT)
-    if len(query) == 0:
-        # create the bill
-        bill = tx_type()
-        bill.DocNumber = invoice_num
-    else:
-        bill = query[0]
+def _bill_fingerprint(bill: Any) -> tuple[Any, ...]:
+    """The fields sync_bills sets, normalised so QBO and local copies compare."""
+    lines = tuple(
+        (
+            _ref_value(line.AccountBasedExpenseLineDetail.AccountRef),
+            Decimal(str(line.Amount)).quantize(TWO_PLACES),
+            line.Description or "",
+        )
+        for line in bill.Line
+        if getattr(line, "AccountBasedExpenseLineDetail", None)
+    )
+    return (
+        bill.TxnDate,
+        _ref_value(bill.VendorRef),
+        bill.PrivateNote or "",
+        _ref_value(bill.DepartmentRef),
+        _ref_value(getattr(bill, "SalesTermRef", None)),
+        lines,
+    )
+
 
-    if len(getattr(bill, "LinkedTxn", [])) > 0:
-        logger.warning("Skipping linked invoice", extra={"invoice_num": invoice_num})
-        return
+def _apply_bill_document(
+    bill: Any, document: BillDocument, store_refs: dict[str, Any]
+) -> None:
+    item_sign = -1 if isinstance(bill, VendorCredit) else 1
 
-    bill.TxnDate = qb_date_format(invoice_date)
+    bill.TxnDate = qb_date_format(document.invoice_date)
 
-    bill.VendorRef = supplier.to_ref()
+    bill.VendorRef = document.supplier.to_ref()
 
-    bill.PrivateNote = notes
-    bill.DepartmentRef = None if not department else store_refs[department]
+    bill.PrivateNote = document.notes
+    bill.DepartmentRef = (
+        None if not document.department else store_refs[document.department]
+    )
 
     if isinstance(bill, Bill):
-        bill.SalesTermRef = supplier.TermRef
+        bill.SalesTermRef = document.supplier.TermRef
         bill.DueDate = None
 
     # clear the lines
@@ -456,23 +1214,106 @@ def sync_bill(
 
     line_num = 1
 
-    for bill_line in lines:
+    for bill_line in document.lines:
         line = AccountBasedExpenseLine()
         line.AccountBasedExpenseLineDetail = AccountBasedExpenseLineDetail()
         line.AccountBasedExpenseLineDetail.AccountRef = bill_line[0]
         line.LineNum = line_num
         line.Id = line_num
-        line.Amount = Decimal(atof(bill_line[2])).quantize(TWO_PLACES) * item_sign
+        line.Amount = parse_money(bill_line[2]) * item_sign
         line.Description = bill_line[1]
         line_num += 1
         bill.Line.append(line)
 
-    try:
-        bill.save(qb=CLIENT)
-    except QuickbooksException:
-        logger.exception("Failed to save bill", extra={"bill": bill.to_json()})
+
+def sync_bills(documents: list[BillDocument]) -> dict[str, str]:
+    """Create or update vendor bills and credits in bulk.
+
+    Documents are classified as Bill or VendorCredit up front, existing
+    transactions are found with chunked DocNumber queries per type, and only
+    new or changed documents are posted, through batch requests. If the
+    same DocNumber appears more than once the last document wins.
+
+    Args:
+        documents: Bills/credits to sync, e.g. a whole Crunchtime GL report
+
+    Returns:
+        Dict mapping DocNumber to "created", "updated", "unchanged",
+        "linked" (skipped because it is already paid) or "failed"
+    """
+    refresh_session()
+    store_refs = get_store_refs()
+
+    by_type: dict[Any, list[BillDocument]] = {Bill: [], VendorCredit: []}
+    for document in {doc.invoice_num: doc for doc in documents}.values():
+        by_type[VendorCredit if document.is_credit else Bill].append(document)
+
+    outcomes: dict[str, str] = {}
+    operations: list[tuple[str, str, Any]] = []
+    for tx_type, type_documents in by_type.items():
+        if not type_documents:
+            continue
+        existing = find_by_doc_numbers(
+            tx_type, [doc.invoice_num for doc in type_documents]
+        )
+        for document in type_documents:
+            bill = existing.get(document.invoice_num)
+            if bill is None:
+                bill = tx_type()
+                bill.DocNumber = document.invoice_num
+                _apply_bill_document(bill, document, store_refs)
+                operations.append((document.invoice_num, BatchOperation.CREATE, bill))
+                outcomes[document.invoice_num] = "created"
+                continue
+
+            if len(getattr(bill, "LinkedTxn", None) or []) > 0:
+                logger.warning(
+                    "Skipping linked invoice",
+                    extra={"invoice_num": document.invoice_num},
+                )
+                outcomes[document.invoice_num] = "linked"
+                continue
+
+            before = _bill_fingerprint(bill)
+            _apply_bill_document(bill, document, store_refs)
+            if _bill_fingerprint(bill) == before:
+                outcomes[document.invoice_num] = "unchanged"
+                continue
+            operations.append((document.invoice_num, BatchOperation.UPDATE, bill))
+            outcomes[document.invoice_num] = "updated"
+
+    if not operations:
+        return outcomes
+
+    result = batch_write(operations)
+    bills = {key: bill for key, _op, bill in operations}
+    for doc_number, message in result.fault_messages().items():
+        logger.error(
+            "Failed to save bill",
+            extra={
+                "doc_number": doc_number,
+                "fault": message,
+                "bill": json.loads(bills[doc_number].to_json()),
+            },
+        )
+        outcomes[doc_number] = "failed"
+    return outcomes
+
+
+def sync_bill(
+    supplier: Any,
+    invoice_num: str,
+    invoice_date: datetime.date,
+    notes: str,
+    lines: list[list[Any]],
+    department: str | None = None,
+) -> None:
+    sync_bills(
+        [BillDocument(supplier, invoice_num, invoice_date, notes, lines, department)]
+    )
 
 
+@retry_on_auth_failure
 def sync_third_party_transactions(
     year: int, month: int, payment_data: dict[str, Any]
 ) -> None:
@@ -514,7 +1355,7 @@ def sync_third_party_transactions(
             line.JournalEntryLineDetail.PostingType = "Debit"
             line.LineNum = line_num
             line.Id = line_num
-            line.Amount = Decimal(atof(amount)).quantize(TWO_PLACES)
+            line.Amount = parse_money(amount)
             if payment_name == "Total":
                 line.JournalEntryLineDetail.PostingType = "Credit"
             line.Description = payment_name
@@ -530,6 +1371,7 @@ def sync_third_party_transactions(
             )
 
 
+@retry_on_auth_failure
 def sync_inventory(
     year: int,
     month: int,
@@ -572,7 +1414,7 @@ def sync_inventory(
         line.JournalEntryLineDetail.PostingType = "Debit"
         line.LineNum = line_num
         line.Id = line_num
-        line.Amount = Decimal(atof(jentry_line[1])).quantize(TWO_PLACES)
+        line.Amount = parse_money(jentry_line[1])
         if line.Amount < 0:
             line.JournalEntryLineDetail.PostingType = "Credit"
             line.Amount = line.Amount * -1
@@ -589,7 +1431,7 @@ def sync_inventory(
     line.JournalEntryLineDetail.PostingType = "Credit"
     line.LineNum = line_num
     line.Id = line_num
-    line.Amount = Decimal(atof(total)).quantize(TWO_PLACES)
+    line.Amount = parse_money(total)
     line_num += 1
     jentry.Line.append(line)
 
@@ -603,13 +1445,7 @@ def sync_inventory(
 
 
 def wmc_account_ref(acct_num: int | str) -> Any:
-    global account_ref
-    if account_ref is None:
-        refresh_session()
-        account_ref = {
-            x.AcctNum: x.to_ref() for x in Account.all(max_results=1000, qb=CLIENT)
-        }
-    return account_ref[str(acct_num)]
+    return REF_CACHE.account(acct_num).to_ref()
 
 
 def get_store_refs() -> dict[str, Any]:
@@ -618,51 +1454,84 @@ def get_store_refs() -> dict[str, Any]:
     Returns:
         Dict mapping store name (e.g., "20407") to QB Ref object
     """
-    return {x.Name: x.to_ref() for x in Department.all(qb=CLIENT)}
+    return {name: dept.to_ref() for name, dept in REF_CACHE.departments().items()}
 
 
 def account_ref_lookup(gl_account_code: str) -> Any:
-    global account_ref
-    if account_ref is None:
-        refresh_session()
-        account_ref = {
-            x.AcctNum: x.to_ref() for x in Account.all(max_results=1000, qb=CLIENT)
-        }
-
-    return account_ref[gl_code_map[gl_account_code]]
+    return wmc_account_ref(gl_code_map[gl_account_code])
 
 
 def inventory_ref_lookup(inv_account_code: str) -> Any:
-    global inv_account_ref
-    if inv_account_ref is None:
-        refresh_session()
-        inv_account_ref = {
-            x.AcctNum: x.to_ref() for x in Account.all(max_results=1000, qb=CLIENT)
-        }
+    return wmc_account_ref(gl_code_map_to_cogs[inv_account_code])
+
+
+def find_vendor(pattern: str) -> Any:
+    """Find a QBO vendor by DisplayName or "Prefix%" pattern.
+
+    Raises:
+        KeyError: If no vendor matches
+    """
+    match = REF_CACHE.vendor_index().match(pattern)
+    if match is None:
+        raise KeyError(pattern)
+    return match
+
 
-    return inv_account_ref[gl_code_map_to_cogs[inv_account_code]]
+def _configured_vendor_ids() -> dict[str, str]:
+    """Load the Crunchtime vendor code -> QBO vendor Id map from SSM."""
+    try:
+        return cast(
+            "dict[str, str]",
+            json.loads(str(_qbo_params.get("vendor_map", default="{}"))),
+        )
+    except (ClientError, json.JSONDecodeError) as e:
+        logger.warning(f"Failed to load vendor_map parameter: {e!s}")
+        return {}
 
 
 def vendor_lookup(gl_vendor_name: str) -> Any:
-    global vendor
-    if vendor is None:
-        refresh_session()
-        vendor = {
-            "WNEPLS": Vendor.where("DisplayName like 'The Paper%'", qb=CLIENT)[0],
-            "PEPSI": Vendor.where("DisplayName like 'Pepsi%'", qb=CLIENT)[0],
-            "GenPro": Vendor.where("DisplayName like 'General Produce'", qb=CLIENT)[0],
-            "SYSFRA": Vendor.where("DisplayName like 'Sysco San%'", qb=CLIENT)[0],
-            "SYSSAC": Vendor.where("DisplayName like 'Sysco Sac%'", qb=CLIENT)[0],
-            "SAL": Vendor.where("DisplayName like 'Sala%'", qb=CLIENT)[0],
-            "DONOGH": Vendor.where("DisplayName like 'Donoghue%'", qb=CLIENT)[0],
-            "USFOOD": Vendor.where("DisplayName like 'US Foods%'", qb=CLIENT)[0],
-        }
-    return vendor[gl_vendor_name]
+    """Resolve a Crunchtime vendor code (e.g. "SYSFRA") to a QBO vendor.
+
+    Codes pinned in the vendor_map parameter win; otherwise the code's
+    VENDOR_PATTERNS entry is matched against the local vendor index.
+
+    Raises:
+        KeyError: If the code is unknown or no vendor matches
+    """
+    global vendor_ids
+    if vendor_ids is None:
+        vendor_ids = _configured_vendor_ids()
+    index = REF_CACHE.vendor_index()
+    if gl_vendor_name in vendor_ids:
+        match = index.by_id(vendor_ids[gl_vendor_name])
+    else:
+        match = index.match(VENDOR_PATTERNS[gl_vendor_name])
+    if match is None:
+        raise KeyError(gl_vendor_name)
+    return match
 
 
-def refresh_session() -> Any:
+def refresh_session(force: bool = False) -> Any:
+    """Return a QuickBooks client, refreshing the OAuth tokens only when needed.
+
+    The client is cached for the life of the process (a warm Lambda container
+    keeps it between invocations). Secrets Manager and Intuit are only
+    contacted when there is no client yet, the access token is within
+    TOKEN_REFRESH_MARGIN seconds of expiring, or ``force`` is set.
+
+    Args:
+        force: Refresh the tokens even if the cached access token looks valid
+
+    Returns:
+        The shared QuickBooks client (also available as ``qb.CLIENT``)
+    """
     global AUTH_CLIENT
     global CLIENT
+    global _token_expires_at
+
+    if not force and CLIENT is not None and time.monotonic() < _token_expires_at:
+        return CLIENT
+
     s = json.loads(get_secret())
 
     if AUTH_CLIENT is None:
@@ -683,12 +1552,15 @@ def refresh_session() -> Any:
     s["refresh_token"] = AUTH_CLIENT.refresh_token
     put_secret(json.dumps(s))
     # QuickBooks.enable_global()
-    CLIENT = QuickBooks(
+    CLIENT = GovernedQuickBooks(
         auth_client=AUTH_CLIENT,
         company_id=_qbo_params["company_id"],
         minorversion=75,
         use_decimal=True,
     )
+    expires_in = AUTH_CLIENT.expires_in or DEFAULT_TOKEN_LIFETIME
+    _token_expires_at = time.monotonic() + int(expires_in) - TOKEN_REFRESH_MARGIN
+    logger.debug("Refreshed QuickBooks session", extra={"expires_in": expires_in})
     return CLIENT
 
 
@@ -797,6 +1669,8 @@ def exchange_auth_code(code: str, realm_id: str) -> dict[str, Any]:
         s["access_token"] = auth_client.access_token
         s["refresh_token"] = auth_client.refresh_token
         put_secret(json.dumps(s))
+        # Drop the cached client so the next call picks up the new tokens
+        invalidate_session()
 
         # Update company_id in SSM if different
         current_company_id = _qbo_params.get("company_id", default="")
@@ -841,193 +1715,232 @@ def get_connection_status() -> dict[str, Any]:
         return {"connected": False, "message": f"Connection error: {e!s}"}
 
 
-def bill_export() -> None:
-    refresh_session()
-    # store_refs = {x.Name: x.to_ref() for x in Department.all(qb=CLIENT)}
-    for qb_data_type in [VendorCredit, Bill, SalesReceipt, Deposit, JournalEntry]:
-        with open(
-            f"purchase_{qb_data_type.__name__}_journal.json",
-            "w",
-            encoding="utf-8",
-        ) as fileout:
-            fileout.write("[")
-            query_count = qb_data_type.count(
-                where_clause="TxnDate > '2020-06-01' AND TxnDate < '2023-06-07'",
-                qb=CLIENT,
-            )
-            r_count = 1
-            while r_count < query_count:
-                bills = qb_data_type.where(
-                    where_clause="TxnDate >= '2020-06-01' AND TxnDate < '2023-06-07'",
-                    order_by="TxnDate",
-                    start_position=r_count,
-                    max_results=1000,
-                    qb=CLIENT,
-                )
-                for bill in bills:
-                    if (
-                        not hasattr(bill, "DepartmentRef")
-                        or bill.DepartmentRef is None
-                        or bill.DepartmentRef.name in (None, "WMC", "20025")
-                    ):
-                        fileout.write(bill.to_json())
-                        fileout.write(",\n")
-                    r_count += 1
-            fileout.write("]")
-
-
-def fix_deposit() -> None:
-    refresh_session()
-    store_refs = get_store_refs()
-    qb_data_type = Deposit
-    modify_queue = []
-    with open(
-        f"purchase_{qb_data_type.__name__}_journal.json",
-        "w",
-        encoding="utf-8",
-    ) as fileout:
-        fileout.write("[")
-        query_count = qb_data_type.count(
-            where_clause="TxnDate >= '2022-01-01' AND TxnDate < '2023-01-01'", qb=CLIENT
+def _is_wmc_or_unassigned(txn: Any) -> bool:
+    return (
+        not hasattr(txn, "DepartmentRef")
+        or txn.DepartmentRef is None
+        or txn.DepartmentRef.name in (None, "WMC", "20025")
+    )
+
+
+def bill_export(
+    output_dir: str = ".", compress: bool = False, cursor_path: str | None = None
+) -> dict[str, int]:
+    """Export WMC/unassigned purchase-side transactions to NDJSON files.
+
+    Writes one ``purchase_<Type>_journal.ndjson`` file per entity. Pass
+    ``cursor_path`` to make a long export resumable.
+
+    Returns:
+        Dict mapping entity name to the number of records written
+    """
+    client = refresh_session()
+    where_clause = "TxnDate >= '2020-06-01' AND TxnDate < '2023-06-07'"
+    specs = [
+        ExportSpec(
+            qb_data_type,
+            where_clause,
+            record_filter=_is_wmc_or_unassigned,
+            name=f"purchase_{qb_data_type.__name__}_journal",
         )
-        r_count = 1
-        while r_count < query_count:
-            bills = qb_data_type.where(
-                where_clause="TxnDate >= '2022-01-01' AND TxnDate < '2023-01-01'",
-                order_by="TxnDate",
-                start_position=r_count,
-                max_results=1000,
-                qb=CLIENT,
-            )
-            for bill in bills:
-                if (
-                    (
-                        not hasattr(bill, "DepartmentRef")
-                        or bill.DepartmentRef is None
-                        or bill.DepartmentRef.name == "20025"
-                    )
-                    and hasattr(bill.Line[0], "DepositLineDetail")
-                    and bill.Line[0].DepositLineDetail.AccountRef.name
-                    == "1330 Other Current Assets:Gift Cards"
-                    and "20358" in bill.Line[0].Description
-                ):
-                    logger.info(
-                        "Found deposit",
-                        extra={
-                            "bill": bill.to_json(),
-                            "bill.Line[0].Description": bill.Line[0].Description,
-                        },
-                    )
-                    modify_queue.append(bill)
-                r_count += 1
-        for bill in modify_queue:
-            bill.DepartmentRef = store_refs["20358"]
-            # bill.save(qb=CLIENT)
+        for qb_data_type in [VendorCredit, Bill, SalesReceipt, Deposit, JournalEntry]
+    ]
+    counts: dict[str, int] = export_entities(
+        specs, client, output_dir, compress=compress, cursor_path=cursor_path
+    )
+    return counts
 
 
-def find_unmatched_deposits() -> None:
-    refresh_session()
-    where_clause = "TxnDate >= '2025-01-01' AND TxnDate < '2025-10-01'"
-    qb_data_type = SalesReceipt
-    query_count = qb_data_type.count(where_clause=where_clause, qb=CLIENT)
-    r_count = 1
-    logger.info(f"query_count: {query_count}")
-    while r_count < query_count:
-        sales_receipts = qb_data_type.where(
-            where_clause=where_clause,
-            order_by="TxnDate",
-            start_position=r_count,
-            max_results=1000,
-            qb=CLIENT,
+def _is_misfiled_gift_card(deposit: Any) -> bool:
+    return (
+        (
+            not hasattr(deposit, "DepartmentRef")
+            or deposit.DepartmentRef is None
+            or deposit.DepartmentRef.name == "20025"
         )
-        for sales_receipt in sales_receipts:
-            if sales_receipt.TotalAmt > 0 and len(sales_receipt.LinkedTxn) == 0:
-                logger.info(
-                    "Found unmatched sales receipt",
-                    extra={
-                        "store": sales_receipt.DepartmentRef.name,
-                        "TxnDate": sales_receipt.TxnDate,
-                        "Amount": sales_receipt.TotalAmt,
-                    },
-                )
-            r_count += 1
+        and hasattr(deposit.Line[0], "DepositLineDetail")
+        and deposit.Line[0].DepositLineDetail.AccountRef.name
+        == "1330 Other Current Assets:Gift Cards"
+        and "20358" in deposit.Line[0].Description
+    )
 
 
-def fix_wld_online_tips() -> None:
-    refresh_session()
-    where_clause = "TxnDate >= '2024-01-04'"
-    qb_data_type = SalesReceipt
-    query_count = qb_data_type.count(where_clause=where_clause, qb=CLIENT)
-    r_count = 1
-    logger.info(f"query_count: {query_count}")
-    while r_count < query_count:
-        sales_receipts = qb_data_type.where(
-            where_clause=where_clause,
-            order_by="TxnDate",
-            start_position=r_count,
-            max_results=1000,
-            qb=CLIENT,
+def fix_deposit(
+    dry_run: bool = True,
+    checkpoint_path: str | None = None,
+    report_path: str | None = None,
+) -> CorrectionResult:
+    """Move 2022 store 20358 gift card deposits onto the 20358 department."""
+    store_ref = get_store_refs()["20358"]
+
+    def assign_store(deposit: Any) -> Any:
+        deposit.DepartmentRef = store_ref
+        return deposit
+
+    return apply_correction(
+        Correction(
+            name="fix_deposit",
+            qb_type=Deposit,
+            where_clause="TxnDate >= '2022-01-01' AND TxnDate < '2023-01-01'",
+            transform=assign_store,
+            fields=("DepartmentRef",),
+            record_filter=_is_misfiled_gift_card,
+        ),
+        dry_run=dry_run,
+        checkpoint_path=checkpoint_path,
+        report_path=report_path,
+    )
+
+
+def _is_unlinked_receipt(sales_receipt: Any) -> bool:
+    return sales_receipt.TotalAmt > 0 and len(sales_receipt.LinkedTxn) == 0
+
+
+def _ledger_entry(txn: Any) -> LedgerEntry:
+    return LedgerEntry(
+        key=txn.Id,
+        amount=Decimal(str(txn.TotalAmt)),
+        date=datetime.date.fromisoformat(txn.TxnDate),
+        store=txn.DepartmentRef.name if txn.DepartmentRef else None,
+        source=txn,
+    )
+
+
+def _is_unlinked_deposit(deposit: Any) -> bool:
+    return not any(getattr(line, "LinkedTxn", None) for line in deposit.Line)
+
+
+def find_unmatched_deposits(
+    start_date: datetime.date = datetime.date(2025, 1, 1),
+    end_date: datetime.date = datetime.date(2025, 9, 30),
+    date_tolerance_days: int = 3,
+) -> MatchResult:
+    """Pair unlinked sales receipts with unlinked deposits for the same store.
+
+    Both sides are loaded once and matched by amount, store and date window
+    with the indexed engine in reconcile.py.
+
+    Args:
+        start_date: First TxnDate to load (inclusive)
+        end_date: Last TxnDate to load (inclusive)
+        date_tolerance_days: Days a deposit may land after/before its receipt
+
+    Returns:
+        MatchResult of receipts (left) against deposits (right)
+    """
+    client = refresh_session()
+    where_clause = (
+        f"TxnDate >= '{start_date.isoformat()}' AND TxnDate <= '{end_date.isoformat()}'"
+    )
+    receipts = [
+        _ledger_entry(receipt)
+        for receipt in iter_records(
+            SalesReceipt, where_clause, client, record_filter=_is_unlinked_receipt
         )
-        for sales_receipt in sales_receipts:
-            r_count += 1
-            online_wld_tips = Decimal(0)
-            online_wld_gift_card_tips = Decimal(0)
-            online_wld_tips_line = None
-            online_credit_card_line = None
-            online_wld_gift_card_tips_line = None
-            online_gift_card_line = None
-            for line in sales_receipt.Line:
-                if line.Description is None:
-                    continue
-                if line.Description.startswith("Online WLD Tips"):
-                    online_wld_tips = line.Amount
-                    if online_wld_tips == Decimal(0):
-                        continue
-                    online_wld_tips_line = line
-                if line.Description.startswith("Online Credit Card"):
-                    online_credit_card_line = line
-                if line.Description.startswith("Online WLD Gift Card Tips"):
-                    online_wld_gift_card_tips = line.Amount
-                    online_wld_gift_card_tips_line = line
-                if line.Description.startswith("Online Gift Card"):
-                    online_gift_card_line = line
-            for tip_line, total_line, tip_amount in [
-                (online_wld_tips_line, online_credit_card_line, online_wld_tips),
-                (
-                    online_wld_gift_card_tips_line,
-                    online_gift_card_line,
-                    online_wld_gift_card_tips,
-                ),
-            ]:
-                if tip_line is not None and total_line is not None:
-                    sales_receipt.Line.remove(tip_line)
-                    total_line.Amount = total_line.Amount + tip_amount
-                    total_line.SalesItemLineDetail["Qty"] = 0
-                    total_line.SalesItemLineDetail["UnitPrice"] = 0
-                    try:
-                        sales_receipt.save(qb=CLIENT)
-                        logger.info(
-                            "Fixed WLD online tips",
-                            extra={
-                                "sales_receipt": sales_receipt.DocNumber,
-                                "store": sales_receipt.DepartmentRef.name,
-                                "date": sales_receipt.TxnDate,
-                            },
-                        )
-                    except QuickbooksException:
-                        logger.exception(
-                            "Failed to save sales receipt",
-                            extra={
-                                "sales_receipt": sales_receipt.DocNumber,
-                                "store": sales_receipt.DepartmentRef.name,
-                                "date": sales_receipt.TxnDate,
-                                "online_wld_tips": (
-                                    online_wld_tips_line.to_json()
-                                    if online_wld_tips_line
-                                    else None
-                                ),
-                            },
-                        )
+    ]
+    deposits = [
+        _ledger_entry(deposit)
+        for deposit in iter_records(
+            Deposit, where_clause, client, record_filter=_is_unlinked_deposit
+        )
+    ]
+    result = match_entries(receipts, deposits, date_tolerance_days=date_tolerance_days)
+
+    for receipt, deposit in result.matched:
+        logger.info(
+            "Found deposit for unmatched sales receipt",
+            extra={
+                "store": receipt.store,
+                "TxnDate": receipt.date.isoformat() if receipt.date else None,
+                "Amount": str(receipt.amount),
+                "deposit_id": deposit.key,
+            },
+        )
+    for receipt, candidates in result.ambiguous:
+        logger.warning(
+            "Multiple deposits match unmatched sales receipt",
+            extra={
+                "store": receipt.store,
+                "TxnDate": receipt.date.isoformat() if receipt.date else None,
+                "Amount": str(receipt.amount),
+                "deposit_ids": [deposit.key for deposit in candidates],
+            },
+        )
+    for receipt in result.unmatched_left:
+        logger.info(
+            "Found unmatched sales receipt",
+            extra={
+                "store": receipt.store,
+                "TxnDate": receipt.date.isoformat() if receipt.date else None,
+                "Amount": str(receipt.amount),
+            },
+        )
+    return result
+
+
+def fold_wld_online_tips(sales_receipt: Any) -> Any | None:
+    """Fold Online WLD tip lines into their Online Credit Card/Gift Card lines.
+
+    Returns:
+        The modified receipt, or None when it has nothing to fold
+    """
+    online_wld_tips = Decimal(0)
+    online_wld_gift_card_tips = Decimal(0)
+    online_wld_tips_line = None
+    online_credit_card_line = None
+    online_wld_gift_card_tips_line = None
+    online_gift_card_line = None
+    for line in sales_receipt.Line:
+        if line.Description is None:
+            continue
+        if line.Description.startswith("Online WLD Tips"):
+            online_wld_tips = line.Amount
+            if online_wld_tips == Decimal(0):
+                continue
+            online_wld_tips_line = line
+        if line.Description.startswith("Online Credit Card"):
+            online_credit_card_line = line
+        if line.Description.startswith("Online WLD Gift Card Tips"):
+            online_wld_gift_card_tips = line.Amount
+            online_wld_gift_card_tips_line = line
+        if line.Description.startswith("Online Gift Card"):
+            online_gift_card_line = line
+    folded = False
+    for tip_line, total_line, tip_amount in [
+        (online_wld_tips_line, online_credit_card_line, online_wld_tips),
+        (
+            online_wld_gift_card_tips_line,
+            online_gift_card_line,
+            online_wld_gift_card_tips,
+        ),
+    ]:
+        if tip_line is not None and total_line is not None:
+            sales_receipt.Line.remove(tip_line)
+            total_line.Amount = total_line.Amount + tip_amount
+            total_line.SalesItemLineDetail["Qty"] = 0
+            total_line.SalesItemLineDetail["UnitPrice"] = 0
+            folded = True
+    return sales_receipt if folded else None
+
+
+def fix_wld_online_tips(
+    dry_run: bool = False,
+    checkpoint_path: str | None = None,
+    report_path: str | None = None,
+) -> CorrectionResult:
+    """Fold Online WLD tips into the online payment lines since 2024-01-04."""
+    return apply_correction(
+        Correction(
+            name="fix_wld_online_tips",
+            qb_type=SalesReceipt,
+            where_clause="TxnDate >= '2024-01-04'",
+            transform=fold_wld_online_tips,
+            fields=("Line",),
+        ),
+        dry_run=dry_run,
+        checkpoint_path=checkpoint_path,
+        report_path=report_path,
+    )
 
 
 def calculate_bill_splits(
@@ -1038,6 +1951,10 @@ def calculate_bill_splits(
 ) -> dict[str, list[Decimal]]:
     """Calculate how a bill should be split between locations.
 
+    Each line is split in integer cents with largest-remainder rounding (see
+    decimal_utils.allocate), so every line and the bill as a whole sum
+    exactly.
+
     Args:
         total_amount (Decimal): Total bill amount
         line_amounts (list[Decimal]): List of line item amounts
@@ -1056,57 +1973,33 @@ def calculate_bill_splits(
         ... )
         >>> amounts["20025"]
         [Decimal('51.27')]
+        >>> amounts["20368"]
+        [Decimal('51.28')]
         >>> sum(sum(v) for v in amounts.values())
         Decimal('256.36')
     """
     if not locations:
         raise ValueError("Must provide at least one location to split between")
 
-    # Validate and normalize split ratios - keep full precision for calculations
     if split_ratios is None:
-        split_ratios = {loc: Decimal("1") / len(locations) for loc in locations}
+        weights = [Decimal(1)] * len(locations)
     else:
-        # Convert any float ratios to Decimal but don't quantize yet
+        # Convert any float ratios to Decimal via str to keep their digits
         split_ratios = {k: Decimal(str(v)) for k, v in split_ratios.items()}
         ratio_sum = sum(split_ratios.values())
         if abs(ratio_sum - Decimal("1")) > Decimal("0.001"):
             raise ValueError(f"Split ratios must sum to 1.0, got {ratio_sum}")
+        weights = [split_ratios.get(location, ZERO) for location in locations]
 
-    # Initialize results dictionary
-    results: dict[str, list[Decimal]] = {loc: [] for loc in locations}
-
-    # Track running totals for each location
-    location_totals = {loc: Decimal("0") for loc in locations}
-    total_allocated = Decimal("0")
-
-    # Process each line item
-    for line_amount in line_amounts:
-        remaining_amount = line_amount
+    shares = allocate(line_amounts, weights)
 
-        # Split the line amount between locations
-        for location in locations[:-1]:  # Process all but last location
-            ratio = split_ratios[location]
-            exact_split = line_amount * ratio
-            split_amount = exact_split.quantize(TWO_PLACES)
-
-            results[location].append(split_amount)
-            location_totals[location] += split_amount
-            remaining_amount -= split_amount
-            total_allocated += split_amount
-
-        # Last location gets any remaining amount to ensure exact total
-        last_location = locations[-1]
-        results[last_location].append(remaining_amount.quantize(TWO_PLACES))
-        location_totals[last_location] += remaining_amount
-        total_allocated += remaining_amount
-
-    # Verify totals
+    total_allocated = sum((sum(share, ZERO) for share in shares), ZERO)
     if total_allocated != total_amount:
         raise ValueError(
             f"Split allocation mismatch: {total_allocated} != {total_amount}"
         )
 
-    return results
+    return dict(zip(locations, shares, strict=True))
 
 
 def test_bill_split() -> bool:
@@ -1147,6 +2040,74 @@ def test_bill_split() -> bool:
         return False
 
 
+def _split_bill_documents(
+    original_bill: Any,
+    locations: list[str],
+    split_amounts: dict[str, list[Decimal]],
+    store_refs: dict[str, Any],
+) -> dict[str, Any]:
+    """Build the unsaved per-location bills for one split, keyed by location."""
+    pending_bills: dict[str, Any] = {}
+    for i, location in enumerate(locations, 1):
+        new_bill = Bill()
+
+        # Copy metadata from original
+        new_bill.VendorRef = original_bill.VendorRef
+        new_bill.TxnDate = original_bill.TxnDate
+        new_bill.DueDate = getattr(original_bill, "DueDate", None)
+        new_bill.SalesTermRef = getattr(original_bill, "SalesTermRef", None)
+        new_bill.DepartmentRef = store_refs[location]
+
+        # Generate split bill number
+        new_bill.DocNumber = f"{original_bill.DocNumber}S{i}"
+
+        new_bill.Line = []
+
+        # Create line items using pre-calculated amounts
+        for line_num, (orig_line, split_amount) in enumerate(
+            zip(original_bill.Line, split_amounts[location], strict=False), 1
+        ):
+            new_line = AccountBasedExpenseLine()
+            new_line.AccountBasedExpenseLineDetail = AccountBasedExpenseLineDetail()
+            new_line.AccountBasedExpenseLineDetail.AccountRef = (
+                orig_line.AccountBasedExpenseLineDetail.AccountRef
+            )
+            new_line.LineNum = line_num
+            new_line.Id = line_num
+            new_line.Amount = split_amount
+            new_line.Description = orig_line.Description
+            new_bill.Line.append(new_line)
+
+        # Add split documentation
+        split_note = {
+            "split_info": {
+                "original_doc_number": original_bill.DocNumber,
+                "split_date": datetime.datetime.now().isoformat(),
+                "total_splits": len(locations),
+                "split_locations": locations,
+                "split_amount": str(sum(split_amounts[location])),
+            }
+        }
+        if hasattr(original_bill, "PrivateNote") and original_bill.PrivateNote:
+            split_note["original_note"] = original_bill.PrivateNote
+        new_bill.PrivateNote = json.dumps(split_note, indent=2)
+        pending_bills[location] = new_bill
+    return pending_bills
+
+
+def _void_note(original_bill: Any, split_doc_numbers: list[str]) -> str:
+    void_note = {
+        "void_info": {
+            "reason": "Split into multiple location bills",
+            "void_date": datetime.datetime.now().isoformat(),
+            "split_doc_numbers": split_doc_numbers,
+        }
+    }
+    if hasattr(original_bill, "PrivateNote") and original_bill.PrivateNote:
+        void_note["original_note"] = original_bill.PrivateNote
+    return json.dumps(void_note, indent=2)
+
+
 def split_bill(
     original_bill: Any,
     locations: list[str],
@@ -1177,89 +2138,51 @@ def split_bill(
             raise ValueError(f"Invalid location code: {location}")
 
     # Create new bills first before voiding original
-    new_bills = []
-    split_doc_numbers = []
-    i = 1
+    new_bills: list[Any] = []
 
     try:
-        for location in locations:
-            new_bill = Bill()
-
-            # Copy metadata from original
-            new_bill.VendorRef = original_bill.VendorRef
-            new_bill.TxnDate = original_bill.TxnDate
-            new_bill.DueDate = getattr(original_bill, "DueDate", None)
-            new_bill.SalesTermRef = getattr(original_bill, "SalesTermRef", None)
-            new_bill.DepartmentRef = store_refs[location]
-
-            # Generate split bill number
-            new_bill.DocNumber = f"{original_bill.DocNumber}S{i}"
-            split_doc_numbers.append(new_bill.DocNumber)
-
-            new_bill.Line = []
-
-            # Create line items using pre-calculated amounts
-            for line_num, (orig_line, split_amount) in enumerate(
-                zip(original_bill.Line, split_amounts[location], strict=False), 1
-            ):
-                new_line = AccountBasedExpenseLine()
-                new_line.AccountBasedExpenseLineDetail = AccountBasedExpenseLineDetail()
-                new_line.AccountBasedExpenseLineDetail.AccountRef = (
-                    orig_line.AccountBasedExpenseLineDetail.AccountRef
-                )
-                new_line.LineNum = line_num
-                new_line.Id = line_num
-                new_line.Amount = split_amount
-                new_line.Description = orig_line.Description
-                new_bill.Line.append(new_line)
-
-            # Add split documentation
-            split_note = {
-                "split_info": {
-                    "original_doc_number": original_bill.DocNumber,
-                    "split_date": datetime.datetime.now().isoformat(),
-                    "total_splits": len(locations),
-                    "split_locations": locations,
-                    "split_amount": str(sum(split_amounts[location])),
-                }
-            }
-            if hasattr(original_bill, "PrivateNote") and original_bill.PrivateNote:
-                split_note["original_note"] = original_bill.PrivateNote
-            new_bill.PrivateNote = json.dumps(split_note, indent=2)
+        pending_bills = _split_bill_documents(
+            original_bill, locations, split_amounts, store_refs
+        )
+        split_doc_numbers = [bill.DocNumber for bill in pending_bills.values()]
 
-            try:
-                new_bill.save(qb=CLIENT)
-                new_bills.append(new_bill)
-                logger.info(
-                    "Created split bill",
+        # Create all split bills together; anything that did save is rolled
+        # back below if any location faults
+        result = batch_write(
+            [
+                (location, BatchOperation.CREATE, bill)
+                for location, bill in pending_bills.items()
+            ]
+        )
+        new_bills = [
+            result.saved[location] for location in locations if location in result.saved
+        ]
+        if result.faults:
+            for location, message in result.fault_messages().items():
+                logger.error(
+                    "Failed to save split bill",
                     extra={
-                        "original_doc": original_bill.DocNumber,
-                        "split_doc": new_bill.DocNumber,
+                        "bill": pending_bills[location].to_json(),
                         "location": location,
-                        "amount": str(sum(split_amounts[location])),
+                        "error": message,
                     },
                 )
-            except Exception as e:
-                logger.exception(
-                    "Failed to save split bill",
-                    extra={"bill": new_bill.to_json(), "error": str(e)},
-                )
-                raise
-
-            i += 1
+            raise QuickbooksException(
+                f"Failed to save split bills for {sorted(result.faults)}"
+            )
+        for location, bill in zip(locations, new_bills, strict=True):
+            logger.info(
+                "Created split bill",
+                extra={
+                    "original_doc": original_bill.DocNumber,
+                    "split_doc": bill.DocNumber,
+                    "location": location,
+                    "amount": str(sum(split_amounts[location])),
+                },
+            )
 
         # Now void the original bill
-        void_note = {
-            "void_info": {
-                "reason": "Split into multiple location bills",
-                "void_date": datetime.datetime.now().isoformat(),
-                "split_doc_numbers": split_doc_numbers,
-            }
-        }
-        if hasattr(original_bill, "PrivateNote") and original_bill.PrivateNote:
-            void_note["original_note"] = original_bill.PrivateNote
-
-        original_bill.PrivateNote = json.dumps(void_note, indent=2)
+        original_bill.PrivateNote = _void_note(original_bill, split_doc_numbers)
         original_bill.save(qb=CLIENT)
         original_bill.delete(qb=CLIENT)
 
@@ -1282,21 +2205,151 @@ def split_bill(
                 "error": str(e),
             },
         )
-        # Attempt to void any created bills
-        for bill in new_bills:
-            try:
-                bill.delete(qb=CLIENT)
-            except QuickbooksException as rollback_error:
-                logger.exception(
+        # Attempt to delete any created bills
+        if new_bills:
+            rollback = batch_write(
+                [(bill.DocNumber, BatchOperation.DELETE, bill) for bill in new_bills]
+            )
+            for doc_number, message in rollback.fault_messages().items():
+                logger.error(
                     "Failed to delete split bill during rollback",
-                    extra={
-                        "doc_number": bill.DocNumber,
-                        "rollback_error": str(rollback_error),
-                    },
+                    extra={"doc_number": doc_number, "rollback_error": message},
                 )
         raise
 
 
+@dataclass
+class BillSplitResult:
+    """Outcome of split_bills(), keyed by original DocNumber."""
+
+    split: dict[str, list[str]] = field(default_factory=dict)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def split_bills(
+    doc_numbers: list[str],
+    locations: list[str],
+    split_ratios: dict[str, Decimal] | None = None,
+) -> BillSplitResult:
+    """Split many bills between the same locations in a handful of requests.
+
+    The bills are read with find_by_doc_numbers(), every split is calculated
+    up front, and all split bills are created through shared batch requests.
+    A bill whose splits do not all save has the saved ones deleted and keeps
+    its original. The originals of complete splits are voided (note updated,
+    then deleted) in two more batches; a bill whose original cannot be voided
+    has its splits deleted too.
+
+    Args:
+        doc_numbers: DocNumbers of the bills to split
+        locations: Location codes to split each bill between
+        split_ratios: Optional {location: ratio}; defaults to equal splits
+
+    Returns:
+        BillSplitResult mapping each original to its split DocNumbers or to
+        the reason it failed
+
+    Raises:
+        ValueError: If a location code is not a known store
+    """
+    refresh_session()
+    store_refs = get_store_refs()
+    for location in locations:
+        if location not in store_refs:
+            raise ValueError(f"Invalid location code: {location}")
+
+    result = BillSplitResult()
+    doc_numbers = list(dict.fromkeys(doc_numbers))
+    originals = find_by_doc_numbers(Bill, doc_numbers)
+    operations: list[tuple[str, str, Any]] = []
+    for doc_number in doc_numbers:
+        original_bill = originals.get(doc_number)
+        if original_bill is None:
+            result.failed[doc_number] = "Bill not found"
+            continue
+        line_amounts = [Decimal(line.Amount) for line in original_bill.Line]
+        try:
+            split_amounts = calculate_bill_splits(
+                sum(line_amounts, ZERO), line_amounts, locations, split_ratios
+            )
+        except ValueError as e:
+            result.failed[doc_number] = str(e)
+            continue
+        pending_bills = _split_bill_documents(
+            original_bill, locations, split_amounts, store_refs
+        )
+        operations.extend(
+            (f"{doc_number}/{location}", BatchOperation.CREATE, bill)
+            for location, bill in pending_bills.items()
+        )
+    created = batch_write(operations) if operations else BatchResult()
+    create_faults = created.fault_messages()
+
+    rollback: list[tuple[str, str, Any]] = []
+    voids: list[tuple[str, str, Any]] = []
+    for doc_number in doc_numbers:
+        if doc_number in result.failed:
+            continue
+        keys = [f"{doc_number}/{location}" for location in locations]
+        errors = [create_faults[key] for key in keys if key in create_faults]
+        if errors:
+            result.failed[doc_number] = "; ".join(errors)
+            rollback.extend(
+                (key, BatchOperation.DELETE, created.saved[key])
+                for key in keys
+                if key in created.saved
+            )
+            continue
+        original_bill = originals[doc_number]
+        result.split[doc_number] = [created.saved[key].DocNumber for key in keys]
+        original_bill.PrivateNote = _void_note(original_bill, result.split[doc_number])
+        voids.append(
+            (
+                doc_number,
+                BatchOperation.UPDATE,
+                _sparse_update(original_bill, original_bill, ("PrivateNote",)),
+            )
+        )
+
+    if voids:
+        noted = batch_write(voids)
+        deleted = batch_write(
+            [
+                (doc_number, BatchOperation.DELETE, bill)
+                for doc_number, bill in noted.saved.items()
+            ]
+        )
+        # An original that could not be voided keeps its expense, so its
+        # splits are deleted rather than left to book it twice
+        for doc_number, message in {
+            **noted.fault_messages(),
+            **deleted.fault_messages(),
+        }.items():
+            del result.split[doc_number]
+            result.failed[doc_number] = f"Original not voided: {message}"
+            rollback.extend(
+                (key, BatchOperation.DELETE, created.saved[key])
+                for key in (f"{doc_number}/{location}" for location in locations)
+            )
+    if rollback:
+        for key, message in batch_write(rollback).fault_messages().items():
+            logger.error(
+                "Failed to delete split bill during rollback",
+                extra={"split": key, "rollback_error": message},
+            )
+
+    logger.info(
+        "Split bills",
+        extra={
+            "locations": locations,
+            "split": len(result.split),
+            "failed": result.failed,
+        },
+    )
+    return result
+
+
+@retry_on_auth_failure
 def get_unlinked_sales_receipts(
     start_date: datetime.date, end_date: datetime.date
 ) -> list[dict[str, Any]]:
@@ -1321,60 +2374,52 @@ def get_unlinked_sales_receipts(
             - has_cents: True if amount has non-zero cents (indicates likely
               missing FlexePOS entry - these are actionable via re-run)
     """
-    refresh_session()
+    client = refresh_session()
 
     where_clause = (
         f"TxnDate >= '{start_date.isoformat()}' AND TxnDate <= '{end_date.isoformat()}'"
     )
 
     results: list[dict[str, Any]] = []
-    query_count = SalesReceipt.count(where_clause=where_clause, qb=CLIENT)
-    r_count = 1
 
     logger.info(
         "Querying unlinked sales receipts",
         extra={
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
-            "total_count": query_count,
         },
     )
 
-    while r_count <= query_count:
-        sales_receipts = SalesReceipt.where(
-            where_clause=where_clause,
-            order_by="TxnDate",
-            start_position=r_count,
-            max_results=1000,
-            qb=CLIENT,
+    mirror = synced_mirror(start_date)
+    sales_receipts: Iterable[Any] = (
+        mirror.sales_receipts(start_date, end_date, unlinked_only=True)
+        if mirror
+        else iter_records(
+            SalesReceipt, where_clause, client, record_filter=_is_unlinked_receipt
+        )
+    )
+    for sales_receipt in sales_receipts:
+        amount = Decimal(str(sales_receipt.TotalAmt))
+        # Check if amount has non-zero cents (fractional part)
+        has_cents = amount % 1 != 0
+
+        store_name = (
+            sales_receipt.DepartmentRef.name
+            if sales_receipt.DepartmentRef
+            else "Unknown"
         )
 
-        for sales_receipt in sales_receipts:
-            # Filter: positive amount and no linked transactions
-            if sales_receipt.TotalAmt > 0 and len(sales_receipt.LinkedTxn) == 0:
-                amount = Decimal(str(sales_receipt.TotalAmt))
-                # Check if amount has non-zero cents (fractional part)
-                has_cents = amount % 1 != 0
-
-                store_name = (
-                    sales_receipt.DepartmentRef.name
-                    if sales_receipt.DepartmentRef
-                    else "Unknown"
-                )
-
-                results.append(
-                    {
-                        "id": sales_receipt.Id,
-                        "store": store_name,
-                        "date": sales_receipt.TxnDate,
-                        "amount": str(amount.quantize(TWO_PLACES)),
-                        "doc_number": sales_receipt.DocNumber or "",
-                        "qb_url": f"https://app.qbo.intuit.com/app/salesreceipt?txnId={sales_receipt.Id}",
-                        "has_cents": has_cents,
-                    }
-                )
-
-        r_count += len(sales_receipts)
+        results.append(
+            {
+                "id": sales_receipt.Id,
+                "store": store_name,
+                "date": sales_receipt.TxnDate,
+                "amount": str(amount.quantize(TWO_PLACES)),
+                "doc_number": sales_receipt.DocNumber or "",
+                "qb_url": f"https://app.qbo.intuit.com/app/salesreceipt?txnId={sales_receipt.Id}",
+                "has_cents": has_cents,
+            }
+        )
 
     logger.info(
         "Found unlinked sales receipts",
@@ -0,0 +1,249 @@
+"""
+Client-side request governor for the QuickBooks Online API.
+
+QBO throttles each realm to 500 requests per minute and 10 concurrent
+requests. python-quickbooks sends every request straight through, so
+overlapping handlers (invoice sync, deposit sync, daily sales) surface the
+limits as random HTTP 429 failures. The governor sits under the client's
+HTTP call and provides:
+
+- a token bucket per realm, refilled at QBO_RATE_LIMIT requests per minute
+- a ceiling of QBO_MAX_CONCURRENT requests in flight per realm
+- retries with exponential backoff and full jitter on 429 (honouring
+  Retry-After) and, for requests that are safe to repeat, on 5xx and
+  connection errors
+- per-operation latency and retry counters
+
+GovernedQuickBooks is a drop-in QuickBooks subclass; refresh_session() in
+qb.py creates one, so every caller of the shared client is governed.
+
+Limits are enforced per process. Separate Lambda containers each get their
+own budget, so the defaults leave headroom below QBO's limits.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+import requests
+from quickbooks import QuickBooks
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute per realm; QBO allows 500
+QBO_RATE_LIMIT = int(os.environ.get("QBO_RATE_LIMIT", "400"))
+# Concurrent requests per realm; QBO allows 10
+QBO_MAX_CONCURRENT = int(os.environ.get("QBO_MAX_CONCURRENT", "8"))
+QBO_MAX_RETRIES = int(os.environ.get("QBO_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+TOO_MANY_REQUESTS = 429
+RETRYABLE_SERVER_ERRORS = frozenset({500, 502, 503, 504})
+# Read-only endpoints that are always safe to send twice
+IDEMPOTENT_ENDPOINTS = frozenset({"query", "cdc", "reports"})
+
+
+@dataclass
+class OperationStats:
+    """Latency and retry counters for one kind of QBO request."""
+
+    count: int = 0
+    retries: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+class RequestGovernor:
+    """Rate limit, concurrency cap and retry policy for one QBO realm."""
+
+    def __init__(
+        self,
+        rate_per_minute: int = QBO_RATE_LIMIT,
+        max_concurrent: int = QBO_MAX_CONCURRENT,
+        max_retries: int = QBO_MAX_RETRIES,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(max(1, min(rate_per_minute, max_concurrent * 2)))
+        self.max_retries = max_retries
+        self._sleep = sleep
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._stats: dict[str, OperationStats] = {}
+
+    def _take_token(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate_per_second,
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_second
+            self._sleep(wait)
+
+    def _backoff(self, attempt: int, response: Any = None) -> float:
+        retry_after = getattr(response, "headers", {}).get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        return random.uniform(  # noqa: S311
+            0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)
+        )
+
+    def _record(
+        self, operation: str, seconds: float, retried: bool, failed: bool
+    ) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(operation, OperationStats())
+            stats.count += 1
+            stats.retries += int(retried)
+            stats.errors += int(failed)
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def call(self, operation: str, send: Callable[[], Any], idempotent: bool) -> Any:
+        """Send one request under the rate limit, retrying throttled attempts.
+
+        Args:
+            operation: Label for metrics, e.g. "POST query"
+            send: Performs the HTTP request and returns the response
+            idempotent: Whether 5xx responses and connection errors may be
+                retried (429s are always retried; QBO did not process them)
+
+        Returns:
+            The final HTTP response
+        """
+        attempt = 0
+        while True:
+            self._take_token()
+            started = self._clock()
+            try:
+                with self._slots:
+                    response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(operation, self._clock() - started, False, True)
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(
+                    "QuickBooks connection failed, retrying",
+                    extra={
+                        "operation": operation,
+                        "attempt": attempt + 1,
+                        "delay": delay,
+                    },
+                )
+            else:
+                status = response.status_code
+                retryable = status == TOO_MANY_REQUESTS or (
+                    idempotent and status in RETRYABLE_SERVER_ERRORS
+                )
+                will_retry = retryable and attempt < self.max_retries
+                self._record(
+                    operation, self._clock() - started, will_retry, status >= 400
+                )
+                if not will_retry:
+                    return response
+                delay = self._backoff(attempt, response)
+                logger.warning(
+                    "QuickBooks request throttled, retrying",
+                    extra={
+                        "operation": operation,
+                        "status": status,
+                        "attempt": attempt + 1,
+                        "delay": delay,
+                    },
+                )
+            self._sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict[str, OperationStats]:
+        """Snapshot of per-operation counters."""
+        with self._lock:
+            return {
+                name: OperationStats(**vars(stats))
+                for name, stats in self._stats.items()
+            }
+
+    def log_stats(self) -> None:
+        """Log per-operation request counts, retries and latency."""
+        for operation, stats in sorted(self.stats().items()):
+            logger.info(
+                "QuickBooks request stats",
+                extra={
+                    "operation": operation,
+                    "count": stats.count,
+                    "retries": stats.retries,
+                    "errors": stats.errors,
+                    "mean_ms": round(stats.mean_seconds * 1000),
+                    "max_ms": round(stats.max_seconds * 1000),
+                },
+            )
+
+
+_governors: dict[str, RequestGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def governor_for(realm_id: str) -> RequestGovernor:
+    """Return the shared governor for a QBO company (realm)."""
+    with _governors_lock:
+        if realm_id not in _governors:
+            _governors[realm_id] = RequestGovernor()
+        return _governors[realm_id]
+
+
+def _operation(request_type: str, url: str) -> str:
+    parts = urlparse(url).path.strip("/").split("/")
+    # .../v3/company/<realm>/<endpoint>[/<id>]
+    endpoint = parts[parts.index("company") + 2] if "company" in parts else parts[-1]
+    return f"{request_type} {endpoint}"
+
+
+class GovernedQuickBooks(QuickBooks):
+    """QuickBooks client whose HTTP requests go through a RequestGovernor."""
+
+    def process_request(
+        self,
+        request_type: str,
+        url: str,
+        headers: Any = "",
+        params: Any = "",
+        data: Any = "",
+    ) -> Any:
+        operation = _operation(request_type, url)
+        idempotent = (
+            request_type == "GET"
+            or operation.split()[1] in IDEMPOTENT_ENDPOINTS
+            or bool(params and params.get("requestid"))
+        )
+        return governor_for(str(self.company_id)).call(
+            operation,
+            lambda: super(GovernedQuickBooks, self).process_request(
+                request_type, url, headers=headers, params=params, data=data
+            ),
+            idempotent,
+        )
@@ -0,0 +1,250 @@
+"""
+Local SQLite mirror of QuickBooks Online transactions.
+
+Dashboard queries such as "which sales receipts are unlinked" or "which days
+are missing a daily sales entry" previously rescanned QBO on every request.
+The mirror keeps SalesReceipts, Deposits, Bills and JournalEntries in a local
+SQLite file and keeps them current with QBO Change Data Capture (CDC):
+
+- The first sync for an entity backfills every transaction on or after the
+  requested date through the paged export engine.
+- Later syncs send one CDC request for all entities, asking for changes since
+  the previous sync's watermark, and apply upserts and deletes.
+- CDC only looks back 30 days and returns at most 1000 objects per entity, so
+  an entity whose watermark is older than that, or whose change set was
+  truncated, is backfilled again.
+
+In Lambda the file lives on /tmp and survives for the life of the container,
+so warm invocations cost one CDC call instead of a full scan:
+
+    mirror = TransactionMirror("/tmp/qbo_mirror.sqlite3")
+    mirror.sync(client, since=date(2025, 1, 1))
+    receipts = mirror.sales_receipts(date(2025, 1, 1), date(2025, 1, 31))
+"""
+
+import datetime
+import json
+import logging
+import sqlite3
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+
+from quickbooks.cdc import change_data_capture
+from quickbooks.objects import Bill, Deposit, JournalEntry, SalesReceipt
+
+from qb_export import iter_records
+
+logger = logging.getLogger(__name__)
+
+MIRROR_ENTITIES: tuple[Any, ...] = (SalesReceipt, Deposit, Bill, JournalEntry)
+# QBO CDC only reports changes from the last 30 days
+CDC_MAX_AGE = datetime.timedelta(days=30)
+# QBO CDC returns at most 1000 objects per entity; a full page may be truncated
+CDC_MAX_RESULTS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS txn (
+    entity TEXT NOT NULL,
+    id TEXT NOT NULL,
+    txn_date TEXT,
+    store TEXT,
+    total_amt TEXT,
+    linked INTEGER NOT NULL DEFAULT 0,
+    doc_number TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (entity, id)
+);
+CREATE INDEX IF NOT EXISTS txn_by_date ON txn (entity, txn_date);
+CREATE TABLE IF NOT EXISTS watermark (
+    entity TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL,
+    covered_from TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class Watermark:
+    """Sync state for one entity.
+
+    Attributes:
+        synced_at: UTC time the last successful sync started
+        covered_from: Earliest TxnDate the mirror holds for the entity
+    """
+
+    synced_at: datetime.datetime
+    covered_from: datetime.date
+
+
+class TransactionMirror:
+    """SQLite-backed copy of QBO transactions kept current with CDC."""
+
+    def __init__(self, path: str, entities: tuple[Any, ...] = MIRROR_ENTITIES):
+        self.path = path
+        self.entities = entities
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def watermark(self, entity: Any) -> Watermark | None:
+        row = self._conn.execute(
+            "SELECT synced_at, covered_from FROM watermark WHERE entity = ?",
+            (entity.qbo_object_name,),
+        ).fetchone()
+        if row is None:
+            return None
+        return Watermark(
+            datetime.datetime.fromisoformat(row[0]),
+            datetime.date.fromisoformat(row[1]),
+        )
+
+    def sync(self, client: Any, since: datetime.date) -> dict[str, int]:
+        """Bring the mirror up to date for transactions on or after ``since``.
+
+        Args:
+            client: QuickBooks client
+            since: Earliest TxnDate callers will query
+
+        Returns:
+            Dict mapping entity name to the number of rows written or deleted
+        """
+        started = datetime.datetime.now(datetime.UTC)
+        changed: dict[str, int] = {}
+        backfill: list[tuple[Any, datetime.date]] = []
+        incremental: list[tuple[Any, Watermark]] = []
+
+        for entity in self.entities:
+            mark = self.watermark(entity)
+            if mark is None:
+                backfill.append((entity, since))
+            elif mark.covered_from > since or started - mark.synced_at > CDC_MAX_AGE:
+                backfill.append((entity, min(since, mark.covered_from)))
+            else:
+                incremental.append((entity, mark))
+
+        if incremental:
+            changed_since = min(mark.synced_at for _entity, mark in incremental)
+            response = change_data_capture(
+                [entity for entity, _mark in incremental],
+                changed_since.isoformat(timespec="seconds"),
+                qb=client,
+            )
+            for entity, mark in incremental:
+                objects = list(getattr(response, entity.qbo_object_name, None) or [])
+                if len(objects) >= CDC_MAX_RESULTS:
+                    backfill.append((entity, mark.covered_from))
+                    continue
+                with self._conn:
+                    for obj in objects:
+                        if getattr(obj, "status", None) == "Deleted":
+                            self._delete(entity, obj.Id)
+                        else:
+                            self._upsert(entity, obj)
+                    self._set_watermark(entity, started, mark.covered_from)
+                changed[entity.qbo_object_name] = len(objects)
+
+        for entity, covered_from in backfill:
+            changed[entity.qbo_object_name] = self._backfill(
+                entity, client, covered_from, started
+            )
+
+        logger.info("Synced QuickBooks mirror", extra={"changed": changed})
+        return changed
+
+    def _backfill(
+        self,
+        entity: Any,
+        client: Any,
+        covered_from: datetime.date,
+        started: datetime.datetime,
+    ) -> int:
+        count = 0
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM txn WHERE entity = ? AND txn_date >= ?",
+                (entity.qbo_object_name, covered_from.isoformat()),
+            )
+            for obj in iter_records(
+                entity, f"TxnDate >= '{covered_from.isoformat()}'", client
+            ):
+                self._upsert(entity, obj)
+                count += 1
+            self._set_watermark(entity, started, covered_from)
+        return count
+
+    def _set_watermark(
+        self, entity: Any, synced_at: datetime.datetime, covered_from: datetime.date
+    ) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO watermark VALUES (?, ?, ?)",
+            (entity.qbo_object_name, synced_at.isoformat(), covered_from.isoformat()),
+        )
+
+    def _delete(self, entity: Any, txn_id: str) -> None:
+        self._conn.execute(
+            "DELETE FROM txn WHERE entity = ? AND id = ?",
+            (entity.qbo_object_name, txn_id),
+        )
+
+    def _upsert(self, entity: Any, obj: Any) -> None:
+        department = getattr(obj, "DepartmentRef", None)
+        total = getattr(obj, "TotalAmt", None)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO txn VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entity.qbo_object_name,
+                obj.Id,
+                obj.TxnDate,
+                department.name if department else None,
+                str(total) if total is not None else None,
+                1 if getattr(obj, "LinkedTxn", None) else 0,
+                getattr(obj, "DocNumber", None),
+                json.dumps(obj, default=obj.json_filter(), separators=(",", ":")),
+            ),
+        )
+
+    def sales_receipts(
+        self,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        unlinked_only: bool = False,
+    ) -> list[Any]:
+        """SalesReceipts with TxnDate in [start_date, end_date], in date order.
+
+        Args:
+            start_date: First TxnDate (inclusive)
+            end_date: Last TxnDate (inclusive)
+            unlinked_only: Only positive receipts with no linked transactions
+        """
+        query = (
+            "SELECT data, total_amt FROM txn WHERE entity = 'SalesReceipt'"
+            " AND txn_date >= ? AND txn_date <= ?"
+        )
+        if unlinked_only:
+            query += " AND linked = 0"
+        rows = self._conn.execute(
+            query + " ORDER BY txn_date, id",
+            (start_date.isoformat(), end_date.isoformat()),
+        )
+        return [
+            SalesReceipt.from_json(json.loads(data))
+            for data, total in rows
+            if not unlinked_only or Decimal(total or "0") > 0
+        ]
+
+    def sales_receipt_stores(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> dict[str, set[str]]:
+        """Map each TxnDate (ISO string) to the stores that have a SalesReceipt."""
+        stores: dict[str, set[str]] = defaultdict(set)
+        for txn_date, store in self._conn.execute(
+            "SELECT txn_date, store FROM txn WHERE entity = 'SalesReceipt'"
+            " AND txn_date >= ? AND txn_date <= ? AND store IS NOT NULL",
+            (start_date.isoformat(), end_date.isoformat()),
+        ):
+            stores[txn_date].add(store)
+        return stores
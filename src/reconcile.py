@@ -0,0 +1,124 @@
+"""
+Indexed matching of two sets of ledger entries.
+
+Reconciliation jobs (unlinked sales receipts against deposits, card
+processor statements against bank lines) all ask the same question: which
+entry on one side has an entry on the other side with the same amount, for
+the same store, within a few days? Comparing every pair grows
+quadratically with history, so match_entries() indexes the right-hand side
+by (amount, store) with each bucket sorted by date, and resolves every
+left-hand entry with a binary search over its date window:
+
+    result = match_entries(receipts, deposits, date_tolerance_days=3)
+    for receipt, deposit in result.matched:
+        ...
+
+Each left entry ends up in exactly one of ``matched``, ``ambiguous`` or
+``unmatched_left``. A left entry is matched to the single unused candidate
+closest in date; if two or more candidates are equally close it is reported
+as ambiguous with those candidates and nothing is consumed.
+"""
+
+import datetime
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any
+
+from decimal_utils import to_currency
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    """One side of a potential match.
+
+    Attributes:
+        key: Identifier reported back to the caller (e.g. QBO Id)
+        amount: Amount to match on; quantized to cents when indexed
+        date: Transaction date; leave None on both sides to match on amount
+            and store only
+        store: Store/department to match within, or None
+        source: The original object, passed through untouched
+    """
+
+    key: Any
+    amount: Decimal
+    date: datetime.date | None = None
+    store: str | None = None
+    source: Any = field(default=None, compare=False, hash=False)
+
+
+@dataclass
+class MatchResult:
+    """Outcome of match_entries()."""
+
+    matched: list[tuple[LedgerEntry, LedgerEntry]] = field(default_factory=list)
+    ambiguous: list[tuple[LedgerEntry, list[LedgerEntry]]] = field(default_factory=list)
+    unmatched_left: list[LedgerEntry] = field(default_factory=list)
+    unmatched_right: list[LedgerEntry] = field(default_factory=list)
+
+
+def _ordinal(entry: LedgerEntry) -> int:
+    return entry.date.toordinal() if entry.date else 0
+
+
+def match_entries(
+    left: list[LedgerEntry],
+    right: list[LedgerEntry],
+    date_tolerance_days: int = 0,
+    match_store: bool = True,
+) -> MatchResult:
+    """Match left entries to right entries by amount, store and date window.
+
+    Args:
+        left: Entries to find partners for (e.g. unlinked sales receipts)
+        right: Candidate partners (e.g. deposits)
+        date_tolerance_days: Maximum days between partners' dates
+        match_store: Require equal stores; disable for single-account sources
+
+    Returns:
+        MatchResult; right entries offered to an ambiguous left entry are not
+        reported as unmatched
+    """
+    index: dict[tuple[Decimal, str | None], list[tuple[int, int]]] = defaultdict(list)
+    for position, entry in enumerate(right):
+        bucket_key = (to_currency(entry.amount), entry.store if match_store else None)
+        index[bucket_key].append((_ordinal(entry), position))
+    for bucket in index.values():
+        bucket.sort()
+
+    used: set[int] = set()
+    offered: set[int] = set()
+    result = MatchResult()
+    for entry in left:
+        bucket = index.get(
+            (to_currency(entry.amount), entry.store if match_store else None), []
+        )
+        day = _ordinal(entry)
+        tolerance = date_tolerance_days if entry.date else 0
+        lo = bisect_left(bucket, (day - tolerance, -1))
+        hi = bisect_right(bucket, (day + tolerance, len(right)))
+        candidates = [
+            (abs(ordinal - day), position)
+            for ordinal, position in bucket[lo:hi]
+            if position not in used
+        ]
+        if not candidates:
+            result.unmatched_left.append(entry)
+            continue
+        closest = min(distance for distance, _position in candidates)
+        best = [position for distance, position in candidates if distance == closest]
+        if len(best) == 1:
+            used.add(best[0])
+            result.matched.append((entry, right[best[0]]))
+        else:
+            offered.update(best)
+            result.ambiguous.append((entry, [right[position] for position in best]))
+
+    result.unmatched_right = [
+        entry
+        for position, entry in enumerate(right)
+        if position not in used and position not in offered
+    ]
+    return result
@@ -0,0 +1,132 @@
+"""
+Parse-once model of a scraped report page.
+
+Flexepos report pages are large (a Daily Sales page is several hundred KB)
+and the scrapers look up a dozen tables and labelled values on each one.
+Parsing with BeautifulSoup and walking the tree for every lookup dominated
+the CPU time of a scrape. ReportPage parses the HTML once with lxml and
+answers lookups from indexes built on first use:
+
+    page = ReportPage(driver.page_source)
+    rows = page.table_rows("TotalSales")
+    audit = page.label_text("Register Audit")
+
+Cell and label texts match what BeautifulSoup's ``.text`` gave for the same
+markup, so parsers keep their column positions and string handling.
+"""
+
+import lxml.html
+from lxml import etree
+from lxml.html import HtmlElement
+
+_SECTION_HEADERS = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' section-header ')]"
+)
+
+
+def rendered_text(element: HtmlElement) -> str:
+    """Approximate Selenium's element.text: one line per table row."""
+    rows = list(element.iter("tr"))
+    if not rows:
+        return " ".join(element.text_content().split())
+    lines = [
+        " ".join(" ".join(cell.text_content().split()) for cell in row.iter("th", "td"))
+        for row in rows
+    ]
+    return "\n".join(line for line in lines if line)
+
+
+class ReportPage:
+    """A page parsed once, with id, table and label indexes."""
+
+    def __init__(self, html: str) -> None:
+        try:
+            self.root: HtmlElement = lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            self.root = lxml.html.document_fromstring(html.encode("utf-8"))
+        except etree.ParserError:
+            # Empty response body
+            self.root = lxml.html.document_fromstring("<html></html>")
+        self._ids: dict[str, HtmlElement] | None = None
+        self._labels: list[str] | None = None
+        self._rows: dict[tuple[str, str], list[list[str]]] = {}
+
+    def find(self, element_id: str) -> HtmlElement | None:
+        """Element by id."""
+        if self._ids is None:
+            self._ids = {}
+            for element in self.root.iterdescendants():
+                element_key = element.get("id")
+                if element_key is not None:
+                    self._ids.setdefault(element_key, element)
+        return self._ids.get(element_id)
+
+    def has(self, element_id: str) -> bool:
+        return self.find(element_id) is not None
+
+    def text(self, element_id: str) -> str | None:
+        """Rendered text of an element, or None if it is not on the page."""
+        element = self.find(element_id)
+        return rendered_text(element) if element is not None else None
+
+    def table(self, table_id: str) -> HtmlElement | None:
+        element = self.find(table_id)
+        return element if element is not None and element.tag == "table" else None
+
+    def table_rows(self, table_id: str, cell: str = "td") -> list[list[str]] | None:
+        """Stripped cell texts for every row of a table.
+
+        Rows without ``cell`` elements (e.g. header rows when reading ``td``)
+        come back as empty lists so positions match the table's ``tr``
+        elements. None if the page has no such table.
+        """
+        key = (table_id, cell)
+        if key not in self._rows:
+            table = self.table(table_id)
+            if table is None:
+                return None
+            self._rows[key] = _rows(table, cell)
+        return self._rows[key]
+
+    def table_rows_by_class(self, css_class: str) -> list[list[str]] | None:
+        """table_rows() for the first table with ``css_class``."""
+        key = (f".{css_class}", "td")
+        if key not in self._rows:
+            tables = self.root.find_class(css_class)
+            table = next((t for t in tables if t.tag == "table"), None)
+            if table is None:
+                return None
+            self._rows[key] = _rows(table, "td")
+        return self._rows[key]
+
+    def row_texts(self, table_id: str) -> list[str] | None:
+        """Raw text of every row of a table, whitespace untouched."""
+        table = self.table(table_id)
+        if table is None:
+            return None
+        return [row.text_content() for row in table.iter("tr")]
+
+    def label_text(self, label: str) -> str | None:
+        """Full text of the first section header containing ``label``.
+
+        Flexepos renders single values as ``<div class="section-header">``
+        elements such as "Gift Cards Sold: $0.00"; their generated ids
+        change between releases, so they are found by label instead.
+        """
+        if self._labels is None:
+            self._labels = [
+                header.text_content().strip()
+                for header in self.root.xpath(_SECTION_HEADERS)
+            ]
+        for header_text in self._labels:
+            if label in header_text:
+                return header_text
+        return None
+
+
+def _rows(table: HtmlElement, cell: str) -> list[list[str]]:
+    return [
+        [element.text_content().strip() for element in row.iter(cell)]
+        for row in table.iter("tr")
+    ]
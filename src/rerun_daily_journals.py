@@ -7,6 +7,7 @@ data from FlexePOS for missing or no-data entries, then uploads to Google Drive.
 Usage:
     PYTHONPATH=src python src/rerun_daily_journals.py --audit-file journal_audit_2025.json
     PYTHONPATH=src python src/rerun_daily_journals.py --date 2025-01-27 --store 20407
+    PYTHONPATH=src python src/rerun_daily_journals.py --date 2025-01-27 --store 20407 --refresh
 """
 
 import argparse
@@ -33,6 +34,7 @@ def rerun_daily_journal(
     flexepos: Flexepos,
     gdrive: WMCGdrive,
     dry_run: bool = False,
+    refresh: bool = False,
 ) -> dict[str, bool]:
     """Re-run daily journal fetch for a specific date and stores.
 
@@ -42,6 +44,7 @@ def rerun_daily_journal(
         flexepos: Initialized Flexepos instance.
         gdrive: Initialized WMCGdrive instance.
         dry_run: If True, don't actually upload to Google Drive.
+        refresh: If True, ignore cached journals and fetch them again.
 
     Returns:
         Dictionary mapping store IDs to success status.
@@ -52,7 +55,7 @@ def rerun_daily_journal(
     logger.info(f"Fetching daily journal for {target_date} stores: {stores}")
 
     try:
-        journal_data = flexepos.get_daily_journal(stores, date_str)
+        journal_data = flexepos.get_daily_journal(stores, date_str, refresh)
 
         for store in stores:
             if store not in journal_data:
@@ -136,6 +139,11 @@ def main() -> int:
         action="store_true",
         help="Don't upload to Google Drive, just show what would be done",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Fetch from FlexePOS even if the journal is in the scrape cache",
+    )
     parser.add_argument(
         "--delay",
         type=float,
@@ -185,24 +193,26 @@ def main() -> int:
     total_success = 0
     total_failed = 0
 
-    for i, (target_date, stores) in enumerate(tasks):
-        if i > 0:
-            logger.info(f"Waiting {args.delay} seconds before next fetch...")
-            sleep(args.delay)
-
-        results = rerun_daily_journal(
-            target_date=target_date,
-            stores=stores,
-            flexepos=flexepos,
-            gdrive=gdrive,
-            dry_run=args.dry_run,
-        )
-
-        for success in results.values():
-            if success:
-                total_success += 1
-            else:
-                total_failed += 1
+    with flexepos:
+        for i, (target_date, stores) in enumerate(tasks):
+            if i > 0:
+                logger.info(f"Waiting {args.delay} seconds before next fetch...")
+                sleep(args.delay)
+
+            results = rerun_daily_journal(
+                target_date=target_date,
+                stores=stores,
+                flexepos=flexepos,
+                gdrive=gdrive,
+                dry_run=args.dry_run,
+                refresh=args.refresh,
+            )
+
+            for success in results.values():
+                if success:
+                    total_success += 1
+                else:
+                    total_failed += 1
 
     # Print summary
     print("\nRerun complete:")
@@ -0,0 +1,237 @@
+"""
+Durable cache of scraped Flexepos report results.
+
+A daily sales scrape takes a minute of browser time, and the same store and
+date gets scraped again by retries, missing_sales backfills and manual
+reruns after a QuickBooks failure. ScrapeCache keeps each successful result
+as JSON keyed by report, parser version, date and store, so a repeat
+request is a single object read:
+
+    cache = default_cache(PARSER_VERSION)
+    sales = cache.fetch(
+        "daily_sales", store, tx_date, lambda: scrape(store, tx_date)
+    )
+
+Objects live under ``<report>/v<version>/<YYYY-MM-DD>/<store>.json``. The
+version is flexepos.PARSER_VERSION, so changing a parser and bumping it
+starts a fresh cache without deleting anything. Use invalidate() to drop
+entries explicitly, e.g. before re-scraping a day whose source data was
+corrected.
+
+Backends:
+- S3ScrapeCache: SCRAPE_CACHE_BUCKET (and optional SCRAPE_CACHE_PREFIX)
+- LocalScrapeCache: SCRAPE_CACHE_DIR, for local runs and tests
+
+Cache failures are logged and treated as misses; they never fail a scrape.
+"""
+
+import datetime
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+DAILY_SALES = "daily_sales"
+DAILY_JOURNAL = "daily_journal"
+GIFT_CARD_ACH = "gift_card_ach"
+
+
+class ScrapeCache(ABC):
+    """Report results keyed by (report, store, date, parser version).
+
+    Subclasses provide raw object storage; keys are "/"-separated paths.
+    """
+
+    def __init__(self, version: int) -> None:
+        self.version = version
+
+    @abstractmethod
+    def _read(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    def _write(self, key: str, body: bytes) -> None: ...
+
+    @abstractmethod
+    def _delete(self, keys: list[str]) -> None: ...
+
+    @abstractmethod
+    def _keys(self, prefix: str) -> Iterator[str]: ...
+
+    def _prefix(self, report: str) -> str:
+        return f"{report}/v{self.version}/"
+
+    def _key(self, report: str, store: str, tx_date: datetime.date) -> str:
+        return f"{self._prefix(report)}{tx_date.isoformat()}/{store}.json"
+
+    def get(self, report: str, store: str, tx_date: datetime.date) -> Any | None:
+        """Cached result, or None on a miss."""
+        key = self._key(report, store, tx_date)
+        try:
+            body = self._read(key)
+            if body is None:
+                return None
+            value = json.loads(body)
+        except (OSError, ValueError, BotoCoreError, ClientError) as e:
+            logger.warning(
+                "scrape cache read failed", extra={"key": key, "error": str(e)}
+            )
+            return None
+        logger.info("scrape cache hit", extra={"key": key})
+        return value
+
+    def put(self, report: str, store: str, tx_date: datetime.date, value: Any) -> None:
+        key = self._key(report, store, tx_date)
+        try:
+            self._write(key, json.dumps(value, sort_keys=True).encode("utf-8"))
+        except (OSError, BotoCoreError, ClientError) as e:
+            logger.warning(
+                "scrape cache write failed", extra={"key": key, "error": str(e)}
+            )
+
+    def fetch(
+        self,
+        report: str,
+        store: str,
+        tx_date: datetime.date,
+        scrape: Callable[[], Any],
+        keep: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """Cached result, or run ``scrape`` and cache it if ``keep`` says so."""
+        value = self.get(report, store, tx_date)
+        if value is not None:
+            return value
+        value = scrape()
+        if keep(value):
+            self.put(report, store, tx_date, value)
+        return value
+
+    def invalidate(
+        self,
+        report: str,
+        store: str | None = None,
+        tx_date: datetime.date | None = None,
+    ) -> int:
+        """Delete cached results for a report, optionally one store and/or date.
+
+        Returns:
+            Number of entries deleted, or 0 if the backend could not be reached
+        """
+        prefix = self._prefix(report)
+        if tx_date is not None:
+            prefix += f"{tx_date.isoformat()}/"
+        try:
+            keys = [
+                key
+                for key in self._keys(prefix)
+                if store is None or key.endswith(f"/{store}.json")
+            ]
+            if keys:
+                self._delete(keys)
+        except (OSError, BotoCoreError, ClientError) as e:
+            logger.warning(
+                "scrape cache invalidate failed",
+                extra={"prefix": prefix, "error": str(e)},
+            )
+            return 0
+        logger.info(
+            "scrape cache invalidated",
+            extra={"prefix": prefix, "store": store, "deleted": len(keys)},
+        )
+        return len(keys)
+
+
+class LocalScrapeCache(ScrapeCache):
+    """Scrape cache in a local directory."""
+
+    def __init__(self, directory: str | Path, version: int) -> None:
+        super().__init__(version)
+        self.directory = Path(directory)
+
+    def _read(self, key: str) -> bytes | None:
+        path = self.directory / key
+        return path.read_bytes() if path.exists() else None
+
+    def _write(self, key: str, body: bytes) -> None:
+        path = self.directory / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+
+    def _delete(self, keys: list[str]) -> None:
+        for key in keys:
+            (self.directory / key).unlink(missing_ok=True)
+
+    def _keys(self, prefix: str) -> Iterator[str]:
+        root = self.directory / prefix
+        if root.is_dir():
+            for path in sorted(root.rglob("*.json")):
+                yield path.relative_to(self.directory).as_posix()
+
+
+class S3ScrapeCache(ScrapeCache):
+    """Scrape cache in an S3 bucket."""
+
+    def __init__(
+        self, bucket: str, version: int, prefix: str = "scrape-cache/"
+    ) -> None:
+        super().__init__(version)
+        self.bucket = bucket
+        self.prefix = prefix
+        self._s3 = boto3.client("s3")
+
+    def _read(self, key: str) -> bytes | None:
+        try:
+            response = self._s3.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        body: bytes = response["Body"].read()
+        return body
+
+    def _write(self, key: str, body: bytes) -> None:
+        self._s3.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=body,
+            ContentType="application/json",
+        )
+
+    def _delete(self, keys: list[str]) -> None:
+        # DeleteObjects takes at most 1000 keys per call
+        for start in range(0, len(keys), 1000):
+            self._s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [
+                        {"Key": self.prefix + key} for key in keys[start : start + 1000]
+                    ],
+                    "Quiet": True,
+                },
+            )
+
+    def _keys(self, prefix: str) -> Iterator[str]:
+        paginator = self._s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for item in page.get("Contents", []):
+                yield item["Key"][len(self.prefix) :]
+
+
+def default_cache(version: int) -> ScrapeCache | None:
+    """The cache configured by environment, or None when caching is off."""
+    bucket = os.environ.get("SCRAPE_CACHE_BUCKET")
+    if bucket:
+        return S3ScrapeCache(
+            bucket, version, os.environ.get("SCRAPE_CACHE_PREFIX", "scrape-cache/")
+        )
+    directory = os.environ.get("SCRAPE_CACHE_DIR")
+    if directory:
+        return LocalScrapeCache(directory, version)
+    return None
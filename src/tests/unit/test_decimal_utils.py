@@ -4,14 +4,46 @@ Unit tests for decimal_utils module.
 Tests cover:
 - TWO_PLACES constant behavior
 - to_currency() function with various input types
+- parse_money() parsing of scraped currency text
 - FinancialJsonEncoder serialization
 - Edge cases: negative amounts, large amounts, zero
 """
 
 import json
+import locale
+import logging
+import timeit
+from collections.abc import Iterator
 from decimal import Decimal
 
-from decimal_utils import TWO_PLACES, ZERO, FinancialJsonEncoder, to_currency
+import pytest
+
+from decimal_utils import (
+    TWO_PLACES,
+    ZERO,
+    FinancialJsonEncoder,
+    allocate,
+    parse_money,
+    to_currency,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def en_us_numeric() -> Iterator[None]:
+    """Run under the en_US numeric locale the old atof path relied on."""
+    previous = locale.setlocale(locale.LC_NUMERIC)
+    try:
+        locale.setlocale(locale.LC_NUMERIC, "en_US.UTF-8")
+    except locale.Error:
+        pytest.skip("en_US.UTF-8 locale is not installed")
+    yield
+    locale.setlocale(locale.LC_NUMERIC, previous)
+
+
+def _atof_money(text: str) -> Decimal:
+    return Decimal(locale.atof(text.strip("$"))).quantize(TWO_PLACES)
 
 
 class TestTwoPlaces:
@@ -121,6 +153,126 @@ class TestToCurrency:
         assert result == Decimal("0.30")
 
 
+class TestParseMoney:
+    """Tests for parse_money() function."""
+
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("$1,234.56", Decimal("1234.56")),
+            ("1234.56", Decimal("1234.56")),
+            ("  $12.00 ", Decimal("12.00")),
+            ("(12.00)", Decimal("-12.00")),
+            ("($1,000.50)", Decimal("-1000.50")),
+            ("12.00-", Decimal("-12.00")),
+            ("-$5", Decimal("-5.00")),
+            ("0.005", Decimal("0.01")),
+        ],
+    )
+    def test_parses_currency_text(self, text: str, expected: Decimal) -> None:
+        """Currency formats seen in FlexePOS and CrunchTime exports parse exactly."""
+        assert parse_money(text) == expected
+
+    @pytest.mark.parametrize("text", ["", "   ", "-", "$", None])
+    def test_blank_is_zero(self, text: str | None) -> None:
+        """Blank cells parse as zero rather than raising."""
+        assert parse_money(text) == ZERO
+
+    def test_numeric_input(self) -> None:
+        """Non-string values go through to_currency."""
+        assert parse_money(Decimal("1.005")) == Decimal("1.01")
+        assert parse_money(3) == Decimal("3.00")
+
+    @pytest.mark.parametrize("text", ["abc", "12.3.4", "NaN", "inf"])
+    def test_invalid_raises_value_error(self, text: str) -> None:
+        """Non-numeric text raises ValueError like locale.atof did."""
+        with pytest.raises(ValueError, match="Not a currency amount"):
+            parse_money(text)
+
+    def test_no_float_round_trip(self) -> None:
+        """Amounts are exact, unlike Decimal(atof(...))."""
+        assert parse_money("0.10") + parse_money("0.20") == Decimal("0.30")
+
+    def test_matches_locale_atof(self) -> None:
+        """parse_money agrees with the atof path on plain amounts."""
+        values = ["$1234.56", "12.00", "0.99", "$0.00", "-12.50", "1234.5"]
+
+        assert [parse_money(v) for v in values] == [_atof_money(v) for v in values]
+
+    @pytest.mark.usefixtures("en_us_numeric")
+    def test_matches_locale_atof_with_grouping(self) -> None:
+        """Thousands separators parse as en_US atof read them."""
+        values = ["$1,234.56", "1,234,567.89", "-1,000.00", "12,345"]
+
+        assert [parse_money(v) for v in values] == [_atof_money(v) for v in values]
+
+    def test_slow_benchmark_against_locale_atof(self) -> None:
+        """Log parse_money and atof times for the same 1000 values.
+
+        Timings vary too much on shared runners to assert on; run with
+        ``-m slow --log-cli-level=INFO`` to see them.
+        """
+        values = ["$1234.56", "12.00", "0.99", "$0.00"] * 250
+
+        def atof_path() -> list[Decimal]:
+            return [_atof_money(v) for v in values]
+
+        def parse_money_path() -> list[Decimal]:
+            return [parse_money(v) for v in values]
+
+        atof_seconds = min(timeit.repeat(atof_path, number=20, repeat=3))
+        parse_seconds = min(timeit.repeat(parse_money_path, number=20, repeat=3))
+        logger.info(
+            "atof: %.2fms, parse_money: %.2fms per 1000 values",
+            atof_seconds * 1000 / 20,
+            parse_seconds * 1000 / 20,
+        )
+
+
+class TestAllocate:
+    """Tests for allocate() largest-remainder splitting."""
+
+    def test_weighted_split_is_exact(self) -> None:
+        """Weighted shares are exact when the amount divides evenly."""
+        shares = allocate(
+            [Decimal("100.00")], [Decimal("0.5"), Decimal("0.3"), Decimal("0.2")]
+        )
+        assert shares == [[Decimal("50.00")], [Decimal("30.00")], [Decimal("20.00")]]
+
+    def test_lines_and_share_totals_stay_within_a_cent(self) -> None:
+        """Every line sums exactly and pennies do not pile up on one share."""
+        lines = [Decimal("0.10")] * 30 + [Decimal("-1.01"), Decimal("33.33")]
+        weights = [Decimal(1), Decimal(2), Decimal(4)]
+
+        shares = allocate(lines, weights)
+
+        for position, line in enumerate(lines):
+            assert sum(share[position] for share in shares) == line
+        total = sum(lines)
+        for share, weight in zip(shares, weights, strict=True):
+            exact = total * weight / sum(weights)
+            assert abs(sum(share) - exact) < Decimal("0.01")
+            assert all(amount.as_tuple().exponent == -2 for amount in share)
+
+    def test_shares_keep_the_sign_of_their_line(self) -> None:
+        """Running-total rounding never gives a share the opposite sign."""
+        lines = [Decimal("2.68"), Decimal("0.01"), ZERO, Decimal("-0.02")]
+
+        shares = allocate(lines, [Decimal(w) for w in (8, 22, 29, 30, 4)])
+
+        for position, line in enumerate(lines):
+            column = [share[position] for share in shares]
+            assert sum(column) == line
+            assert all(amount * line >= 0 for amount in column)
+            assert line or not any(column)
+
+    def test_invalid_weights(self) -> None:
+        """Empty, negative or all-zero weights are rejected."""
+        for weights in ([], [Decimal(-1), Decimal(2)], [ZERO, ZERO]):
+            with pytest.raises(ValueError):
+                allocate([Decimal("1.00")], weights)
+
+
 class TestFinancialJsonEncoder:
     """Tests for FinancialJsonEncoder."""
 
@@ -0,0 +1,128 @@
+import unittest
+from typing import Any
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs
+
+import requests_mock
+
+BASE = "https://fms.flexepos.com/FlexeposWeb/"
+VIEW_STATE = '<input type="hidden" name="javax.faces.ViewState" value="j_id{}"/>'
+
+LOGIN_PAGE = f"""
+<form id="login" action="/FlexeposWeb/login.seam" method="post">
+  <input type="hidden" name="login" value="login"/>
+  <input id="login:username" name="login:username" type="text"/>
+  <input id="login:password" name="login:password" type="password"/>
+  <input type="submit" name="login:submit" value="Login"/>
+  {VIEW_STATE.format(1)}
+</form>
+"""
+
+HOME_PAGE = f"""
+<form id="menu" action="/FlexeposWeb/home.seam" method="post">
+  <input type="hidden" name="menu" value="menu"/>
+  <a id="menu:2:j_id24:1:j_id25" href="#">Online Orders</a>
+  {VIEW_STATE.format(2)}
+</form>
+"""
+
+REPORT_PAGE = """
+<form id="parameters" action="/FlexeposWeb/online.seam" method="post">
+  <input type="hidden" name="parameters" value="parameters"/>
+  <input id="parameters:store" name="parameters:store" type="text" value=""/>
+  <input id="parameters:startDateCalendarInputDate"
+         name="parameters:startDateCalendarInputDate" type="text"/>
+  <input id="parameters:endDateCalendarInputDate"
+         name="parameters:endDateCalendarInputDate" type="text"/>
+  <input name="parameters:detail" type="checkbox" value="true"/>
+  <select name="parameters:format">
+    <option value="html">HTML</option>
+    <option value="pdf" selected="selected">PDF</option>
+  </select>
+  <input id="parameters:submit" name="parameters:submit" type="submit" value="Go"/>
+  {view_state}
+</form>
+{table}
+"""
+
+ONLINE_ORDERS = """
+<table id="onlineOrdersList">
+  <tr><th>Store</th></tr>
+  <tr><td>{store}</td><td>100.00</td><td>10.00</td><td>110.00</td>
+      <td>1.00</td><td>0.50</td><td>2.00</td><td>3.50</td></tr>
+</table>
+"""
+
+
+def _report(request: Any, _context: Any) -> str:
+    form = parse_qs(request.text)
+    store = form.get("parameters:store", [""])[0]
+    table = ONLINE_ORDERS.format(store=store) if store != "20400" else ""
+    return REPORT_PAGE.format(view_state=VIEW_STATE.format(3), table=table)
+
+
+@patch("flexepos_http.Flexepos")
+@patch("flexepos_http.SSMParameterStore")
+class TestFlexeposHttp(unittest.TestCase):
+    def _mock_site(self, m: requests_mock.Mocker, menu_response: str) -> None:
+        from flexepos import FLEXEPOS_HOME_URL, FLEXEPOS_LOGIN_URL
+
+        m.get(FLEXEPOS_LOGIN_URL, text="")
+        m.get(BASE, text=LOGIN_PAGE)
+        m.post(BASE + "login.seam", text=HOME_PAGE)
+        m.get(FLEXEPOS_HOME_URL, text=HOME_PAGE)
+        m.post(BASE + "home.seam", text=menu_response)
+        m.post(BASE + "online.seam", text=_report)
+
+    def test_online_payments_posted_as_forms(
+        self, _mock_ssm: MagicMock, mock_browser: MagicMock
+    ) -> None:
+        from flexepos_http import FlexeposHttp
+
+        with requests_mock.Mocker() as m:
+            self._mock_site(
+                m, REPORT_PAGE.format(view_state=VIEW_STATE.format(3), table="")
+            )
+            with FlexeposHttp() as dj:
+                payments = dj.get_online_payments(["20358", "20400"], 2025, 3)
+            posts = [parse_qs(r.text) for r in m.request_history if r.method == "POST"]
+
+        self.assertEqual(list(payments), ["20358"])
+        self.assertEqual(payments["20358"]["Total"], "110.00")
+        self.assertEqual(payments["20358"]["Total Fees"], "3.50")
+        mock_browser.assert_not_called()
+
+        login, menu, report = posts[0], posts[1], posts[2]
+        self.assertEqual(login["login:submit"], ["Login"])
+        self.assertEqual(menu["menu:2:j_id24:1:j_id25"], ["menu:2:j_id24:1:j_id25"])
+        self.assertEqual(menu["javax.faces.ViewState"], ["j_id2"])
+        self.assertEqual(report["javax.faces.ViewState"], ["j_id3"])
+        self.assertEqual(report["parameters:submit"], ["Go"])
+        self.assertEqual(report["parameters:format"], ["pdf"])
+        self.assertNotIn("parameters:detail", report)
+        # March 2025 OLO period: Monday after Feb's last Sunday to Mar 30
+        self.assertEqual(
+            report["parameters:startDateCalendarInputDate"], ["02/24/2025"]
+        )
+        self.assertEqual(report["parameters:endDateCalendarInputDate"], ["03/30/2025"])
+
+    def test_falls_back_to_browser_when_page_needs_javascript(
+        self, _mock_ssm: MagicMock, mock_browser: MagicMock
+    ) -> None:
+        from flexepos_http import FlexeposHttp
+
+        browser = mock_browser.return_value.__enter__.return_value
+        browser.get_online_payments.return_value = {"20358": {"Total": "1.00"}}
+
+        with requests_mock.Mocker() as m:
+            # The menu item renders a page with no parameters form
+            self._mock_site(m, "<div id='content'></div>")
+            payments = FlexeposHttp().get_online_payments(["20358"], 2025, 3)
+
+        self.assertEqual(payments, {"20358": {"Total": "1.00"}})
+        browser.get_online_payments.assert_called_once_with(["20358"], 2025, 3)
+        browser.__exit__.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,441 @@
+import datetime
+import unittest
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+
+def _element() -> MagicMock:
+    element = MagicMock()
+    element.is_displayed.return_value = True
+    element.is_enabled.return_value = True
+    return element
+
+
+def _driver(login_form_shown: bool = False) -> MagicMock:
+    """Fake WebDriver whose pages are always loaded and idle."""
+    driver = MagicMock()
+    driver.find_element.return_value = _element()
+    driver.execute_script.return_value = {"ready": True, "busy": False, "started": 1}
+    driver.find_elements.return_value = [MagicMock()] if login_form_shown else []
+    driver.page_source = "<html></html>"
+    return driver
+
+
+def _tabbed_driver() -> MagicMock:
+    """Fake WebDriver that tracks the current window across new tabs."""
+    driver = _driver()
+    tabs = iter(range(1, 100))
+    driver.current_window_handle = "main"
+
+    def new_window(_kind: str) -> None:
+        driver.current_window_handle = f"tab{next(tabs)}"
+
+    def window(handle: str) -> None:
+        driver.current_window_handle = handle
+
+    driver.switch_to.new_window.side_effect = new_window
+    driver.switch_to.window.side_effect = window
+    return driver
+
+
+SALES_SECTIONS = {
+    "summary": {"Pre-Discount Sales": "1.00"},
+    "cc_tips": {"CC Tips": "2.00"},
+    "payins": {"Payins": ""},
+    "third_party": {"DoorDash": "3.00"},
+}
+
+
+def _fake_sections(calls: list[str], failures: dict[str, int]) -> dict[str, Any]:
+    """Daily sales submit/collect methods that fail ``failures[name]`` times."""
+    methods: dict[str, Any] = {}
+    for name, values in SALES_SECTIONS.items():
+
+        def submit(self: Any, store: str, tx_date_str: str, name: str = name) -> str:
+            calls.append(f"submit:{name}")
+            return name
+
+        def collect(
+            self: Any,
+            store: str,
+            tx_date_str: str,
+            token: str,
+            name: str = name,
+            values: dict[str, Any] = values,
+        ) -> dict[str, Any]:
+            calls.append(f"collect:{token}")
+            if failures.get(name, 0) > 0:
+                failures[name] -= 1
+                raise ValueError(f"{name} page did not load")
+            return values
+
+        methods[f"_submit_{name}"] = submit
+        methods[f"_collect_{name}"] = collect
+    return methods
+
+
+@patch("flexepos.initialise_driver")
+@patch("flexepos.SSMParameterStore")
+class TestFlexeposSession(unittest.TestCase):
+    def _tips(self, dj: Any, stores: list[str] | None = None) -> None:
+        dj.get_tips(stores or [], datetime.date(2025, 1, 1), datetime.date(2025, 1, 7))
+
+    def test_context_manager_shares_one_login(
+        self, _mock_ssm: MagicMock, mock_init: MagicMock
+    ) -> None:
+        from flexepos import Flexepos
+
+        driver = mock_init.return_value = _driver()
+
+        with Flexepos() as dj:
+            self._tips(dj)
+            self._tips(dj)
+            driver.quit.assert_not_called()
+
+        mock_init.assert_called_once()
+        driver.quit.assert_called_once()
+
+    def test_without_context_each_report_closes_browser(
+        self, _mock_ssm: MagicMock, mock_init: MagicMock
+    ) -> None:
+        from flexepos import Flexepos
+
+        driver = mock_init.return_value = _driver()
+        dj = Flexepos()
+        self._tips(dj)
+        self._tips(dj)
+
+        self.assertEqual(mock_init.call_count, 2)
+        self.assertEqual(driver.quit.call_count, 2)
+
+    def test_expired_session_logs_in_again(
+        self, _mock_ssm: MagicMock, mock_init: MagicMock
+    ) -> None:
+        from flexepos import Flexepos
+
+        # back on the login form when the second report starts
+        first, second = _driver(login_form_shown=True), _driver()
+        mock_init.side_effect = [first, second]
+
+        with Flexepos() as dj:
+            self._tips(dj)
+            self._tips(dj)
+
+        self.assertEqual(mock_init.call_count, 2)
+        first.quit.assert_called()
+        second.quit.assert_called_once()
+
+    def test_logged_out_mid_report_retried_once(
+        self, _mock_ssm: MagicMock, mock_init: MagicMock
+    ) -> None:
+        from flexepos import Flexepos
+
+        first, second = _driver(login_form_shown=True), _driver()
+        mock_init.side_effect = [first, second]
+
+        def find_element(by: str, value: str) -> MagicMock:
+            if value == "parameters:store":
+                raise NoSuchElementException(value)
+            return _element()
+
+        first.find_element.side_effect = find_element
+
+        self._tips(Flexepos(), ["20358"])
+
+        self.assertEqual(mock_init.call_count, 2)
+        second.quit.assert_called_once()
+
+    def test_daily_sales_batch_isolates_failing_store(
+        self, _mock_ssm: MagicMock, mock_init: MagicMock
+    ) -> None:
+        from flexepos import Flexepos
+
+        mock_init.return_value = _driver()
+        calls: list[str] = []
+
+        def get_daily_sales(
+            self: Any, store: str, tx_date: datetime.date, refresh: bool = False
+        ) -> dict[str, dict[str, Any]]:
+            calls.append(store)
+            if store == "20395" or (calls.count(store) == 1 and store == "20400"):
+                raise ValueError(f"no sales table for {store}")
+            return {store: {"Payins": ""}}
+
+        with patch.object(Flexepos, "get_daily_sales", get_daily_sales):
+            batch = Flexepos().get_daily_sales_batch(
+                ["20358", "20395", "20400"], datetime.date(2025, 1, 1)
+            )
+
+        self.assertEqual(list(batch.sales), ["20358", "20400"])
+        self.assertEqual(
+            batch.failed, {"20395": "ValueError: no sales table for 20395"}
+        )
+        self.assertEqual(calls, ["20358", "20395", "20395", "20395", "20400", "20400"])
+
+    def test_daily_sales_resumes_at_failed_section(
+        self, _mock_ssm: MagicMock, mock_init: MagicMock
+    ) -> None:
+        from flexepos import Flexepos
+
+        mock_init.return_value = _driver()
+        calls: list[str] = []
+        sections = _fake_sections(calls, {"payins": 1, "third_party": 2})
+        with patch.multiple(Flexepos, **sections), Flexepos() as dj:
+            with self.assertRaises(ValueError):
+                dj.scrape_daily_sales("20358", datetime.date(2025, 1, 1))
+            progress = dj.sales_progress[("20358", datetime.date(2025, 1, 1))]
+            self.assertEqual(progress.next_section(), "third_party")
+            self.assertEqual(
+                progress.sections["third_party"].error,
+                "ValueError: third_party page did not load",
+            )
+
+            sales = dj.scrape_daily_sales("20358", datetime.date(2025, 1, 1))
+
+        self.assertEqual(
+            sales["20358"],
+            {
+                "Pre-Discount Sales": "1.00",
+                "CC Tips": "2.00",
+                "Payins": "",
+                "DoorDash": "3.00",
+            },
+        )
+        # A failed page is retried on its own; earlier pages are not reloaded
+        self.assertEqual(
+            [call for call in calls if call.startswith("collect:")],
+            [
+                "collect:summary",
+                "collect:cc_tips",
+                "collect:payins",
+                "collect:payins",
+                "collect:third_party",
+                "collect:third_party",
+                "collect:third_party",
+            ],
+        )
+        self.assertTrue(progress.complete)
+        self.assertEqual(
+            {name: run.attempts for name, run in progress.sections.items()},
+            {"summary": 1, "cc_tips": 1, "payins": 2, "third_party": 3},
+        )
+        mock_init.assert_called_once()
+
+    @patch.dict("os.environ", {"FLEXEPOS_TABS": "3"})
+    def test_daily_sales_sections_overlap_in_tabs(
+        self, _mock_ssm: MagicMock, mock_init: MagicMock
+    ) -> None:
+        from flexepos import Flexepos
+
+        driver = mock_init.return_value = _tabbed_driver()
+        calls: list[str] = []
+        sections = _fake_sections(calls, {"third_party": 1})
+        with patch.multiple(Flexepos, **sections):
+            sales = Flexepos().scrape_daily_sales("20358", datetime.date(2025, 1, 1))
+
+        self.assertEqual(
+            sales["20358"],
+            {
+                "Pre-Discount Sales": "1.00",
+                "CC Tips": "2.00",
+                "Payins": "",
+                "DoorDash": "3.00",
+            },
+        )
+        # Three reports render at once; the fourth starts when a tab frees
+        # up, and the page that failed in its tab is retried in the main one
+        self.assertEqual(
+            calls,
+            [
+                "submit:summary",
+                "submit:cc_tips",
+                "submit:payins",
+                "collect:summary",
+                "submit:third_party",
+                "collect:cc_tips",
+                "collect:payins",
+                "collect:third_party",
+                "submit:third_party",
+                "collect:third_party",
+            ],
+        )
+        self.assertEqual(driver.switch_to.new_window.call_count, 4)
+        # Every tab is closed, then the browser itself on the way out
+        self.assertEqual(driver.close.call_count, 5)
+        self.assertEqual(driver.current_window_handle, "main")
+
+
+class TestWaits(unittest.TestCase):
+    def test_page_changed_after_navigation_or_ajax(self) -> None:
+        from selenium.common.exceptions import StaleElementReferenceException
+
+        from webdriver import page_changed
+
+        driver = MagicMock()
+        old_root = MagicMock()
+        condition = page_changed(old_root)
+
+        driver.execute_script.return_value = {
+            "ready": True,
+            "busy": False,
+            "started": 0,
+        }
+        self.assertFalse(condition(driver))
+
+        driver.execute_script.return_value["started"] = 1
+        self.assertTrue(condition(driver))
+
+        driver.execute_script.return_value = {
+            "ready": True,
+            "busy": True,
+            "started": 0,
+        }
+        type(old_root).tag_name = property(
+            lambda _self: (_ for _ in ()).throw(StaleElementReferenceException())
+        )
+        self.assertFalse(condition(driver))
+        driver.execute_script.return_value["busy"] = False
+        self.assertTrue(condition(driver))
+
+    def test_wait_until_records_telemetry(self) -> None:
+        from selenium.common.exceptions import TimeoutException
+
+        from webdriver import reset_wait_stats, wait_stats, wait_until
+
+        reset_wait_stats()
+        calls = iter([False, False, "done"])
+
+        result = wait_until(MagicMock(), lambda _d: next(calls), "test.step", 5)
+        missing = wait_until(MagicMock(), lambda _d: False, "test.miss", 0.3, False)
+
+        self.assertEqual(result, "done")
+        self.assertIsNone(missing)
+        with self.assertRaises(TimeoutException):
+            wait_until(MagicMock(), lambda _d: False, "test.miss", 0.3)
+        stats = wait_stats()
+        self.assertEqual(
+            (stats["test.step"].count, stats["test.step"].timeouts), (1, 0)
+        )
+        self.assertEqual(stats["test.step"].budget_seconds, 5)
+        self.assertLess(stats["test.step"].waited_seconds, 5)
+        self.assertEqual(
+            (stats["test.miss"].count, stats["test.miss"].timeouts), (2, 2)
+        )
+
+    def test_download_complete_ignores_partial_files(self) -> None:
+        import os
+        import tempfile
+
+        from webdriver import download_complete
+
+        with tempfile.TemporaryDirectory() as tmp:
+            condition = download_complete(tmp, "*.csv")
+            self.assertIsNone(condition(None))
+            partial = os.path.join(tmp, "report.csv.crdownload")
+            with open(partial, "w") as f:
+                f.write("a")
+            self.assertIsNone(condition(None))
+            os.rename(partial, os.path.join(tmp, "report.csv"))
+            self.assertEqual(condition(None), os.path.join(tmp, "report.csv"))
+
+
+def _launched_chrome(
+    download_location: str | None = None, shared: bool = False
+) -> MagicMock:
+    driver = MagicMock()
+    driver.uses = 0
+    driver.shared = shared
+    driver.window_handles = ["main", "tab1"]
+    driver.execute_script.return_value = 1
+    return driver
+
+
+@patch("webdriver._process_tree_rss_mb", return_value=300.0)
+@patch("webdriver._launch_lambda_chrome", side_effect=_launched_chrome)
+class TestChromeManager(unittest.TestCase):
+    def test_reuses_browser_until_max_uses(
+        self, mock_launch: MagicMock, _mock_rss: MagicMock
+    ) -> None:
+        from webdriver import ChromeManager
+
+        manager = ChromeManager(max_uses=2, max_rss_mb=500)
+        first = manager.acquire()
+        # Taken, so a second caller gets a private browser
+        private = manager.acquire()
+        self.assertFalse(private.shared)
+        self.assertTrue(manager.release(first))
+        first.execute_cdp_cmd.assert_called_with("Network.clearBrowserCookies", {})
+        first.get.assert_called_with("about:blank")
+
+        self.assertIs(manager.acquire("/tmp/downloads"), first)
+        self.assertFalse(manager.release(first))
+        self.assertIsNot(manager.acquire(), first)
+        self.assertEqual(mock_launch.call_count, 3)
+
+    def test_recycles_on_memory_growth_and_failed_health_check(
+        self, mock_launch: MagicMock, mock_rss: MagicMock
+    ) -> None:
+        from webdriver import ChromeManager
+
+        manager = ChromeManager(max_uses=10, max_rss_mb=500)
+        first = manager.acquire()
+        mock_rss.return_value = 800.0
+        self.assertFalse(manager.release(first))
+
+        mock_rss.return_value = 300.0
+        second = manager.acquire()
+        self.assertTrue(manager.release(second))
+        second.execute_script.side_effect = WebDriverException("chrome not reachable")
+        third = manager.acquire()
+
+        self.assertIsNot(third, second)
+        second.shutdown.assert_called_once()
+        self.assertEqual(mock_launch.call_count, 3)
+
+    def test_reclaims_browser_never_released(
+        self, mock_launch: MagicMock, _mock_rss: MagicMock
+    ) -> None:
+        from webdriver import ChromeManager
+
+        manager = ChromeManager(max_uses=10, max_rss_mb=500, lease_timeout=60)
+        with patch.dict("os.environ", {"_X_AMZN_TRACE_ID": "Root=1-a"}):
+            leaked = manager.acquire()
+            self.assertIsNot(manager.acquire(), leaked)
+        # A later invocation takes the browser back
+        with patch.dict("os.environ", {"_X_AMZN_TRACE_ID": "Root=1-b"}):
+            self.assertIs(manager.acquire(), leaked)
+            leaked.get.assert_called_with("about:blank")
+            # Within one invocation, only after the lease timeout
+            with patch("webdriver.time.monotonic", return_value=1e9):
+                self.assertIs(manager.acquire(), leaked)
+        self.assertEqual(mock_launch.call_count, 2)
+
+    def test_removes_orphaned_profiles_only(
+        self, _mock_launch: MagicMock, _mock_rss: MagicMock
+    ) -> None:
+        import os
+        import tempfile
+
+        from webdriver import CHROME_PROFILE_PREFIX, remove_orphaned_profiles
+
+        with tempfile.TemporaryDirectory() as tmp:
+            live = os.path.join(tmp, CHROME_PROFILE_PREFIX + "live")
+            orphan = os.path.join(tmp, CHROME_PROFILE_PREFIX + "orphan")
+            other = os.path.join(tmp, "downloads")
+            for path in (live, orphan, other):
+                os.makedirs(path)
+            with (
+                patch("webdriver.gettempdir", return_value=tmp),
+                patch("webdriver._live_profiles", {live}),
+            ):
+                self.assertEqual(remove_orphaned_profiles(), 1)
+            self.assertEqual(
+                sorted(os.listdir(tmp)),
+                sorted(["downloads", CHROME_PROFILE_PREFIX + "live"]),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 import contextlib
+import json
 import unittest
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
-from quickbooks.exceptions import QuickbooksException
+from quickbooks.exceptions import AuthorizationException, QuickbooksException
+from quickbooks.objects import SalesReceipt
 
 from qb import calculate_bill_splits
 
@@ -105,6 +107,11 @@ class TestQuickBooks(unittest.TestCase):
 class TestQuickBooksExceptionHandling(unittest.TestCase):
     """Test that QuickbooksException is properly caught and handled."""
 
+    def setUp(self) -> None:
+        from qb import REF_CACHE
+
+        REF_CACHE.clear()
+
     def _create_quickbooks_exception(self) -> QuickbooksException:
         """Helper to create a QuickbooksException for testing."""
         return QuickbooksException("Test QuickBooks error", error_code="500")
@@ -133,7 +140,7 @@ class TestQuickBooksExceptionHandling(unittest.TestCase):
         mock_department.all.return_value = []
         mock_sales_receipt.filter.return_value = []
         mock_customer.all.return_value = [MagicMock()]
-        mock_item.where.return_value = []
+        mock_item.all.return_value = []
 
         # Create a mock receipt that raises on save
         mock_receipt = MagicMock()
@@ -497,6 +504,7 @@ class TestUnlinkedSalesReceipts(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["id"], "1111")
 
+    @patch("qb_export.EXPORT_PAGE_SIZE", 2)
     @patch("qb.CLIENT")
     @patch("qb.refresh_session")
     @patch("qb.SalesReceipt")
@@ -553,6 +561,12 @@ class TestUnlinkedSalesReceipts(unittest.TestCase):
 class TestCreateDailySalesCaching(unittest.TestCase):
     """Test that create_daily_sales caches QBO lookups."""
 
+    def setUp(self) -> None:
+        from qb import REF_CACHE
+
+        REF_CACHE.clear()
+
+    @patch("qb.batch_write")
     @patch("qb.CLIENT")
     @patch("qb.refresh_session")
     @patch("qb.SalesReceipt")
@@ -567,8 +581,9 @@ class TestCreateDailySalesCaching(unittest.TestCase):
         mock_sales_receipt: MagicMock,
         mock_refresh: MagicMock,
         mock_client: MagicMock,
+        mock_batch_write: MagicMock,
     ) -> None:
-        """Customer.all and Item.where are called exactly once regardless of store count."""
+        """Customer.all and Item.all are called exactly once regardless of store count."""
         from datetime import date
 
         from qb import create_daily_sales
@@ -597,7 +612,7 @@ class TestCreateDailySalesCaching(unittest.TestCase):
         from qb import detail_map
 
         all_ids = {lid[0] for lid in detail_map.values()} | {"43", "31"}
-        mock_item.where.return_value = [make_item(i) for i in all_ids]
+        mock_item.all.return_value = [make_item(i) for i in all_ids]
 
         # Build minimal daily reports for 3 stores
         daily_report = {
@@ -640,10 +655,954 @@ class TestCreateDailySalesCaching(unittest.TestCase):
 
         # Customer.all called exactly once (not 3 times)
         mock_customer.all.assert_called_once()
-        # Item.where called exactly once with batch query (not 60+ individual queries)
-        mock_item.where.assert_called_once()
-        # Item.query should NOT have been called at all
+        # Items come from the reference cache: one load, no per-item queries
+        mock_item.all.assert_called_once()
+        mock_item.where.assert_not_called()
         mock_item.query.assert_not_called()
+        # All three receipts are posted in a single batch
+        mock_batch_write.assert_called_once()
+        operations = mock_batch_write.call_args.args[0]
+        self.assertEqual(
+            sorted(key for key, _, _ in operations),
+            ["2024-06-15/20358", "2024-06-15/20395", "2024-06-15/20400"],
+        )
+        mock_receipt.save.assert_not_called()
+
+        # A second date reuses the cached departments and items
+        create_daily_sales(
+            txdate=date(2024, 6, 16),
+            daily_reports=daily_reports,
+        )
+        mock_item.all.assert_called_once()
+        mock_department.all.assert_called_once()
+
+
+class TestDailySalesFingerprint(unittest.TestCase):
+    """Test that create_daily_sales skips unchanged receipts."""
+
+    def _ref(self, value: str, name: str = "") -> object:
+        from quickbooks.objects import Ref
+
+        ref = Ref()
+        ref.value = value
+        ref.name = name
+        return ref
+
+    @patch("qb.batch_write")
+    @patch("qb.REF_CACHE")
+    @patch("qb.Customer")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_unchanged_skipped_and_changed_sparse_updated(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_customer: MagicMock,
+        mock_ref_cache: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from datetime import date
+
+        from quickbooks.objects import SalesReceipt
+        from quickbooks.objects.batchrequest import BatchOperation
+
+        from qb import BatchResult, create_daily_sales
+
+        mock_store_refs.return_value = {"20358": self._ref("1", "20358")}
+        mock_customer.all.return_value[0].to_ref.return_value = self._ref("9")
+        mock_ref_cache.item.return_value.to_ref.return_value = self._ref("5")
+        mock_batch_write.return_value = BatchResult()
+        report = {"Online Credit Card": "$12.00", "Payins": "", "Bank Deposits": ""}
+
+        with patch.object(SalesReceipt, "where", return_value=[]):
+            create_daily_sales(date(2024, 6, 15), {"20358": dict(report)})
+        operation, created = mock_batch_write.call_args.args[0][0][1:]
+        self.assertEqual(operation, BatchOperation.CREATE)
+        self.assertIn("contentHash", json.loads(created.PrivateNote))
+
+        created.Id = "7"
+        created.SyncToken = "2"
+        mock_batch_write.reset_mock()
+        with patch.object(SalesReceipt, "where", return_value=[created]):
+            create_daily_sales(date(2024, 6, 15), {"20358": dict(report)})
+        mock_batch_write.assert_not_called()
+
+        report["Online Credit Card"] = "$15.00"
+        with patch.object(SalesReceipt, "where", return_value=[created]):
+            create_daily_sales(date(2024, 6, 15), {"20358": dict(report)})
+        operation, update = mock_batch_write.call_args.args[0][0][1:]
+        self.assertEqual(operation, BatchOperation.UPDATE)
+        payload = json.loads(update.to_json())
+        self.assertTrue(payload["sparse"])
+        self.assertEqual((payload["Id"], payload["SyncToken"]), ("7", "2"))
+        self.assertNotIn("LinkedTxn", payload)
+        self.assertNotIn("DocNumber", payload)
+        self.assertIn("Online Credit Card imported from ($15.00)", update.to_json())
+
+    @patch("qb.batch_write")
+    @patch("qb.query_all")
+    @patch("qb.REF_CACHE")
+    @patch("qb.Customer")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_date_range_posted_in_one_pass(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_customer: MagicMock,
+        mock_ref_cache: MagicMock,
+        mock_query_all: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from datetime import date
+
+        from qb import BatchResult, create_daily_sales_range
+
+        mock_store_refs.return_value = {
+            "20358": self._ref("1", "20358"),
+            "20395": self._ref("2", "20395"),
+        }
+        mock_customer.all.return_value[0].to_ref.return_value = self._ref("9")
+        mock_ref_cache.item.return_value.to_ref.return_value = self._ref("5")
+        mock_query_all.return_value = []
+        mock_batch_write.return_value = BatchResult()
+        report = {"Payins": "", "Bank Deposits": ""}
+
+        create_daily_sales_range(
+            {
+                date(2024, 6, 16): {"20358": dict(report)},
+                date(2024, 6, 14): {"20358": dict(report), "20395": dict(report)},
+                date(2024, 6, 15): {"20395": dict(report)},
+            }
+        )
+
+        mock_refresh.assert_called_once()
+        mock_customer.all.assert_called_once()
+        mock_query_all.assert_called_once()
+        self.assertEqual(
+            mock_query_all.call_args.args[1],
+            "TxnDate >= '2024-06-14' AND TxnDate <= '2024-06-16'",
+        )
+        mock_batch_write.assert_called_once()
+        self.assertEqual(
+            [key for key, _, _ in mock_batch_write.call_args.args[0]],
+            [
+                "2024-06-14/20358",
+                "2024-06-14/20395",
+                "2024-06-15/20395",
+                "2024-06-16/20358",
+            ],
+        )
+
+    @patch("qb.batch_write")
+    @patch("qb.query_all")
+    @patch("qb.REF_CACHE")
+    @patch("qb.Customer")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_failed_receipts_returned_and_auth_errors_raised(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_customer: MagicMock,
+        mock_ref_cache: MagicMock,
+        mock_query_all: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from datetime import date
+
+        from qb import BatchResult, create_daily_sales
+
+        mock_store_refs.return_value = {
+            "20358": self._ref("1", "20358"),
+            "20395": self._ref("2", "20395"),
+        }
+        mock_customer.all.return_value[0].to_ref.return_value = self._ref("9")
+        mock_ref_cache.item.return_value.to_ref.return_value = self._ref("5")
+        mock_query_all.return_value = []
+        fault = MagicMock()
+        fault.Error = ["Duplicate Document Number"]
+        mock_batch_write.return_value = BatchResult(faults={"2024-06-15/20395": fault})
+        report = {"Payins": "", "Bank Deposits": ""}
+        reports = {"20358": dict(report), "20395": dict(report)}
+
+        failed = create_daily_sales(date(2024, 6, 15), reports)
+        self.assertEqual(failed, {"20395": "Duplicate Document Number"})
+
+        mock_batch_write.return_value = BatchResult(
+            faults={"2024-06-15/20358": fault, "2024-06-15/20395": fault},
+            error=AuthorizationException("expired", error_code=401),
+        )
+        with self.assertRaises(AuthorizationException):
+            create_daily_sales(date(2024, 6, 15), reports)
+
+
+class TestReferenceCache(unittest.TestCase):
+    """Test the TTL-based QuickBooks reference-data cache."""
+
+    def _make(self, **attrs: str | None) -> MagicMock:
+        obj = MagicMock()
+        for name, value in attrs.items():
+            setattr(obj, name, value)
+        return obj
+
+    @patch("qb.refresh_session")
+    @patch("qb.Account")
+    def test_accounts_indexed_by_acct_num(
+        self, mock_account: MagicMock, mock_refresh: MagicMock
+    ) -> None:
+        from qb import QBReferenceCache
+
+        cash = self._make(AcctNum="1010")
+        mock_account.all.return_value = [cash, self._make(AcctNum=None)]
+
+        cache = QBReferenceCache(ttl=60)
+
+        self.assertIs(cache.account(1010), cash)
+        self.assertIs(cache.account("1010"), cash)
+        mock_account.all.assert_called_once()
+
+    @patch("qb.refresh_session")
+    @patch("qb.Vendor")
+    def test_expired_entries_are_reloaded(
+        self, mock_vendor: MagicMock, mock_refresh: MagicMock
+    ) -> None:
+        from qb import QBReferenceCache
+
+        mock_vendor.all.return_value = [self._make(DisplayName="DoorDash")]
+
+        cache = QBReferenceCache(ttl=0)
+        cache.vendor("DoorDash")
+        cache.vendor("DoorDash")
+
+        self.assertEqual(mock_vendor.all.call_count, 2)
+
+    @patch("qb.refresh_session")
+    @patch("qb.Department")
+    def test_query_all_follows_pagination(
+        self, mock_department: MagicMock, mock_refresh: MagicMock
+    ) -> None:
+        from qb import query_all
+
+        first_page = [self._make(Name=str(i)) for i in range(1000)]
+        mock_department.all.side_effect = [first_page, [self._make(Name="last")]]
+
+        result = query_all(mock_department)
+
+        self.assertEqual(len(result), 1001)
+        self.assertEqual(
+            mock_department.all.call_args_list[1].kwargs["start_position"], 1001
+        )
+
+
+class TestSessionReuse(unittest.TestCase):
+    """Test that refresh_session reuses the cached client while it is valid."""
+
+    def setUp(self) -> None:
+        import qb
+
+        self._saved = (qb.AUTH_CLIENT, qb.CLIENT, qb._token_expires_at)
+        qb.AUTH_CLIENT = None
+        qb.CLIENT = None
+        qb._token_expires_at = 0.0
+        self.secret = (
+            '{"client_id": "id", "client_secret": "secret", '
+            '"redirect_url": "https://example.com", '
+            '"access_token": "access", "refresh_token": "refresh"}'
+        )
+
+    def tearDown(self) -> None:
+        import qb
+
+        qb.AUTH_CLIENT, qb.CLIENT, qb._token_expires_at = self._saved
+
+    @patch("qb._qbo_params", {"company_id": "123"})
+    @patch("qb.GovernedQuickBooks")
+    @patch("qb.put_secret")
+    @patch("qb.get_secret")
+    @patch("qb.AuthClient")
+    def test_client_reused_until_expiry(
+        self,
+        mock_auth_client_class: MagicMock,
+        mock_get_secret: MagicMock,
+        mock_put_secret: MagicMock,
+        mock_quickbooks: MagicMock,
+    ) -> None:
+        """Only the first call refreshes tokens; later calls reuse CLIENT."""
+        import qb
+
+        mock_get_secret.return_value = self.secret
+        mock_auth_client_class.return_value.expires_in = 3600
+
+        first = qb.refresh_session()
+        second = qb.refresh_session()
+
+        self.assertIs(first, second)
+        mock_auth_client_class.return_value.refresh.assert_called_once()
+        mock_put_secret.assert_called_once()
+        mock_quickbooks.assert_called_once()
+
+        # Near expiry the tokens are refreshed again
+        qb._token_expires_at = 0.0
+        qb.refresh_session()
+        self.assertEqual(mock_auth_client_class.return_value.refresh.call_count, 2)
+
+    @patch("qb._qbo_params", {"company_id": "123"})
+    @patch("qb.GovernedQuickBooks")
+    @patch("qb.put_secret")
+    @patch("qb.get_secret")
+    @patch("qb.AuthClient")
+    def test_force_refresh(
+        self,
+        mock_auth_client_class: MagicMock,
+        mock_get_secret: MagicMock,
+        mock_put_secret: MagicMock,
+        mock_quickbooks: MagicMock,
+    ) -> None:
+        """force=True refreshes even when the cached token is still valid."""
+        import qb
+
+        mock_get_secret.return_value = self.secret
+        mock_auth_client_class.return_value.expires_in = 3600
+
+        qb.refresh_session()
+        qb.refresh_session(force=True)
+
+        self.assertEqual(mock_auth_client_class.return_value.refresh.call_count, 2)
+
+    def test_retry_on_auth_failure_retries_once_after_401(self) -> None:
+        """A 401 invalidates the session and retries the call once."""
+        import qb
+
+        qb._token_expires_at = 1e12
+        calls = MagicMock(
+            side_effect=[
+                AuthorizationException("expired", error_code=401),
+                "ok",
+            ]
+        )
+
+        def call() -> str:
+            return str(calls())
+
+        entry_point = qb.retry_on_auth_failure(call)
+        self.assertEqual(entry_point(), "ok")
+        self.assertEqual(calls.call_count, 2)
+        self.assertEqual(qb._token_expires_at, 0.0)
+
+    def test_retry_on_auth_failure_ignores_other_errors(self) -> None:
+        """Non-401 authorization faults are raised without a retry."""
+        import qb
+
+        calls = MagicMock(side_effect=AuthorizationException("denied", error_code=120))
+
+        def call() -> None:
+            calls()
+
+        entry_point = qb.retry_on_auth_failure(call)
+        with self.assertRaises(AuthorizationException):
+            entry_point()
+        calls.assert_called_once()
+
+
+class TestBatchWrite(unittest.TestCase):
+    """Test batched QBO writes and fault mapping."""
+
+    @patch("qb.refresh_session")
+    def test_faults_mapped_to_keys_and_chunked(self, mock_refresh: MagicMock) -> None:
+        from quickbooks.objects import SalesReceipt
+
+        from qb import BATCH_MAX_ITEMS, batch_write
+
+        client = mock_refresh.return_value
+
+        def batch_operation(body: str) -> dict:
+            items = json.loads(body)["BatchItemRequest"]
+            responses = []
+            for item in items:
+                if item["bId"] == "1":
+                    responses.append(
+                        {
+                            "bId": item["bId"],
+                            "Fault": {
+                                "type": "ValidationFault",
+                                "Error": [{"Message": "Bad line", "code": "2020"}],
+                            },
+                        }
+                    )
+                else:
+                    responses.append(
+                        {
+                            "bId": item["bId"],
+                            "SalesReceipt": {"Id": f"id-{item['bId']}"},
+                        }
+                    )
+            return {"BatchItemResponse": responses}
+
+        client.batch_operation.side_effect = batch_operation
+
+        operations = [
+            (f"store{i}", "create", SalesReceipt()) for i in range(BATCH_MAX_ITEMS + 2)
+        ]
+        result = batch_write(operations)
+
+        self.assertEqual(client.batch_operation.call_count, 2)
+        self.assertEqual(set(result.faults), {"store1"})
+        self.assertIn("Bad line", result.fault_messages()["store1"])
+        self.assertEqual(len(result.saved), BATCH_MAX_ITEMS + 1)
+        self.assertEqual(result.saved["store0"].Id, "id-0")
+        self.assertEqual(result.saved["store31"].Id, "id-31")
+
+    @patch("qb.refresh_session")
+    def test_rejected_request_keeps_earlier_chunks(
+        self, mock_refresh: MagicMock
+    ) -> None:
+        from quickbooks.objects import SalesReceipt
+
+        from qb import BATCH_MAX_ITEMS, batch_write
+
+        client = mock_refresh.return_value
+        first = {
+            "BatchItemResponse": [
+                {"bId": str(i), "SalesReceipt": {"Id": f"id-{i}"}}
+                for i in range(BATCH_MAX_ITEMS)
+            ]
+        }
+        error = QuickbooksException("Throttled", error_code=429)
+        client.batch_operation.side_effect = [first, error]
+
+        operations = [
+            (f"store{i}", "create", SalesReceipt())
+            for i in range(BATCH_MAX_ITEMS * 2 + 2)
+        ]
+        result = batch_write(operations)
+
+        self.assertEqual(client.batch_operation.call_count, 2)
+        self.assertIs(result.error, error)
+        self.assertEqual(len(result.saved), BATCH_MAX_ITEMS)
+        self.assertEqual(
+            set(result.faults), {key for key, _, _ in operations[BATCH_MAX_ITEMS:]}
+        )
+        self.assertIn("Throttled", result.fault_messages()["store31"])
+
+
+class TestSplitBillBatching(unittest.TestCase):
+    """Test that split_bill creates bills in one batch and rolls back faults."""
+
+    def _original_bill(self) -> MagicMock:
+        line = MagicMock()
+        line.Amount = Decimal("100.00")
+        line.Description = "Utilities"
+        bill = MagicMock()
+        bill.DocNumber = "INV1"
+        bill.Line = [line]
+        bill.PrivateNote = ""
+        return bill
+
+    @patch("qb.batch_write")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_split_bill_uses_one_create_batch(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from qb import BatchResult, split_bill
+
+        mock_store_refs.return_value = {"20358": MagicMock(), "20395": MagicMock()}
+        saved = {"20358": MagicMock(DocNumber="INV1S1"), "20395": MagicMock()}
+        mock_batch_write.return_value = BatchResult(saved=saved)
+        original = self._original_bill()
+
+        new_bills = split_bill(original, ["20358", "20395"])
+
+        mock_batch_write.assert_called_once()
+        self.assertEqual(
+            [op for _, op, _ in mock_batch_write.call_args.args[0]],
+            ["create", "create"],
+        )
+        self.assertEqual(new_bills, [saved["20358"], saved["20395"]])
+        original.delete.assert_called_once()
+
+    @patch("qb.batch_write")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_split_bill_rolls_back_on_fault(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from qb import BatchResult, split_bill
+
+        mock_store_refs.return_value = {"20358": MagicMock(), "20395": MagicMock()}
+        created = MagicMock(DocNumber="INV1S1")
+        fault = MagicMock()
+        fault.Error = ["Duplicate DocNumber"]
+        mock_batch_write.side_effect = [
+            BatchResult(saved={"20358": created}, faults={"20395": fault}),
+            BatchResult(),
+        ]
+        original = self._original_bill()
+
+        with self.assertRaises(QuickbooksException):
+            split_bill(original, ["20358", "20395"])
+
+        rollback_ops = mock_batch_write.call_args_list[1].args[0]
+        self.assertEqual(rollback_ops, [("INV1S1", "delete", created)])
+        original.delete.assert_not_called()
+
+    @patch("qb.batch_write")
+    @patch("qb.find_by_doc_numbers")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_split_bills_batches_creates_and_voids(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_find: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from qb import BatchResult, split_bills
+
+        mock_store_refs.return_value = {"20358": MagicMock(), "20395": MagicMock()}
+        good = self._original_bill()
+        bad = self._original_bill()
+        bad.DocNumber = "INV2"
+        mock_find.return_value = {"INV1": good, "INV2": bad}
+        fault = MagicMock()
+        fault.Error = ["Duplicate DocNumber"]
+        created = {
+            "INV1/20358": MagicMock(DocNumber="INV1S1"),
+            "INV1/20395": MagicMock(DocNumber="INV1S2"),
+            "INV2/20358": MagicMock(DocNumber="INV2S1"),
+        }
+        voided = MagicMock()
+        mock_batch_write.side_effect = [
+            BatchResult(saved=created, faults={"INV2/20395": fault}),
+            BatchResult(saved={"INV1": voided}),
+            BatchResult(),
+            BatchResult(),
+        ]
+
+        result = split_bills(["INV1", "INV2", "INV3"], ["20358", "20395"])
+
+        self.assertEqual(result.split, {"INV1": ["INV1S1", "INV1S2"]})
+        self.assertEqual(
+            result.failed,
+            {"INV2": "Duplicate DocNumber", "INV3": "Bill not found"},
+        )
+        create, void, delete, rollback = [
+            c.args[0] for c in mock_batch_write.call_args_list
+        ]
+        self.assertEqual(len(create), 4)
+        self.assertEqual(
+            [c[2].Line[0].Amount for c in create[:2]],
+            [Decimal("50.00"), Decimal("50.00")],
+        )
+        self.assertEqual(rollback, [("INV2/20358", "delete", created["INV2/20358"])])
+        self.assertEqual([(k, op) for k, op, _ in void], [("INV1", "update")])
+        self.assertEqual(delete, [("INV1", "delete", voided)])
+        mock_find.assert_called_once()
+
+    @patch("qb.batch_write")
+    @patch("qb.find_by_doc_numbers")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_split_bills_rolls_back_when_original_not_voided(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_find: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from qb import BatchResult, split_bills
+
+        mock_store_refs.return_value = {"20358": MagicMock(), "20395": MagicMock()}
+        first = self._original_bill()
+        second = self._original_bill()
+        second.DocNumber = "INV2"
+        mock_find.return_value = {"INV1": first, "INV2": second}
+        fault = MagicMock()
+        fault.Error = ["Stale object"]
+        created = {
+            f"{doc}/{location}": MagicMock(DocNumber=f"{doc}S{n}")
+            for doc in ("INV1", "INV2")
+            for n, location in enumerate(("20358", "20395"), 1)
+        }
+        mock_batch_write.side_effect = [
+            BatchResult(saved=created),
+            BatchResult(saved={"INV1": MagicMock()}, faults={"INV2": fault}),
+            BatchResult(faults={"INV1": fault}),
+            BatchResult(),
+        ]
+
+        result = split_bills(["INV1", "INV2"], ["20358", "20395"])
+
+        self.assertEqual(result.split, {})
+        self.assertEqual(
+            result.failed,
+            {
+                "INV1": "Original not voided: Stale object",
+                "INV2": "Original not voided: Stale object",
+            },
+        )
+        rollback = mock_batch_write.call_args_list[3].args[0]
+        self.assertEqual(
+            sorted((key, op) for key, op, _ in rollback),
+            [(key, "delete") for key in sorted(created)],
+        )
+
+
+class TestSyncThirdPartyDeposits(unittest.TestCase):
+    """Test bulk third-party deposit reconciliation."""
+
+    @patch("qb.REF_CACHE")
+    @patch("qb.wmc_account_ref")
+    @patch("qb.batch_write")
+    @patch("qb.query_all")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_one_query_for_date_span_and_only_missing_created(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_query_all: MagicMock,
+        mock_batch_write: MagicMock,
+        mock_account_ref: MagicMock,
+        mock_ref_cache: MagicMock,
+    ) -> None:
+        from datetime import date
+
+        from qb import BatchResult, sync_third_party_deposits
+
+        mock_store_refs.return_value = {
+            "20358": MagicMock(value="1"),
+            "20395": MagicMock(value="2"),
+        }
+        existing = MagicMock()
+        existing.TxnDate = "2025-03-03"
+        existing.DepartmentRef.value = "1"
+        existing.DepartmentRef.name = "20358 (renamed)"
+        existing.Line = [MagicMock(Amount=Decimal("125.40"))]
+        mock_query_all.return_value = [existing]
+        fault = MagicMock()
+        fault.Error = ["Stale object"]
+        mock_batch_write.return_value = BatchResult(faults={"3": fault})
+
+        deposits = [
+            ["DoorDash", date(2025, 3, 3), "", [["1361", "", "125.40"]], "20358"],
+            ["DoorDash", date(2025, 3, 3), "", [["1361", "", "125.40"]], "20395"],
+            ["DoorDash", date(2025, 3, 3), "", [["1361", "", "125.40"]], "20395"],
+            ["DoorDash", date(2025, 3, 17), "", [["1361", "", "80.00"]], "20395"],
+        ]
+
+        outcomes = sync_third_party_deposits(deposits)
+
+        mock_query_all.assert_called_once()
+        where_clause = mock_query_all.call_args.args[1]
+        self.assertIn("TxnDate >= '2025-03-03'", where_clause)
+        self.assertIn("TxnDate <= '2025-03-17'", where_clause)
+        self.assertEqual(
+            [outcome["status"] for outcome in outcomes],
+            ["skipped", "created", "skipped", "failed"],
+        )
+        self.assertIn("Stale object", outcomes[3]["error"])
+        operations = mock_batch_write.call_args.args[0]
+        self.assertEqual([label for label, _, _ in operations], ["1", "3"])
+
+    @patch("qb.sync_third_party_deposits")
+    def test_single_deposit_wrapper(self, mock_bulk: MagicMock) -> None:
+        from datetime import date
+
+        from qb import sync_third_party_deposit
+
+        mock_bulk.return_value = [{"status": "skipped"}]
+        self.assertEqual(
+            sync_third_party_deposit("DoorDash", date(2025, 3, 3), "", [], "20358"),
+            "skipped",
+        )
+
+        mock_bulk.return_value = [{"status": "failed", "error": "boom"}]
+        with self.assertRaises(QuickbooksException):
+            sync_third_party_deposit("DoorDash", date(2025, 3, 3), "", [], "20358")
+
+
+class TestSyncBills(unittest.TestCase):
+    """Test bulk bill/vendor credit sync."""
+
+    def setUp(self) -> None:
+        from quickbooks.objects import Ref, Vendor
+
+        self.vendor = Vendor()
+        self.vendor.Id = "5"
+        self.vendor.DisplayName = "Sysco"
+        self.vendor.TermRef = Ref()
+        self.vendor.TermRef.value = "3"
+        self.account = Ref()
+        self.account.value = "42"
+
+    def _document(self, invoice_num: str, amount: str) -> object:
+        from datetime import date
+
+        from qb import BillDocument
+
+        return BillDocument(
+            self.vendor,
+            invoice_num,
+            date(2025, 3, 3),
+            "notes",
+            [[self.account, "Food", amount]],
+        )
+
+    @patch("qb.batch_write")
+    @patch("qb.find_by_doc_numbers")
+    @patch("qb.get_store_refs")
+    @patch("qb.refresh_session")
+    def test_only_new_or_changed_documents_posted(
+        self,
+        mock_refresh: MagicMock,
+        mock_store_refs: MagicMock,
+        mock_find: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from quickbooks.objects import Bill, VendorCredit
+        from quickbooks.objects.batchrequest import BatchOperation
+
+        from qb import BatchResult, _apply_bill_document, sync_bills
+
+        unchanged = Bill()
+        unchanged.Id = "1"
+        _apply_bill_document(unchanged, self._document("INV-1", "10.00"), {})
+        changed = Bill()
+        changed.Id = "2"
+        _apply_bill_document(changed, self._document("INV-2", "10.00"), {})
+        linked = Bill()
+        linked.LinkedTxn = [MagicMock()]
+        mock_find.side_effect = lambda tx_type, numbers: (
+            {"INV-1": unchanged, "INV-2": changed, "INV-3": linked}
+            if tx_type is Bill
+            else {}
+        )
+        mock_batch_write.return_value = BatchResult()
+
+        outcomes = sync_bills(
+            [
+                self._document("INV-1", "10.00"),
+                self._document("INV-2", "12.00"),
+                self._document("INV-3", "5.00"),
+                self._document("INV-4", "7.00"),
+                self._document("CR-1", "-3.00"),
+            ]
+        )
+
+        self.assertEqual(
+            outcomes,
+            {
+                "INV-1": "unchanged",
+                "INV-2": "updated",
+                "INV-3": "linked",
+                "INV-4": "created",
+                "CR-1": "created",
+            },
+        )
+        self.assertEqual(mock_find.call_count, 2)
+        operations = mock_batch_write.call_args.args[0]
+        self.assertEqual(
+            [(key, op) for key, op, _ in operations],
+            [
+                ("INV-2", BatchOperation.UPDATE),
+                ("INV-4", BatchOperation.CREATE),
+                ("CR-1", BatchOperation.CREATE),
+            ],
+        )
+        credit = operations[2][2]
+        self.assertIsInstance(credit, VendorCredit)
+        self.assertEqual(credit.Line[0].Amount, Decimal("3.00"))
+
+    @patch("qb.DOC_NUMBER_CHUNK", 2)
+    @patch("qb.refresh_session")
+    def test_doc_numbers_looked_up_in_chunks(self, mock_refresh: MagicMock) -> None:
+        from qb import find_by_doc_numbers
+
+        tx_type = MagicMock()
+        first = MagicMock(DocNumber="A")
+        tx_type.where.side_effect = [[first], [MagicMock(DocNumber="O'B")]]
+
+        found = find_by_doc_numbers(tx_type, ["C", "A", "O'B", "A"])
+
+        self.assertEqual(tx_type.where.call_count, 2)
+        self.assertEqual(
+            tx_type.where.call_args_list[0].args[0], "DocNumber IN ('A', 'C')"
+        )
+        self.assertEqual(
+            tx_type.where.call_args_list[1].args[0], "DocNumber IN ('O\\'B')"
+        )
+        self.assertIs(found["A"], first)
+        self.assertEqual(set(found), {"A", "O'B"})
+
+
+class TestApplyCorrection(unittest.TestCase):
+    """Test the bulk correction framework used by fix_wld_online_tips."""
+
+    def _receipt(self, txn_id: str, tips: float) -> SalesReceipt:
+        def line(description: str, amount: float) -> dict[str, object]:
+            return {
+                "Description": description,
+                "Amount": amount,
+                "DetailType": "SalesItemLineDetail",
+                "SalesItemLineDetail": {"Qty": 1, "UnitPrice": amount},
+            }
+
+        return SalesReceipt.from_json(
+            {
+                "Id": txn_id,
+                "SyncToken": "3",
+                "DocNumber": f"DS-{txn_id}",
+                "TxnDate": "2024-02-01",
+                "PrivateNote": "note",
+                "Line": [
+                    line("Online Credit Card", 100.0),
+                    line("Online WLD Tips", tips),
+                ],
+            }
+        )
+
+    def _correction(self) -> object:
+        from quickbooks.objects import SalesReceipt
+
+        from qb import Correction, fold_wld_online_tips
+
+        return Correction(
+            name="tips",
+            qb_type=SalesReceipt,
+            where_clause="TxnDate >= '2024-01-04'",
+            transform=fold_wld_online_tips,
+            fields=("Line",),
+        )
+
+    @patch("qb.batch_write")
+    @patch("qb.iter_pages")
+    @patch("qb.refresh_session")
+    def test_dry_run_reports_without_writing(
+        self,
+        mock_refresh: MagicMock,
+        mock_iter_pages: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        from qb import apply_correction
+
+        unchanged = self._receipt("1", 0)
+        changed = self._receipt("2", 5.0)
+        mock_iter_pages.return_value = [(3, [unchanged, changed])]
+
+        result = apply_correction(self._correction(), dry_run=True)
+
+        mock_batch_write.assert_not_called()
+        self.assertEqual(result.examined, 2)
+        self.assertEqual(list(result.diffs), ["2"])
+        before, after = result.diffs["2"]["Line"]
+        self.assertEqual(len(before), 2)
+        self.assertEqual(len(after), 1)
+        # the transform works on a copy
+        self.assertEqual(len(changed.Line), 2)
+
+    @patch("qb.batch_write")
+    @patch("qb.iter_pages")
+    @patch("qb.refresh_session")
+    def test_commit_sends_sparse_updates_and_checkpoints(
+        self,
+        mock_refresh: MagicMock,
+        mock_iter_pages: MagicMock,
+        mock_batch_write: MagicMock,
+    ) -> None:
+        import os
+        import tempfile
+
+        from quickbooks.objects.batchrequest import BatchOperation
+
+        from qb import BatchResult, apply_correction
+
+        mock_iter_pages.return_value = [(3, [self._receipt("2", 5.0)])]
+        mock_batch_write.return_value = BatchResult(saved={"2": MagicMock()})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, "checkpoint.json")
+            report = os.path.join(tmp, "report.ndjson")
+            result = apply_correction(
+                self._correction(),
+                dry_run=False,
+                checkpoint_path=checkpoint,
+                report_path=report,
+            )
+            with open(checkpoint, encoding="utf-8") as f:
+                self.assertEqual(json.load(f), {"tips": None})
+            with open(report, encoding="utf-8") as f:
+                self.assertEqual(json.loads(f.readline())["id"], "2")
+
+            mock_iter_pages.reset_mock()
+            apply_correction(
+                self._correction(), dry_run=False, checkpoint_path=checkpoint
+            )
+            mock_iter_pages.assert_not_called()
+
+        self.assertEqual(result.saved, ["2"])
+        key, operation, update = mock_batch_write.call_args.args[0][0]
+        self.assertEqual((key, operation), ("2", BatchOperation.UPDATE))
+        payload = json.loads(update.to_json())
+        self.assertTrue(payload["sparse"])
+        self.assertEqual((payload["Id"], payload["SyncToken"]), ("2", "3"))
+        self.assertNotIn("PrivateNote", payload)
+        self.assertEqual(payload["Line"][0]["Amount"], 105.0)
+
+
+class TestVendorIndex(unittest.TestCase):
+    """Test local vendor resolution."""
+
+    def _vendor(self, vendor_id: str, name: str) -> MagicMock:
+        vendor = MagicMock()
+        vendor.Id = vendor_id
+        vendor.DisplayName = name
+        return vendor
+
+    def setUp(self) -> None:
+        self.vendors = [
+            self._vendor("1", "Sysco San Francisco"),
+            self._vendor("2", "Sysco Sacramento"),
+            self._vendor("3", "Jersey Mikes Franchise System"),
+            self._vendor("4", "A Sub Above"),
+        ]
+
+    def test_exact_prefix_and_token_matching(self) -> None:
+        from qb import VendorIndex
+
+        index = VendorIndex(self.vendors)
+
+        self.assertIs(index.match("a sub above"), self.vendors[3])
+        self.assertIs(index.match("Sysco Sac%"), self.vendors[1])
+        self.assertIs(index.match("Jersey Mike's Franchise System"), self.vendors[2])
+        self.assertIs(index.by_id("1"), self.vendors[0])
+        self.assertIsNone(index.match("US Foods%"))
+
+    @patch("qb.REF_CACHE")
+    @patch("qb._configured_vendor_ids")
+    def test_vendor_lookup_prefers_configured_ids(
+        self, mock_configured: MagicMock, mock_ref_cache: MagicMock
+    ) -> None:
+        import qb
+
+        mock_ref_cache.vendor_index.return_value = qb.VendorIndex(self.vendors)
+        mock_configured.return_value = {"SYSFRA": "2", "NEWVND": "4"}
+        with patch("qb.vendor_ids", None):
+            self.assertIs(qb.vendor_lookup("SYSFRA"), self.vendors[1])
+            self.assertIs(qb.vendor_lookup("NEWVND"), self.vendors[3])
+            self.assertIs(qb.vendor_lookup("SYSSAC"), self.vendors[1])
+            with self.assertRaises(KeyError):
+                qb.vendor_lookup("USFOOD")
+            with self.assertRaises(KeyError):
+                qb.vendor_lookup("UNKNOWN")
+        mock_configured.assert_called_once()
 
 
 if __name__ == "__main__":
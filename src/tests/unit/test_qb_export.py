@@ -0,0 +1,162 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from quickbooks.objects import Bill
+
+
+def _bill(bill_id: int, department: str | None = None) -> Bill:
+    bill = Bill()
+    bill.Id = str(bill_id)
+    bill.DocNumber = f"INV-{bill_id}"
+    if department:
+        bill.DepartmentRef = MagicMock()
+        bill.DepartmentRef.name = department
+    return bill
+
+
+def _paged_type(records: list[Bill]) -> MagicMock:
+    """A stand-in QBO type whose where() serves start_position pages."""
+    qb_type = MagicMock()
+    qb_type.count.return_value = len(records)
+
+    def where(**kwargs: int) -> list[Bill]:
+        start = kwargs["start_position"] - 1
+        return records[start : start + kwargs["max_results"]]
+
+    qb_type.where.side_effect = where
+    return qb_type
+
+
+class TestIterPages(unittest.TestCase):
+    def test_pages_yielded_in_order_with_cursor(self) -> None:
+        from qb_export import iter_pages
+
+        records = [_bill(i) for i in range(1, 8)]
+        qb_type = _paged_type(records)
+
+        pages = list(iter_pages(qb_type, "", MagicMock(), page_size=3, max_workers=2))
+
+        self.assertEqual([cursor for cursor, _page in pages], [4, 7, 10])
+        self.assertEqual(
+            [bill.Id for _cursor, page in pages for bill in page],
+            [str(i) for i in range(1, 8)],
+        )
+        self.assertEqual(qb_type.where.call_count, 3)
+        self.assertEqual(qb_type.where.call_args.kwargs["order_by"], "TxnDate, Id")
+
+    def test_default_order_by_is_unique(self) -> None:
+        from quickbooks.objects import Bill, Vendor
+
+        from qb_export import ExportSpec, default_order_by
+
+        self.assertEqual(default_order_by(Bill), "TxnDate, Id")
+        self.assertEqual(default_order_by(Vendor), "Id")
+        self.assertEqual(ExportSpec(Vendor).order_by, "Id")
+
+    def test_start_position_skips_earlier_pages(self) -> None:
+        from qb_export import iter_pages
+
+        qb_type = _paged_type([_bill(i) for i in range(1, 8)])
+
+        pages = list(
+            iter_pages(qb_type, "", MagicMock(), start_position=4, page_size=3)
+        )
+
+        self.assertEqual(
+            [bill.Id for _c, page in pages for bill in page], ["4", "5", "6", "7"]
+        )
+
+    def test_iter_records_applies_filter(self) -> None:
+        from qb_export import iter_records
+
+        qb_type = _paged_type([_bill(1, "20358"), _bill(2, "WMC"), _bill(3)])
+
+        records = list(
+            iter_records(
+                qb_type,
+                "",
+                MagicMock(),
+                record_filter=lambda bill: bill.DepartmentRef is None,
+            )
+        )
+
+        self.assertEqual([bill.Id for bill in records], ["3"])
+
+
+class TestExportEntities(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_writes_one_json_object_per_line(self) -> None:
+        from qb_export import ExportSpec, export_entities
+
+        qb_type = _paged_type([_bill(1), _bill(2), _bill(3)])
+
+        written = export_entities(
+            [ExportSpec(qb_type, name="bills")], MagicMock(), self.tmpdir.name
+        )
+
+        self.assertEqual(written, {"bills": 3})
+        with open(
+            os.path.join(self.tmpdir.name, "bills.ndjson"), encoding="utf-8"
+        ) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(
+            [row["DocNumber"] for row in rows], ["INV-1", "INV-2", "INV-3"]
+        )
+
+    def test_compressed_output(self) -> None:
+        from qb_export import ExportSpec, export_entities
+
+        qb_type = _paged_type([_bill(1)])
+
+        export_entities(
+            [ExportSpec(qb_type, name="bills")],
+            MagicMock(),
+            self.tmpdir.name,
+            compress=True,
+        )
+
+        with gzip.open(
+            os.path.join(self.tmpdir.name, "bills.ndjson.gz"), "rt", encoding="utf-8"
+        ) as f:
+            self.assertEqual(json.loads(f.readline())["Id"], "1")
+
+    def test_resumes_from_cursor_and_skips_finished_entities(self) -> None:
+        from qb_export import ExportSpec, export_entities
+
+        cursor_path = os.path.join(self.tmpdir.name, "cursor.json")
+        with open(cursor_path, "w", encoding="utf-8") as f:
+            json.dump({"bills": 3, "credits": None}, f)
+        with open(os.path.join(self.tmpdir.name, "bills.ndjson"), "w") as f:
+            f.write('{"Id":"1"}\n{"Id":"2"}\n')
+
+        bills = _paged_type([_bill(i) for i in range(1, 5)])
+        credits = _paged_type([_bill(9)])
+
+        written = export_entities(
+            [ExportSpec(bills, name="bills"), ExportSpec(credits, name="credits")],
+            MagicMock(),
+            self.tmpdir.name,
+            cursor_path=cursor_path,
+        )
+
+        self.assertEqual(written, {"bills": 2, "credits": 0})
+        credits.count.assert_not_called()
+        with open(
+            os.path.join(self.tmpdir.name, "bills.ndjson"), encoding="utf-8"
+        ) as f:
+            self.assertEqual(
+                [json.loads(line)["Id"] for line in f], ["1", "2", "3", "4"]
+            )
+        with open(cursor_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"bills": None, "credits": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from qb_governor import RequestGovernor
+
+
+class FakeClock:
+    """Monotonic clock that only advances when the governor sleeps."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _response(status: int, headers: dict[str, str] | None = None) -> MagicMock:
+    response = MagicMock()
+    response.status_code = status
+    response.headers = headers or {}
+    return response
+
+
+class TestRequestGovernor(unittest.TestCase):
+    def _governor(self, **kwargs: int) -> tuple[RequestGovernor, FakeClock]:
+        clock = FakeClock()
+        governor = RequestGovernor(sleep=clock.sleep, clock=clock, **kwargs)
+        return governor, clock
+
+    def test_token_bucket_spaces_requests_after_burst(self) -> None:
+        governor, clock = self._governor(rate_per_minute=60, max_concurrent=1)
+
+        for _ in range(4):
+            governor.call("GET bill", lambda: _response(200), idempotent=True)
+
+        # burst capacity is two requests, then one per second
+        self.assertEqual(len(clock.sleeps), 2)
+        self.assertAlmostEqual(clock.now, 2.0)
+
+    def test_429_retried_with_retry_after(self) -> None:
+        governor, clock = self._governor()
+        responses = iter([_response(429, {"Retry-After": "3"}), _response(200)])
+
+        response = governor.call("POST bill", lambda: next(responses), idempotent=False)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(clock.sleeps, [3.0])
+        stats = governor.stats()["POST bill"]
+        self.assertEqual((stats.count, stats.retries, stats.errors), (2, 1, 1))
+
+    @patch("qb_governor.random.uniform", side_effect=lambda _lo, hi: hi)
+    def test_server_errors_only_retried_when_idempotent(
+        self, _mock_uniform: MagicMock
+    ) -> None:
+        governor, clock = self._governor(max_retries=2)
+
+        response = governor.call("POST batch", lambda: _response(503), idempotent=False)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(clock.sleeps, [])
+
+        response = governor.call("POST query", lambda: _response(503), idempotent=True)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(clock.sleeps, [1.0, 2.0])
+
+    def test_connection_error_raised_for_writes(self) -> None:
+        governor, _clock = self._governor()
+
+        def send() -> MagicMock:
+            raise requests.ConnectionError("reset")
+
+        with self.assertRaises(requests.ConnectionError):
+            governor.call("POST bill", send, idempotent=False)
+
+
+class TestGovernedQuickBooks(unittest.TestCase):
+    @patch("qb_governor.governor_for")
+    @patch("quickbooks.client.QuickBooks.process_request")
+    def test_requests_routed_through_governor(
+        self, mock_process: MagicMock, mock_governor_for: MagicMock
+    ) -> None:
+        from qb_governor import GovernedQuickBooks
+
+        client = GovernedQuickBooks(company_id="123")
+        governor = mock_governor_for.return_value
+        governor.call.side_effect = lambda _op, send, _idempotent: send()
+
+        client.process_request(
+            "POST", "https://quickbooks.api.intuit.com/v3/company/123/query", {}, {}
+        )
+        client.process_request(
+            "POST", "https://quickbooks.api.intuit.com/v3/company/123/bill", {}, {}
+        )
+
+        mock_governor_for.assert_called_with("123")
+        calls = [(c.args[0], c.args[2]) for c in governor.call.call_args_list]
+        self.assertEqual(calls, [("POST query", True), ("POST bill", False)])
+        self.assertEqual(mock_process.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
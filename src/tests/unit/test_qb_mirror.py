@@ -0,0 +1,136 @@
+import datetime
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from quickbooks.objects import SalesReceipt
+
+
+def _receipt(
+    txn_id: str, txn_date: str, store: str, amount: str, linked: bool = False
+) -> SalesReceipt:
+    return SalesReceipt.from_json(
+        {
+            "Id": txn_id,
+            "TxnDate": txn_date,
+            "DocNumber": f"DS-{store}-{txn_date}",
+            "TotalAmt": amount,
+            "DepartmentRef": {"value": "1", "name": store},
+            "LinkedTxn": [{"TxnId": "99", "TxnType": "Deposit"}] if linked else [],
+        }
+    )
+
+
+class TestTransactionMirror(unittest.TestCase):
+    def setUp(self) -> None:
+        from qb_mirror import TransactionMirror
+
+        self.mirror = TransactionMirror(":memory:", entities=(SalesReceipt,))
+        self.addCleanup(self.mirror.close)
+
+    @patch("qb_mirror.change_data_capture")
+    @patch("qb_mirror.iter_records")
+    def test_first_sync_backfills_then_uses_cdc(
+        self, mock_iter_records: MagicMock, mock_cdc: MagicMock
+    ) -> None:
+        mock_iter_records.return_value = [
+            _receipt("1", "2025-01-10", "20358", "100.50"),
+            _receipt("2", "2025-01-10", "20367", "200.00", linked=True),
+        ]
+
+        self.mirror.sync(MagicMock(), since=datetime.date(2025, 1, 1))
+
+        mock_iter_records.assert_called_once()
+        self.assertEqual(mock_iter_records.call_args[0][1], "TxnDate >= '2025-01-01'")
+        mock_cdc.assert_not_called()
+
+        deleted = SimpleNamespace(Id="1", status="Deleted")
+        mock_cdc.return_value = SimpleNamespace(
+            SalesReceipt=[deleted, _receipt("3", "2025-01-11", "20358", "50.00")]
+        )
+
+        changed = self.mirror.sync(MagicMock(), since=datetime.date(2025, 1, 1))
+
+        self.assertEqual(changed, {"SalesReceipt": 2})
+        mock_iter_records.assert_called_once()
+        receipts = self.mirror.sales_receipts(
+            datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)
+        )
+        self.assertEqual([r.Id for r in receipts], ["2", "3"])
+
+    @patch("qb_mirror.change_data_capture")
+    @patch("qb_mirror.iter_records")
+    def test_earlier_since_or_truncated_cdc_backfills(
+        self, mock_iter_records: MagicMock, mock_cdc: MagicMock
+    ) -> None:
+        from qb_mirror import CDC_MAX_RESULTS
+
+        mock_iter_records.return_value = []
+        self.mirror.sync(MagicMock(), since=datetime.date(2025, 1, 1))
+
+        self.mirror.sync(MagicMock(), since=datetime.date(2024, 12, 1))
+        self.assertEqual(mock_iter_records.call_args[0][1], "TxnDate >= '2024-12-01'")
+        mock_cdc.assert_not_called()
+
+        mock_cdc.return_value = SimpleNamespace(
+            SalesReceipt=[SimpleNamespace(Id=str(i)) for i in range(CDC_MAX_RESULTS)]
+        )
+        self.mirror.sync(MagicMock(), since=datetime.date(2025, 1, 1))
+        self.assertEqual(mock_iter_records.call_count, 3)
+
+    @patch("qb_mirror.iter_records")
+    def test_queries(self, mock_iter_records: MagicMock) -> None:
+        mock_iter_records.return_value = [
+            _receipt("1", "2025-01-10", "20358", "100.50"),
+            _receipt("2", "2025-01-10", "20367", "200.00", linked=True),
+            _receipt("3", "2025-01-11", "20358", "0"),
+            _receipt("4", "2025-02-01", "20358", "10.00"),
+        ]
+        self.mirror.sync(MagicMock(), since=datetime.date(2025, 1, 1))
+
+        unlinked = self.mirror.sales_receipts(
+            datetime.date(2025, 1, 1), datetime.date(2025, 1, 31), unlinked_only=True
+        )
+        self.assertEqual([r.Id for r in unlinked], ["1"])
+        self.assertEqual(Decimal(str(unlinked[0].TotalAmt)), Decimal("100.50"))
+        self.assertEqual(unlinked[0].DepartmentRef.name, "20358")
+
+        stores = self.mirror.sales_receipt_stores(
+            datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)
+        )
+        self.assertEqual(
+            stores, {"2025-01-10": {"20358", "20367"}, "2025-01-11": {"20358"}}
+        )
+
+
+class TestMirrorBackedQueries(unittest.TestCase):
+    @patch("qb.refresh_session")
+    @patch("qb.SalesReceipt")
+    def test_unlinked_sales_receipts_read_from_mirror(
+        self, mock_sales_receipt: MagicMock, mock_refresh: MagicMock
+    ) -> None:
+        import qb
+
+        mirror = MagicMock()
+        mirror.sales_receipts.return_value = [
+            _receipt("1", "2025-01-10", "20358", "100.50")
+        ]
+        with (
+            patch("qb.MIRROR_PATH", "/tmp/mirror.sqlite3"),
+            patch("qb.MIRROR", mirror),
+        ):
+            result = qb.get_unlinked_sales_receipts(
+                datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)
+            )
+
+        mirror.sync.assert_called_once_with(
+            mock_refresh.return_value, datetime.date(2025, 1, 1)
+        )
+        mock_sales_receipt.count.assert_not_called()
+        self.assertEqual([r["id"] for r in result], ["1"])
+        self.assertEqual(result[0]["amount"], "100.50")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Unit tests for the reconcile matching engine.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from reconcile import LedgerEntry, match_entries
+
+
+def _entry(key: str, amount: str, day: int, store: str = "20358") -> LedgerEntry:
+    return LedgerEntry(key, Decimal(amount), date(2025, 3, day), store)
+
+
+class TestMatchEntries:
+    """Tests for match_entries()."""
+
+    def test_matches_amount_store_within_tolerance(self) -> None:
+        """A partner a couple of days later for the same store is matched."""
+        result = match_entries(
+            [_entry("r1", "100.00", 3), _entry("r2", "50.00", 3)],
+            [
+                _entry("d1", "100.00", 5),
+                _entry("d2", "50.00", 3, store="20395"),
+                _entry("d3", "50.00", 9),
+            ],
+            date_tolerance_days=3,
+        )
+
+        assert [(r.key, d.key) for r, d in result.matched] == [("r1", "d1")]
+        assert [r.key for r in result.unmatched_left] == ["r2"]
+        assert [d.key for d in result.unmatched_right] == ["d2", "d3"]
+
+    def test_closest_date_wins_and_each_partner_used_once(self) -> None:
+        """Equal amounts pair with the nearest unused partner."""
+        result = match_entries(
+            [_entry("r1", "20.00", 4), _entry("r2", "20.00", 6)],
+            [_entry("d1", "20.00", 6), _entry("d2", "20.00", 4)],
+            date_tolerance_days=3,
+        )
+
+        assert [(r.key, d.key) for r, d in result.matched] == [
+            ("r1", "d2"),
+            ("r2", "d1"),
+        ]
+
+    def test_equally_close_candidates_are_ambiguous(self) -> None:
+        """Two partners the same distance away are reported, not guessed."""
+        result = match_entries(
+            [_entry("r1", "20.00", 5)],
+            [_entry("d1", "20.00", 4), _entry("d2", "20.00", 6)],
+            date_tolerance_days=1,
+        )
+
+        assert result.matched == []
+        assert [(r.key, [d.key for d in c]) for r, c in result.ambiguous] == [
+            ("r1", ["d1", "d2"])
+        ]
+        assert result.unmatched_right == []
+
+    def test_amount_only_matching(self) -> None:
+        """Undated entries without stores match on cents alone."""
+        result = match_entries(
+            [LedgerEntry("a", Decimal("12.5"))],
+            [LedgerEntry("b", Decimal("12.50"), store="x")],
+            match_store=False,
+        )
+
+        assert [(r.key, d.key) for r, d in result.matched] == [("a", "b")]
+
+    def test_slow_year_of_data_is_indexed(self) -> None:
+        """A year of daily entries for several stores matches one-to-one."""
+        stores = [str(20358 + i) for i in range(10)]
+        start = date(2025, 1, 1)
+        receipts = []
+        deposits = []
+        for day in range(365):
+            for store in stores:
+                amount = Decimal(1000 + day) + Decimal(int(store) % 100) / 100
+                txn_date = start + timedelta(days=day)
+                receipts.append(LedgerEntry(f"r{day}{store}", amount, txn_date, store))
+                deposits.append(
+                    LedgerEntry(
+                        f"d{day}{store}", amount, txn_date + timedelta(days=2), store
+                    )
+                )
+
+        result = match_entries(receipts, deposits, date_tolerance_days=3)
+
+        assert len(result.matched) == len(receipts)
+        assert result.unmatched_left == result.unmatched_right == []
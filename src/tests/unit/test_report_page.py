@@ -0,0 +1,95 @@
+"""
+Unit tests for the parse-once report page model.
+"""
+
+import logging
+import timeit
+from pathlib import Path
+from typing import Any
+
+from bs4 import BeautifulSoup, Tag
+
+from flexepos import parse_daily_sales_summary
+from report_page import ReportPage
+
+logger = logging.getLogger(__name__)
+
+# Captured Flexepos Daily Sales report
+SAMPLE = (Path(__file__).parents[2] / "sample.html").read_text()
+TABLES = ["TotalSales", "Payments", "TotalTax", "Deposits", "GiftCards"]
+LABELS = ["Gift Cards Sold", "Register Audit"]
+
+
+def _find_element_text_by_label(soup: BeautifulSoup, label_text: str) -> str | None:
+    """Text of the first section-header div containing ``label_text``."""
+    for header in soup.find_all("div", class_="section-header"):
+        if isinstance(header, Tag) and label_text in header.get_text():
+            return header.get_text().strip()
+    return None
+
+
+def _soup_lookups(html: str) -> tuple[dict[str, Any], dict[str, Any]]:
+    """The lookups as the scrapers did them before ReportPage."""
+    soup = BeautifulSoup(html, features="html.parser")
+    tables = {}
+    for table_id in TABLES:
+        table = soup.find("table", attrs={"id": table_id})
+        tables[table_id] = [
+            [ele.text.strip() for ele in row.find_all("td")]
+            for row in table.find_all("tr")  # type: ignore[union-attr]
+        ]
+    labels = {label: _find_element_text_by_label(soup, label) for label in LABELS}
+    return tables, labels
+
+
+def _page_lookups(html: str) -> tuple[dict[str, Any], dict[str, Any]]:
+    page = ReportPage(html)
+    tables = {table_id: page.table_rows(table_id) for table_id in TABLES}
+    labels = {label: page.label_text(label) for label in LABELS}
+    return tables, labels
+
+
+class TestReportPage:
+    """Tests for ReportPage lookups."""
+
+    def test_lookups_match_beautifulsoup(self) -> None:
+        """Table cells and labels read the same as the BeautifulSoup lookups."""
+        assert _page_lookups(SAMPLE) == _soup_lookups(SAMPLE)
+
+    def test_daily_sales_summary_from_sample(self) -> None:
+        """The captured report parses into the expected QuickBooks lines."""
+        summary = parse_daily_sales_summary(ReportPage(SAMPLE), "20358")
+
+        assert summary["Pre-Discount Sales"] == "1,957.68"
+        assert summary["Sales Tax"] == "65.18"
+        assert summary["Register Audit"] == "322.55"
+        assert summary["Bank Deposits"].startswith("11/19/2025 21:11 Bank Deposit")
+
+    def test_missing_elements_and_rendered_text(self) -> None:
+        """Absent ids give None; text() keeps one line per table row."""
+        page = ReportPage(
+            '<div id="payins"><table>'
+            "<tr><th>Type</th><th>Amount</th></tr>"
+            "<tr><td>Payin\n  cash</td><td>12.00</td></tr>"
+            "</table></div>"
+        )
+
+        assert page.table("payins") is None
+        assert page.table_rows("missing") is None
+        assert page.label_text("Register Audit") is None
+        assert page.text("payins") == "Type Amount\nPayin cash 12.00"
+        assert ReportPage("").find("anything") is None
+
+    def test_slow_benchmark_against_beautifulsoup(self) -> None:
+        """Log ReportPage and BeautifulSoup lookup times on the captured page.
+
+        Timings vary too much on shared runners to assert on; run with
+        ``-m slow --log-cli-level=INFO`` to see them.
+        """
+        soup_seconds = min(timeit.repeat(lambda: _soup_lookups(SAMPLE), number=5))
+        page_seconds = min(timeit.repeat(lambda: _page_lookups(SAMPLE), number=5))
+        logger.info(
+            "BeautifulSoup: %.1fms, ReportPage: %.1fms per Daily Sales page",
+            soup_seconds * 1000 / 5,
+            page_seconds * 1000 / 5,
+        )
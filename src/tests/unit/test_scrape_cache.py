@@ -0,0 +1,171 @@
+"""
+Unit tests for the scrape cache and its use by the Flexepos clients.
+"""
+
+import datetime
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from flexepos import NO_JOURNAL_DATA, cached_daily_journal, cached_daily_sales
+from scrape_cache import DAILY_JOURNAL, DAILY_SALES, GIFT_CARD_ACH, LocalScrapeCache
+
+TX_DATE = datetime.date(2025, 3, 14)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> LocalScrapeCache:
+    return LocalScrapeCache(tmp_path, version=1)
+
+
+class TestScrapeCache:
+    """Tests for ScrapeCache keys, fetch and invalidation."""
+
+    def test_fetch_scrapes_once(self, cache: LocalScrapeCache) -> None:
+        """A cached result is served without running the scrape again."""
+        scrape = MagicMock(return_value={"Cash": "12.00"})
+
+        assert cache.fetch(DAILY_SALES, "20358", TX_DATE, scrape) == {"Cash": "12.00"}
+        assert cache.fetch(DAILY_SALES, "20358", TX_DATE, scrape) == {"Cash": "12.00"}
+        scrape.assert_called_once()
+        assert (
+            cache.directory / "daily_sales" / "v1" / "2025-03-14" / "20358.json"
+        ).exists()
+
+    def test_keep_predicate_and_parser_version(self, cache: LocalScrapeCache) -> None:
+        """Rejected results are not stored; a new version misses old entries."""
+        cache.fetch(DAILY_SALES, "20358", TX_DATE, lambda: {}, keep=bool)
+        assert cache.get(DAILY_SALES, "20358", TX_DATE) is None
+
+        cache.put(DAILY_SALES, "20358", TX_DATE, {"Cash": "12.00"})
+        assert (
+            LocalScrapeCache(cache.directory, version=2).get(
+                DAILY_SALES, "20358", TX_DATE
+            )
+            is None
+        )
+
+    def test_invalidate_by_store_and_date(self, cache: LocalScrapeCache) -> None:
+        """invalidate() drops only the entries matching store and date."""
+        next_day = TX_DATE + datetime.timedelta(days=1)
+        for store in ("20358", "20395"):
+            for tx_date in (TX_DATE, next_day):
+                cache.put(DAILY_SALES, store, tx_date, {"Cash": "1.00"})
+        cache.put(DAILY_JOURNAL, "20358", TX_DATE, "journal")
+
+        assert cache.invalidate(DAILY_SALES, "20358", TX_DATE) == 1
+        assert cache.get(DAILY_SALES, "20358", TX_DATE) is None
+        assert cache.get(DAILY_SALES, "20358", next_day) is not None
+        assert cache.invalidate(DAILY_SALES, tx_date=next_day) == 2
+        assert cache.invalidate(DAILY_SALES) == 1
+        assert cache.get(DAILY_JOURNAL, "20358", TX_DATE) == "journal"
+
+    def test_invalidate_failure_is_logged_not_raised(
+        self, cache: LocalScrapeCache
+    ) -> None:
+        cache.put(DAILY_SALES, "20358", TX_DATE, {"Cash": "1.00"})
+
+        with patch.object(cache, "_delete", side_effect=PermissionError("denied")):
+            assert cache.invalidate(DAILY_SALES) == 0
+        assert cache.get(DAILY_SALES, "20358", TX_DATE) is not None
+
+    def test_corrupt_entry_is_a_miss(self, cache: LocalScrapeCache) -> None:
+        path = cache.directory / "daily_sales" / "v1" / "2025-03-14" / "20358.json"
+        path.parent.mkdir(parents=True)
+        path.write_text("{truncated")
+
+        assert cache.get(DAILY_SALES, "20358", TX_DATE) is None
+
+
+class TestCachedReports:
+    """Tests for the cache-aware daily sales and journal helpers."""
+
+    def test_incomplete_daily_sales_not_cached(self, cache: LocalScrapeCache) -> None:
+        """Sales without the pay-ins section are scraped again next time."""
+        partial: dict[str, Any] = {"20358": {"Cash": "12.00"}}
+        complete: dict[str, Any] = {"20358": {"Cash": "12.00", "Payins": ""}}
+        scrape = MagicMock(side_effect=[partial, complete])
+
+        assert cached_daily_sales(cache, "20358", TX_DATE, scrape) == partial
+        assert cached_daily_sales(cache, "20358", TX_DATE, scrape) == complete
+        assert cached_daily_sales(cache, "20358", TX_DATE, scrape) == complete
+        assert scrape.call_count == 2
+
+        scrape.side_effect = [complete]
+        cached_daily_sales(cache, "20358", TX_DATE, scrape, refresh=True)
+        assert scrape.call_count == 3
+
+    def test_daily_journal_scrapes_only_missing_stores(
+        self, cache: LocalScrapeCache
+    ) -> None:
+        cache.put(DAILY_JOURNAL, "20358", TX_DATE, "cached journal")
+        scrape = MagicMock(
+            return_value={"20395": "new journal", "20400": NO_JOURNAL_DATA}
+        )
+
+        journals = cached_daily_journal(
+            cache, ["20400", "20358", "20395"], "03142025", scrape
+        )
+
+        scrape.assert_called_once_with(["20400", "20395"])
+        assert journals == {
+            "20400": NO_JOURNAL_DATA,
+            "20358": "cached journal",
+            "20395": "new journal",
+        }
+        assert list(journals) == ["20400", "20358", "20395"]
+        assert cache.get(DAILY_JOURNAL, "20395", TX_DATE) == "new journal"
+        assert cache.get(DAILY_JOURNAL, "20400", TX_DATE) is None
+
+    @patch("flexepos.initialise_driver")
+    @patch("flexepos.SSMParameterStore")
+    def test_flexepos_cache_hit_skips_login(
+        self,
+        _mock_ssm: MagicMock,
+        mock_init: MagicMock,
+        cache: LocalScrapeCache,
+    ) -> None:
+        from flexepos import Flexepos
+
+        cache.put(DAILY_SALES, "20358", TX_DATE, {"Payins": "", "Cash": "12.00"})
+
+        sales = Flexepos(cache=cache).get_daily_sales("20358", TX_DATE)
+
+        assert sales == {"20358": {"Payins": "", "Cash": "12.00"}}
+        mock_init.assert_not_called()
+
+    @patch("flexepos.SSMParameterStore")
+    def test_gift_card_ach_pulls_only_new_weeks(
+        self, _mock_ssm: MagicMock, cache: LocalScrapeCache
+    ) -> None:
+        """Weeks already pulled come from the cache; only new ones are scraped."""
+        from flexepos import Flexepos
+
+        first_friday = datetime.date(2025, 3, 7)
+        second_friday = datetime.date(2025, 3, 14)
+        cache.put(GIFT_CARD_ACH, "20358", first_friday, [["1330", "sold", "-5.00"]])
+        cache.put(GIFT_CARD_ACH, "20395", first_friday, [])
+        scrape = MagicMock(
+            return_value={
+                ("20358", second_friday): [["1330", "instore", "7.00"]],
+                ("20395", second_friday): [],
+            }
+        )
+
+        with patch.object(Flexepos, "scrape_gift_card_ach", scrape):
+            rows = Flexepos(cache=cache).get_gift_card_ach(
+                ["20358", "20395"],
+                datetime.date(2025, 3, 3),
+                datetime.date(2025, 3, 17),
+            )
+
+        scrape.assert_called_once_with(
+            [("20358", second_friday), ("20395", second_friday)]
+        )
+        assert [(row[1], row[3], row[4]) for row in rows] == [
+            (first_friday, [["1330", "sold", "-5.00"]], "20358"),
+            (second_friday, [["1330", "instore", "7.00"]], "20358"),
+        ]
+        assert cache.get(GIFT_CARD_ACH, "20395", second_friday) == []
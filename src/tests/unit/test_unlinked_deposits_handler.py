@@ -168,7 +168,10 @@ class TestDailySalesHandlerWithStore(unittest.TestCase):
         mock_ws_manager.return_value = mock_ws
 
         mock_flexepos = MagicMock()
-        mock_flexepos.get_daily_sales.return_value = {"20358": {"Payins": ""}}
+        mock_flexepos.get_daily_sales_batch.return_value.sales = {
+            "20358": {"Payins": ""}
+        }
+        mock_flexepos.get_daily_sales_batch.return_value.failed = {}
         mock_flexepos.get_online_payments.return_value = []
         mock_flexepos.get_royalty_report.return_value = []
         mock_flexepos_class.return_value = mock_flexepos
@@ -186,12 +189,12 @@ class TestDailySalesHandlerWithStore(unittest.TestCase):
         # it will use sequential processing
         _response = daily_sales_handler(event, None)
 
-        # Verify that get_daily_sales was called with the specific store
-        call_args = mock_flexepos.get_daily_sales.call_args
+        # Verify that the sales scrape was limited to the specific store
+        call_args = mock_flexepos.get_daily_sales_batch.call_args
         if call_args:
-            # First positional arg should be the store
-            store_arg = call_args[0][0]
-            self.assertEqual(store_arg, "20358")
+            # First positional arg should be the store batch
+            stores_arg = call_args[0][0]
+            self.assertEqual(stores_arg, ["20358"])
 
 
 if __name__ == "__main__":
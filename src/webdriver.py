@@ -1,7 +1,14 @@
 import contextlib
+import glob
 import logging
 import os
-from tempfile import mkdtemp
+import shutil
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from tempfile import gettempdir, mkdtemp
 from typing import Any
 
 from selenium import webdriver
@@ -9,11 +16,13 @@ from selenium.common.exceptions import (
     ElementNotInteractableException,
     NoSuchElementException,
     SessionNotCreatedException,
+    StaleElementReferenceException,
     TimeoutException,
     WebDriverException,
 )
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
@@ -86,40 +95,10 @@ def initialise_driver(
 
     if IS_LAMBDA:
         # AWS Lambda: use pre-bundled binaries and explicit paths
-        chrome_options.add_experimental_option(
-            "prefs",
-            {
-                "download.default_directory": (
-                    download_location if download_location else "/tmp"
-                ),
-                "download.directory_upgrade": True,
-                "download.prompt_for_download": False,
-                "credentials_enable_service": False,
-                "profile.password_manager_enabled": False,
-            },
-        )
-        if CHROME_HEADLESS == 0:
-            chrome_options.add_argument("--headless=old")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-dev-tools")
-        chrome_options.add_argument("--no-zygote")
-        chrome_options.add_argument(f"--user-data-dir={mkdtemp()}")
-        chrome_options.add_argument(f"--data-path={mkdtemp()}")
-        chrome_options.add_argument(f"--disk-cache-dir={mkdtemp()}")
-        chrome_options.add_argument("--log-path=/tmp")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.binary_location = (
-            "/opt/chrome/chrome-headless-shell-linux64/chrome-headless-shell"
-        )
-        service = Service(
-            executable_path="/opt/chrome-driver/chromedriver-linux64/chromedriver",
-            service_log_path="/tmp/chromedriver.log",
-        )
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-    elif CHROME_DEBUG_PORT != 0:
+        if os.environ.get("CHROME_REUSE", "0") == "1":
+            return _chrome_manager.acquire(download_location)
+        return _launch_lambda_chrome(download_location)
+    if CHROME_DEBUG_PORT != 0:
         # Debug port mode: attach to a running Chrome instance with remote debugging enabled
         chrome_options.debugger_address = "localhost:9222"
         # Optionally set binary_location if needed
@@ -179,19 +158,657 @@ def cleanup_safari_driver() -> None:
             _safari_driver = None
 
 
-def wait_for_element(
-    driver: Any, locator: tuple[str, str], timeout: int = 15
-) -> WebElement | None:
+# Temp directory prefix for Lambda Chrome profiles (user data, data, cache)
+CHROME_PROFILE_PREFIX = "chrome-profile-"
+
+# Profile directories of browsers that are still running
+_live_profiles: set[str] = set()
+
+
+class LambdaChrome(webdriver.Chrome):
+    """Chrome in Lambda with its profile in one temp directory.
+
+    quit() deletes the profile directory, which Lambda's /tmp otherwise
+    keeps across warm invocations. A browser shared through ChromeManager
+    is handed back for reuse instead of quitting.
+    """
+
+    profile_dir = ""
+    uses = 0
+    shared = False
+
+    def quit(self) -> None:
+        if self.shared and _chrome_manager.release(self):
+            return
+        self.shutdown()
+
+    def close(self) -> None:
+        # Closing the last window ends the session, keep it for reuse
+        if self.shared and len(self.window_handles) <= 1:
+            self.get("about:blank")
+            return
+        super().close()
+
+    def shutdown(self) -> None:
+        """Quit the browser and delete its profile."""
+        try:
+            super().quit()
+        finally:
+            _live_profiles.discard(self.profile_dir)
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+def _launch_lambda_chrome(
+    download_location: str | None = None, shared: bool = False
+) -> LambdaChrome:
+    chrome_options = ChromeOptions()
+    chrome_options.add_experimental_option(
+        "prefs",
+        {
+            "download.default_directory": (
+                download_location if download_location else "/tmp"
+            ),
+            "download.directory_upgrade": True,
+            "download.prompt_for_download": False,
+            "credentials_enable_service": False,
+            "profile.password_manager_enabled": False,
+        },
+    )
+    if int(os.environ.get("CHROME_HEADLESS", "0")) == 0:
+        chrome_options.add_argument("--headless=old")
+    profile_dir = mkdtemp(prefix=CHROME_PROFILE_PREFIX)
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-dev-tools")
+    chrome_options.add_argument("--no-zygote")
+    chrome_options.add_argument(f"--user-data-dir={profile_dir}/user-data")
+    chrome_options.add_argument(f"--data-path={profile_dir}/data")
+    chrome_options.add_argument(f"--disk-cache-dir={profile_dir}/cache")
+    chrome_options.add_argument("--log-path=/tmp")
+    chrome_options.add_argument("--disable-infobars")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.binary_location = (
+        "/opt/chrome/chrome-headless-shell-linux64/chrome-headless-shell"
+    )
+    service = Service(
+        executable_path="/opt/chrome-driver/chromedriver-linux64/chromedriver",
+        service_log_path="/tmp/chromedriver.log",
+    )
+    _live_profiles.add(profile_dir)
+    started = time.monotonic()
+    try:
+        driver = LambdaChrome(service=service, options=chrome_options)
+    except Exception:
+        _live_profiles.discard(profile_dir)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+    driver.profile_dir = profile_dir
+    driver.shared = shared
+    logger.info(
+        "Started Chrome",
+        extra={
+            "shared": shared,
+            "startup_s": round(time.monotonic() - started, 2),
+        },
+    )
+    return driver
+
+
+def remove_orphaned_profiles() -> int:
+    """Delete Chrome profile directories left by browsers that are gone.
+
+    A container frozen or timed out mid-scrape never reaches quit(), so
+    its profile stays in /tmp for the next warm invocation.
+
+    Returns:
+        Number of directories removed
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(gettempdir(), CHROME_PROFILE_PREFIX + "*")):
+        if path not in _live_profiles:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info("Removed orphaned Chrome profiles", extra={"count": removed})
+    return removed
+
+
+def _process_tree_rss_mb(pid: int) -> float:
+    """Resident memory of a process and all its descendants, from /proc."""
+    children: dict[int, list[int]] = {}
+    for stat_path in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat_path) as stat:
+                # Fields after the parenthesised command: state, ppid, ...
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(stat_path.split("/")[2]))
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as statm:
+                total += int(statm.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+        pending.extend(children.get(current, []))
+    return total / 2**20
+
+
+def _default_max_rss_mb() -> float:
+    # Half the function's memory, leaving the rest to Python and the parsers
+    return int(os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "2048")) / 2
+
+
+class ChromeManager:
+    """One Lambda Chrome kept alive across warm invocations.
+
+    With CHROME_REUSE=1, initialise_driver() takes the browser with
+    acquire() and the caller's driver.quit() gives it back with release(),
+    which clears cookies and extra tabs instead of quitting. The browser is
+    health-checked before each reuse and recycled after ``max_uses`` uses
+    or once Chrome and its driver hold more than ``max_rss_mb`` of memory.
+    A caller asking while the browser is taken gets a private one that
+    quits normally.
+
+    Some scrapers never quit their driver. Their lease is reclaimed when a
+    later Lambda invocation asks for the browser, or once it is older than
+    ``lease_timeout`` seconds (default 900, the longest a Lambda can run).
+    """
+
+    def __init__(
+        self,
+        max_uses: int = 25,
+        max_rss_mb: float | None = None,
+        lease_timeout: float = 900.0,
+    ) -> None:
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb or _default_max_rss_mb()
+        self.lease_timeout = lease_timeout
+        self._driver: LambdaChrome | None = None
+        self._in_use = False
+        self._leased_at = 0.0
+        self._leased_by: str | None = None
+        self._lock = threading.Lock()
+
+    def prewarm(self) -> None:
+        """Start the shared browser now, e.g. during the Lambda init phase."""
+        with self._lock:
+            if self._driver is None:
+                remove_orphaned_profiles()
+                self._driver = _launch_lambda_chrome(shared=True)
+
+    def acquire(self, download_location: str | None = None) -> LambdaChrome:
+        with self._lock:
+            if self._in_use:
+                if not self._lease_expired():
+                    return _launch_lambda_chrome(download_location)
+                self._reclaim()
+            if self._driver is not None and not self._healthy(self._driver):
+                self._discard("health check failed")
+            if self._driver is None:
+                remove_orphaned_profiles()
+                self._driver = _launch_lambda_chrome(download_location, shared=True)
+            else:
+                logger.info("Reusing Chrome", extra={"uses": self._driver.uses})
+                with contextlib.suppress(WebDriverException):
+                    self._driver.execute_cdp_cmd(
+                        "Page.setDownloadBehavior",
+                        {
+                            "behavior": "allow",
+                            "downloadPath": download_location or "/tmp",
+                        },
+                    )
+            self._driver.uses += 1
+            self._in_use = True
+            self._leased_at = time.monotonic()
+            self._leased_by = _invocation_id()
+            return self._driver
+
+    def release(self, driver: LambdaChrome) -> bool:
+        """Take back the shared browser.
+
+        Returns:
+            True if it was kept for reuse; False if the caller should shut
+            it down
+        """
+        with self._lock:
+            if driver is not self._driver:
+                return False
+            self._in_use = False
+            reason = self._recycle_reason(driver)
+            if reason is None:
+                try:
+                    _reset(driver)
+                    return True
+                except WebDriverException:
+                    reason = "reset failed"
+            logger.info(
+                "Recycling Chrome", extra={"reason": reason, "uses": driver.uses}
+            )
+            self._driver = None
+            return False
+
+    def _lease_expired(self) -> bool:
+        """Whether the current holder has gone without calling quit()."""
+        leased_by = self._leased_by
+        if leased_by is not None and leased_by != _invocation_id():
+            return True
+        return time.monotonic() - self._leased_at > self.lease_timeout
+
+    def _reclaim(self) -> None:
+        logger.warning(
+            "Reclaiming Chrome that was never released",
+            extra={"held_s": round(time.monotonic() - self._leased_at, 1)},
+        )
+        self._in_use = False
+        if self._driver is not None:
+            try:
+                _reset(self._driver)
+            except WebDriverException:
+                self._discard("reset failed")
+
+    def _recycle_reason(self, driver: LambdaChrome) -> str | None:
+        if driver.uses >= self.max_uses:
+            return "max uses"
+        try:
+            rss_mb = _process_tree_rss_mb(driver.service.process.pid)
+        except AttributeError:
+            return None
+        if rss_mb > self.max_rss_mb:
+            return f"memory {rss_mb:.0f}MB"
+        return None
+
+    def _healthy(self, driver: LambdaChrome) -> bool:
+        try:
+            return bool(driver.execute_script("return 1") == 1)
+        except WebDriverException:
+            return False
+
+    def _discard(self, reason: str) -> None:
+        driver, self._driver = self._driver, None
+        logger.warning("Discarding Chrome", extra={"reason": reason})
+        if driver is not None:
+            # The browser may already be gone; only its profile needs removing
+            with contextlib.suppress(Exception):
+                driver.shutdown()
+
+
+def _invocation_id() -> str | None:
+    """Identifier of the current Lambda invocation, from its trace header.
+
+    The Python runtime sets _X_AMZN_TRACE_ID afresh for every invocation.
+    """
+    return os.environ.get("_X_AMZN_TRACE_ID")
+
+
+def _reset(driver: LambdaChrome) -> None:
+    """Leave one blank tab with no cookies, as a fresh browser would have."""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        webdriver.Chrome.close(driver)
+    driver.switch_to.window(handles[0])
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.get("about:blank")
+
+
+_chrome_manager = ChromeManager(
+    int(os.environ.get("CHROME_MAX_USES", "25")),
+    float(os.environ.get("CHROME_MAX_RSS_MB", "0")) or None,
+    float(os.environ.get("CHROME_LEASE_TIMEOUT", "900")),
+)
+
+
+def prewarm_driver() -> None:
+    """Start the shared Lambda Chrome ahead of the first scrape.
+
+    Call at module import so Chrome starts during the Lambda init phase.
+    Does nothing outside Lambda or without CHROME_REUSE=1, and never
+    raises: a failed pre-warm just leaves the first scrape to start Chrome.
+    """
+    if "AWS_LAMBDA_FUNCTION_NAME" not in os.environ:
+        return
+    if os.environ.get("CHROME_REUSE", "0") != "1":
+        return
     try:
-        element = WebDriverWait(
+        _chrome_manager.prewarm()
+    except Exception:
+        logger.exception("Chrome pre-warm failed")
+
+
+# Counts XHRs on the current page so waits can tell when AJAX has finished.
+# Installed by arm_page_change(); a full navigation drops it with the page.
+_XHR_HOOK_JS = """
+var w = window;
+if (!w.__waitXhr) {
+  w.__waitXhr = {started: 0, pending: 0};
+  var send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    var state = w.__waitXhr;
+    state.started++;
+    state.pending++;
+    this.addEventListener("loadend", function () { state.pending--; });
+    return send.apply(this, arguments);
+  };
+}
+w.__waitXhr.started = 0;
+"""
+
+_PAGE_STATE_JS = """
+var w = window, xhr = w.__waitXhr || {started: 0, pending: 0};
+return {
+  ready: document.readyState === "complete",
+  busy: xhr.pending > 0 || !!(w.jQuery && w.jQuery.active > 0),
+  started: xhr.started
+};
+"""
+
+WAIT_POLL_SECONDS = 0.2
+
+
+@dataclass
+class WaitStats:
+    """Time spent in one kind of wait step, against its timeout budget."""
+
+    count: int = 0
+    timeouts: int = 0
+    waited_seconds: float = 0.0
+    budget_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+_wait_stats: dict[str, WaitStats] = {}
+_wait_stats_lock = threading.Lock()
+
+
+def _record_wait(step: str, timeout: float, waited: float, timed_out: bool) -> None:
+    with _wait_stats_lock:
+        stats = _wait_stats.setdefault(step, WaitStats())
+        stats.count += 1
+        stats.timeouts += int(timed_out)
+        stats.waited_seconds += waited
+        stats.budget_seconds += timeout
+        stats.max_seconds = max(stats.max_seconds, waited)
+
+
+def wait_stats() -> dict[str, WaitStats]:
+    """Snapshot of the wait telemetry recorded in this process."""
+    with _wait_stats_lock:
+        return {step: WaitStats(**vars(stats)) for step, stats in _wait_stats.items()}
+
+
+def reset_wait_stats() -> None:
+    with _wait_stats_lock:
+        _wait_stats.clear()
+
+
+def log_wait_stats() -> None:
+    """Log actual versus budgeted wait time per step."""
+    for step, stats in sorted(wait_stats().items()):
+        logger.info(
+            "Browser wait stats",
+            extra={
+                "step": step,
+                "count": stats.count,
+                "timeouts": stats.timeouts,
+                "waited_s": round(stats.waited_seconds, 2),
+                "budget_s": round(stats.budget_seconds, 2),
+                "max_s": round(stats.max_seconds, 2),
+            },
+        )
+
+
+def wait_until(
+    driver: Any,
+    condition: Callable[[Any], Any],
+    step: str,
+    timeout: float = 15,
+    required: bool = True,
+) -> Any:
+    """Poll ``condition`` until it returns something truthy.
+
+    Args:
+        driver: WebDriver passed to the condition
+        condition: Callable taking the driver; missing, hidden or stale
+            elements count as "not yet"
+        step: Telemetry label, e.g. "flexepos.submit"
+        timeout: Budget in seconds for this step
+        required: Raise on timeout; otherwise log and return None
+
+    Returns:
+        The condition's first truthy result, or None after a tolerated timeout
+
+    Raises:
+        TimeoutException: If ``required`` and the condition never held
+    """
+    started = time.monotonic()
+    timed_out = False
+    try:
+        return WebDriverWait(
             driver,
             timeout,
+            poll_frequency=WAIT_POLL_SECONDS,
             ignored_exceptions=[
                 NoSuchElementException,
                 ElementNotInteractableException,
+                StaleElementReferenceException,
             ],
-        ).until(EC.presence_of_element_located(locator))
+        ).until(condition)
+    except TimeoutException:
+        timed_out = True
+        if required:
+            raise
+        logger.warning("Wait step timed out", extra={"step": step, "timeout": timeout})
+        return None
+    finally:
+        _record_wait(step, timeout, time.monotonic() - started, timed_out)
+
+
+def ajax_idle(driver: Any) -> bool:
+    """Condition: the document is loaded and no tracked AJAX is in flight."""
+    state = driver.execute_script(_PAGE_STATE_JS)
+    return bool(state["ready"] and not state["busy"])
+
+
+def arm_page_change(driver: Any) -> WebElement:
+    """Start tracking AJAX and return the current root element.
+
+    Call before the click that submits a form, then wait for
+    page_changed() with the returned element.
+    """
+    driver.execute_script(_XHR_HOOK_JS)
+    root: WebElement = driver.find_element(By.TAG_NAME, "html")
+    return root
+
+
+def page_changed(old_root: WebElement) -> Callable[[Any], bool]:
+    """Condition: the page was replaced, or an AJAX update has finished.
+
+    Works for both full JSF postbacks (``old_root`` goes stale and the new
+    document finishes loading) and partial AJAX re-renders (at least one
+    request started after arm_page_change() and none are pending).
+    """
+
+    def condition(driver: Any) -> bool:
+        try:
+            old_root.tag_name  # noqa: B018
+            navigated = False
+        except StaleElementReferenceException:
+            navigated = True
+        state = driver.execute_script(_PAGE_STATE_JS)
+        if not state["ready"] or state["busy"]:
+            return False
+        return navigated or state["started"] > 0
+
+    return condition
+
+
+def table_rows_at_least(locator: tuple[str, str], rows: int) -> Callable[[Any], Any]:
+    """Condition: the table at ``locator`` has at least ``rows`` rows."""
+
+    def condition(driver: Any) -> Any:
+        table = driver.find_element(*locator)
+        return table if len(table.find_elements(By.TAG_NAME, "tr")) >= rows else False
+
+    return condition
+
+
+def download_complete(
+    directory: str, pattern: str = "*", started_after: float = 0.0
+) -> Callable[[Any], str | None]:
+    """Condition: a finished download matching ``pattern`` exists.
+
+    Returns the newest matching file modified after ``started_after`` once
+    the browser has no partial (.crdownload/.part) files left in
+    ``directory``.
+    """
+
+    def condition(_driver: Any) -> str | None:
+        if glob.glob(os.path.join(directory, "*.crdownload")) or glob.glob(
+            os.path.join(directory, "*.part")
+        ):
+            return None
+        finished = [
+            path
+            for path in glob.glob(os.path.join(directory, pattern))
+            if os.path.getmtime(path) >= started_after
+        ]
+        return max(finished, key=os.path.getmtime) if finished else None
+
+    return condition
+
+
+def click_and_wait(
+    driver: Any,
+    locator: tuple[str, str],
+    step: str,
+    timeout: float = 30,
+) -> None:
+    """Click an element that submits or navigates and wait for the result.
+
+    A timeout is logged rather than raised: the caller's next lookup fails
+    with a clearer error if the page really did not change.
+    """
+    old_root = arm_page_change(driver)
+    driver.find_element(*locator).click()
+    wait_until(driver, page_changed(old_root), step, timeout, required=False)
+
+
+def wait_for_clickable(
+    driver: Any, locator: tuple[str, str], step: str, timeout: float = 15
+) -> WebElement:
+    """Wait for an element to be visible and enabled, then return it."""
+    element: WebElement = wait_until(
+        driver, EC.element_to_be_clickable(locator), step, timeout
+    )
+    return element
+
+
+def wait_for_element(
+    driver: Any, locator: tuple[str, str], timeout: int = 15
+) -> WebElement | None:
+    try:
+        element: WebElement = wait_until(
+            driver, EC.presence_of_element_located(locator), "element_present", timeout
+        )
         return element
     except TimeoutException:
         logger.warning(f"Element {locator} not found within {timeout} seconds")
         return None
+
+
+@dataclass
+class TabJob:
+    """A page collected in its own tab by TabPool.
+
+    Attributes:
+        submit: Loads the page and starts its slow request without waiting
+            for it, e.g. clicks a report's submit button; returns a token
+            for ``collect`` such as the root from arm_page_change()
+        collect: Waits for the page to finish and returns its parsed result
+    """
+
+    submit: Callable[[Any], Any]
+    collect: Callable[[Any, Any], Any]
+
+
+@dataclass
+class TabResult:
+    """Outcome of a TabJob: its result or error, and wall time in its tab."""
+
+    value: Any = None
+    error: Exception | None = None
+    seconds: float = 0.0
+
+
+class TabPool:
+    """Overlap slow page loads across several tabs of one WebDriver.
+
+    WebDriver commands go to one window at a time, so there are no threads:
+    the pool submits up to ``max_tabs`` jobs, each in a new tab, then
+    switches to the oldest tab to collect it while the server keeps
+    rendering the others. Each finished tab is closed and the next job
+    submitted in its place. All tabs share the browser's cookies, so one
+    login serves every tab:
+
+        pool = TabPool(driver, max_tabs=3)
+        for name, result in pool.run({"tips": tips_job, "payins": payins_job}):
+            ...
+
+    The driver is back on the original window once the iteration finishes;
+    don't use it from inside the loop.
+    """
+
+    def __init__(self, driver: Any, max_tabs: int = 3) -> None:
+        self.driver = driver
+        self.max_tabs = max(1, max_tabs)
+
+    def run(self, jobs: dict[str, TabJob]) -> Iterator[tuple[str, TabResult]]:
+        """Run ``jobs`` and yield ``(name, result)`` as each one finishes."""
+        driver = self.driver
+        home = driver.current_window_handle
+        pending = deque(jobs.items())
+        active: deque[tuple[str, str, TabJob, Any, float]] = deque()
+        try:
+            while pending or active:
+                while pending and len(active) < self.max_tabs:
+                    name, job = pending.popleft()
+                    started = time.monotonic()
+                    driver.switch_to.new_window("tab")
+                    handle = driver.current_window_handle
+                    try:
+                        token = job.submit(driver)
+                    except Exception as e:
+                        self._close(handle)
+                        yield (
+                            name,
+                            TabResult(error=e, seconds=time.monotonic() - started),
+                        )
+                        continue
+                    active.append((name, handle, job, token, started))
+                if not active:
+                    continue
+                name, handle, job, token, started = active.popleft()
+                driver.switch_to.window(handle)
+                try:
+                    result = TabResult(value=job.collect(driver, token))
+                except Exception as e:
+                    result = TabResult(error=e)
+                result.seconds = time.monotonic() - started
+                self._close(handle)
+                yield name, result
+        finally:
+            for _name, handle, *_rest in active:
+                self._close(handle)
+            with contextlib.suppress(WebDriverException):
+                driver.switch_to.window(home)
+
+    def _close(self, handle: str) -> None:
+        with contextlib.suppress(WebDriverException):
+            self.driver.switch_to.window(handle)
+            self.driver.close()
@@ -144,7 +144,11 @@ locals {
     })
   }
   qb_connection_status = { prod = local.base_env_config }
-  unlinked_deposits    = { prod = local.base_env_config }
+  unlinked_deposits = {
+    prod = merge(local.base_env_config, {
+      QBO_MIRROR_PATH = "/tmp/qbo_mirror.sqlite3"
+    })
+  }
   qb_mcp = {
     prod = {
       QBO_CREDENTIAL_MODE = "aws"